@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+# benchmarks/fake_sheets_benchmark.py
+"""
+Замір кількості запитів GoogleSheetManager до Google Sheets без мережі.
+Аркуш 'Опубліковані пости' заповнюється 10 000 рядків у FakeSheetsBackend,
+після чого виконуються типові читання та пакетні записи, а кількість
+запитів з stats() порівнюється з очікуваною. Запуск з кореня проєкту:
+
+    python -m benchmarks.fake_sheets_benchmark [--rows 10000]
+"""
+
+import argparse
+import asyncio
+import logging
+import math
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import config
+from utils.fake_sheets import FakeSheetsBackend
+from utils.g_sheets import GoogleSheetManager
+from utils.quota import QuotaGovernor
+from utils.write_queue import WRITE_MAX_BATCH
+
+BENCH_ROWS = 10_000
+BENCH_LOOKUPS = 1_000
+BENCH_UPDATES = 500
+BENCH_APPENDS = 200
+
+
+def _post_rows(count: int) -> List[List[str]]:
+    headers = config.POST_SHEET_HEADER_ORDER
+    vin_column = headers.index(config.POST_SHEET_COLS['vin'])
+    rows = [list(headers)]
+    for i in range(count):
+        row = [""] * len(headers)
+        row[vin_column] = f"BENCHVIN{i:09d}"
+        rows.append(row)
+    return rows
+
+
+def _delta(before: Dict[str, int], after: Dict[str, int]) -> Dict[str, int]:
+    return {name: after.get(name, 0) - before.get(name, 0) for name in after if after.get(name, 0) != before.get(name, 0)}
+
+
+def _check(failures: List[str], stage: str, delta: Dict[str, int], counter: str, limit: int) -> None:
+    value = delta.get(counter, 0)
+    status = "OK" if value <= limit else "FAIL"
+    print(f"  [{status}] {stage}: {counter} = {value} (ліміт {limit})")
+    if value > limit:
+        failures.append(f"{stage}: {counter} = {value} > {limit}")
+
+
+async def run(rows: int) -> List[str]:
+    sheet_name = config.SHEET_NAMES['published_posts']
+    headers = config.POST_SHEET_HEADER_ORDER
+    vin_header = config.POST_SHEET_COLS['vin']
+    # Ліміт хвилинної квоти вимкнено: рахуємо запити, а не паузи
+    backend = FakeSheetsBackend({sheet_name: _post_rows(rows)}, latency=0, jitter=0, quota_per_minute=None,
+                                quota=QuotaGovernor(rate=10_000, burst=10_000))
+    failures: List[str] = []
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = GoogleSheetManager("", "", replica_path=os.path.join(tmp, "replica.db"),
+                                     journal_path=os.path.join(tmp, "journal.jsonl"), backend=backend)
+        try:
+            started = time.perf_counter()
+            await manager.authorize()
+            print(f"Авторизація і завантаження {rows} рядків: {time.perf_counter() - started:.2f} с")
+            _check(failures, "завантаження", backend.stats(), "values_batch_get", 1)
+
+            before = backend.stats()
+            started = time.perf_counter()
+            for i in range(0, rows, max(rows // BENCH_LOOKUPS, 1)):
+                if not await manager.find_car_by_vin(f"BENCHVIN{i:09d}"):
+                    failures.append(f"VIN BENCHVIN{i:09d} не знайдено")
+            await manager.get_all_records(sheet_name)
+            print(f"{BENCH_LOOKUPS} пошуків за VIN: {time.perf_counter() - started:.2f} с")
+            _check(failures, "читання з репліки", _delta(before, backend.stats()), "requests", 0)
+
+            before = backend.stats()
+            started = time.perf_counter()
+            for i in range(BENCH_UPDATES):
+                vin = f"BENCHVIN{i:09d}"
+                data = {header: "" for header in headers}
+                data[vin_header] = vin
+                data[config.POST_SHEET_COLS['status']] = 'archived'
+                await manager.update_row_by_key(sheet_name, vin, data, headers, fallback_row_index=i + 2, wait=False)
+            await manager.flush_writes(sheet_name)
+            print(f"{BENCH_UPDATES} оновлень рядків: {time.perf_counter() - started:.2f} с")
+            _check(failures, "оновлення", _delta(before, backend.stats()), "values_batch_update",
+                   math.ceil(BENCH_UPDATES / WRITE_MAX_BATCH))
+
+            before = backend.stats()
+            started = time.perf_counter()
+            new_rows = [{vin_header: f"BENCHNEW{i:09d}"} for i in range(BENCH_APPENDS)]
+            if not await manager.add_rows(sheet_name, new_rows, headers):
+                failures.append("add_rows повернув False")
+            print(f"{BENCH_APPENDS} нових рядків: {time.perf_counter() - started:.2f} с")
+            _check(failures, "додавання", _delta(before, backend.stats()), "values_append",
+                   math.ceil(BENCH_APPENDS / WRITE_MAX_BATCH))
+
+            if len(backend.rows(sheet_name)) != rows + BENCH_APPENDS + 1:
+                failures.append(f"в аркуші {len(backend.rows(sheet_name)) - 1} рядків замість {rows + BENCH_APPENDS}")
+            print(f"Усього: {backend.stats()}")
+        finally:
+            await manager.close()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=BENCH_ROWS, help="скільки рядків заповнити в аркуші")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    failures = asyncio.run(run(args.rows))
+    if failures:
+        print("Перевищено очікувану кількість запитів:\n  " + "\n  ".join(failures))
+        sys.exit(1)
+    print("Усі перевірки пройдено.")
+
+
+if __name__ == "__main__":
+    main()
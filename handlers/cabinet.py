@@ -3,7 +3,7 @@
 
 import logging
 import datetime
-import asyncio
+import html
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton, InputMediaPhoto
 from telegram.ext import (
     ContextTypes, CommandHandler, MessageHandler, filters, ConversationHandler, CallbackQueryHandler
@@ -25,6 +25,7 @@ from .channel import (
 from .ria import (
     ria_menu as ria_menu_func,
     get_ria_add_handler,
+    get_ria_bulk_import_handler,
     get_ria_publish_draft_handler,
     get_ria_renew_handler,
     ria_manual_full_check,
@@ -32,13 +33,18 @@ from .ria import (
 )
 from .finance import finance_menu as finance_menu_func
 from handlers.utils import determine_fuel_type
-from utils.sync import synchronize_working_sheets
+from utils.sync import request_sync
 from utils.helpers import escape_markdown_v2
+from utils.records import CarRecord, PostRecord
+from utils.reports import send_report
 
 
 logger = logging.getLogger(__name__)
 gs_manager = None
 
+# Скільки авто з кнопкою «Виправити» показувати на одній сторінці
+UNKNOWN_FUEL_PAGE_SIZE = 8
+
 
 # --- Нові "обгортки" для виправлення помилки TypeError ---
 async def repost_action_wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -357,13 +363,14 @@ async def owner_show_manager_summary(update: Update, context: ContextTypes.DEFAU
         return config.OWNER_PANEL_MAIN
 
     total_cars = sum(summary.values())
-    message_text = f"<b>Загальна статистика (з робочих аркушів):</b>\nВсього авто на площадках/в дорозі: <b>{total_cars}</b>\n\n<b>По менеджерах:</b>\n"
-    for manager_id, car_count in summary.items():
-        name = config.MANAGER_NAMES.get(manager_id, f"ID: {manager_id}")
-        message_text += f" • {name}: <b>{car_count} авто</b>\n"
+    header = f"<b>Загальна статистика (з робочих аркушів):</b>\nВсього авто на площадках/в дорозі: <b>{total_cars}</b>\n\n<b>По менеджерах:</b>"
+    lines = (
+        f" • {html.escape(str(config.MANAGER_NAMES.get(manager_id, f'ID: {manager_id}')))}: <b>{car_count} авто</b>"
+        for manager_id, car_count in summary.items()
+    )
     
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="owner_back_to_menu")]]
-    await query.message.edit_text(message_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await send_report(query.message, lines, parse_mode='HTML', header=header, extra_rows=keyboard, edit=True)
     return config.OWNER_PANEL_MAIN
 
 async def owner_show_financial_summary(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -376,18 +383,20 @@ async def owner_show_financial_summary(update: Update, context: ContextTypes.DEF
     location_summary = {}
 
     for sheet_name in config.WORKING_SHEETS:
-        records = await gs_manager.get_all_records(sheet_name, expected_headers=config.CAR_SHEET_HEADER_ORDER)
+        records = await gs_manager.get_typed_records(sheet_name, CarRecord)
         if records:
-            sheet_total = sum(float(str(rec.get(config.CAR_SHEET_COLS['price'], 0) or 0).replace(" ", "").replace("\xa0", "")) for rec in records)
+            sheet_total = sum(rec.price or 0 for rec in records)
             total_value += sheet_total
             location_summary[sheet_name] = (len(records), sheet_total)
 
-    message_text = f"💰 <b>Фінансові підсумки</b>\n\n<b>Загальна вартість активів: ${total_value:,.2f}</b>\n\n<b>Розбивка по локаціях:</b>\n"
-    for location, (count, value) in location_summary.items():
-        message_text += f" • {location} ({count} авто): <b>${value:,.2f}</b>\n"
+    header = f"💰 <b>Фінансові підсумки</b>\n\n<b>Загальна вартість активів: ${total_value:,.2f}</b>\n\n<b>Розбивка по локаціях:</b>"
+    lines = (
+        f" • {html.escape(location)} ({count} авто): <b>${value:,.2f}</b>"
+        for location, (count, value) in location_summary.items()
+    )
 
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="owner_back_to_menu")]]
-    await query.message.edit_text(message_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await send_report(query.message, lines, parse_mode='HTML', header=header, extra_rows=keyboard, edit=True)
     return config.OWNER_PANEL_MAIN
 
 async def owner_show_sales_rating(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -396,7 +405,7 @@ async def owner_show_sales_rating(update: Update, context: ContextTypes.DEFAULT_
     await query.answer()
     await query.message.edit_text("👑 Панель Власника\n⏳ Аналізую продажі за поточний місяць...")
     
-    archive_records = await gs_manager.get_all_records(config.SHEET_NAMES['archive'])
+    archive_records = await gs_manager.get_typed_records(config.SHEET_NAMES['archive'], PostRecord)
     if not archive_records:
         await query.edit_message_text("В архіві ще немає жодного запису про продажі.")
         return config.OWNER_PANEL_MAIN
@@ -408,18 +417,15 @@ async def owner_show_sales_rating(update: Update, context: ContextTypes.DEFAULT_
         try:
             # --- ВИПРАВЛЕНО: Прибрано умову перевірки локації ---
             # Тепер будь-який продаж з архіву буде враховано
-            sale_date_str = record.get(config.POST_SHEET_COLS['date'])
-            if not sale_date_str: continue
-
-            sale_date = datetime.datetime.fromisoformat(sale_date_str)
+            sale_date = record.date
+            if not sale_date: continue
             
             if sale_date.year == now.year and sale_date.month == now.month:
                 seller_id_str = record.get(config.ARCHIVE_SHEET_COLS['seller_id'])
                 if not seller_id_str: continue
                 seller_id = int(seller_id_str)
                 
-                price_str = str(record.get(config.POST_SHEET_COLS['price'], 0) or 0).replace(" ", "").replace("\xa0", "")
-                price = float(price_str)
+                price = record.price or 0
                 
                 if seller_id not in sales_by_manager:
                     sales_by_manager[seller_id] = {'count': 0, 'total_sum': 0}
@@ -434,15 +440,15 @@ async def owner_show_sales_rating(update: Update, context: ContextTypes.DEFAULT_
         await query.message.edit_text("Цього місяця ще не було зафіксовано продажів.")
         return config.OWNER_PANEL_MAIN
 
-    message_text = f"🏆 <b>Рейтинг продажів за {now.strftime('%B %Y')}</b>\n\n"
+    header = f"🏆 <b>Рейтинг продажів за {now.strftime('%B %Y')}</b>\n"
     sorted_sellers = sorted(sales_by_manager.items(), key=lambda item: item[1]['total_sum'], reverse=True)
-
-    for seller_id, data in sorted_sellers:
-        name = config.MANAGER_NAMES.get(seller_id, f"ID: {seller_id}")
-        message_text += f" • <b>{name}</b>: {data['count']} авто на суму <b>${data['total_sum']:,.2f}</b>\n"
+    lines = (
+        f" • <b>{html.escape(str(config.MANAGER_NAMES.get(seller_id, f'ID: {seller_id}')))}</b>: {data['count']} авто на суму <b>${data['total_sum']:,.2f}</b>"
+        for seller_id, data in sorted_sellers
+    )
 
     keyboard = [[InlineKeyboardButton("⬅️ Назад", callback_data="owner_back_to_menu")]]
-    await query.message.edit_text(message_text, reply_markup=InlineKeyboardMarkup(keyboard), parse_mode='HTML')
+    await send_report(query.message, lines, parse_mode='HTML', header=header, extra_rows=keyboard, edit=True)
     return config.OWNER_PANEL_MAIN
 
 async def show_fleet_stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -527,24 +533,22 @@ async def show_unknown_fuel_cars(update: Update, context: ContextTypes.DEFAULT_T
         await query.message.edit_text("Не знайдено авто з нерозпізнаним типом пального.")
         return
 
-    await query.message.reply_text(
-        "<b>❓ Авто з нерозпізнаним типом пального:</b>\nНатисніть на кнопку, щоб виправити поле 'Модифікація'.",
-        parse_mode='HTML'
+    def items():
+        for car in unknown_cars:
+            model = car.get(config.POST_SHEET_COLS['model'], 'Без назви')
+            vin = car.get(config.POST_SHEET_COLS['vin'], 'Без VIN')
+            modification = car.get(config.POST_SHEET_COLS['modification'], 'Без опису')
+            
+            line = f" • {html.escape(str(model))} (<code>{html.escape(str(vin))}</code>)\n   <i>Поточна модифікація: «{html.escape(str(modification or 'пусто'))}»</i>"
+            yield line, InlineKeyboardButton(f"✏️ Виправити: {model}"[:64], callback_data=f"fix_fuel_{vin}")
+
+    # Одне повідомлення зі сторінками замість окремого повідомлення на кожне авто
+    await send_report(
+        query.message, items(), parse_mode='HTML',
+        header="<b>❓ Авто з нерозпізнаним типом пального:</b>\nНатисніть на кнопку, щоб виправити поле 'Модифікація'.\n",
+        max_items=UNKNOWN_FUEL_PAGE_SIZE
     )
 
-    for car in unknown_cars:
-        model = car.get(config.POST_SHEET_COLS['model'], 'Без назви')
-        vin = car.get(config.POST_SHEET_COLS['vin'], 'Без VIN')
-        modification = car.get(config.POST_SHEET_COLS['modification'], 'Без опису')
-        
-        message_text = f" • {model} (<code>{vin}</code>)\n   <i>Поточна модифікація: «{modification or 'пусто'}»</i>"
-        
-        keyboard = InlineKeyboardMarkup([[
-            InlineKeyboardButton("✏️ Виправити", callback_data=f"fix_fuel_{vin}")
-        ]])
-        
-        await query.message.reply_text(message_text, parse_mode='HTML', reply_markup=keyboard)
-
 
 # --- Функція: Прибуття авто ---
 
@@ -633,7 +637,7 @@ async def car_arrival_done_photos(update: Update, context: ContextTypes.DEFAULT_
             "✅ Успішно! Авто переміщено. Зміни на робочих аркушах з'являться після наступної синхронізації.",
             reply_markup=get_employee_keyboard(update.effective_user.id)
         )
-        asyncio.create_task(synchronize_working_sheets(gs_manager))
+        request_sync(gs_manager, {record_to_update.get(config.POST_SHEET_COLS['vin'])})
     else:
         await update.message.reply_text(
             "❌ Помилка при оновленні даних в таблиці.",
@@ -779,7 +783,7 @@ async def manage_move_skip_photos(update: Update, context: ContextTypes.DEFAULT_
         reply_markup=get_employee_keyboard(update.effective_user.id)
     )
     
-    asyncio.create_task(synchronize_working_sheets(gs_manager))
+    request_sync(gs_manager, {post_info['record'].get(config.POST_SHEET_COLS['vin'])})
     
     return ConversationHandler.END
 
@@ -825,7 +829,7 @@ async def manage_move_done_photos(update: Update, context: ContextTypes.DEFAULT_
         reply_markup=get_employee_keyboard(update.effective_user.id)
     )
     
-    asyncio.create_task(synchronize_working_sheets(gs_manager))
+    request_sync(gs_manager, {post_info['record'].get(config.POST_SHEET_COLS['vin'])})
     
     return ConversationHandler.END
 
@@ -835,6 +839,7 @@ def get_cabinet_handler() -> ConversationHandler:
     """Створює єдиний, спрощений обробник для всього функціоналу кабінету."""
     add_publish_handler = get_add_or_publish_handler()
     ria_add_handler = get_ria_add_handler()
+    ria_bulk_import_handler = get_ria_bulk_import_handler()
     ria_publish_draft_handler = get_ria_publish_draft_handler()
     ria_renew_handler = get_ria_renew_handler()
     sell_car_states = get_sell_car_states()
@@ -888,6 +893,7 @@ def get_cabinet_handler() -> ConversationHandler:
             
             config.RIA_MENU_STATE: [
                 ria_add_handler,
+                ria_bulk_import_handler,
                 ria_publish_draft_handler,
                 ria_renew_handler,
                 CallbackQueryHandler(ria_manual_full_check, pattern="^ria_check_full$"),
@@ -983,7 +989,7 @@ async def fix_fuel_get_modification(update: Update, context: ContextTypes.DEFAUL
 
     if success:
         await update.message.reply_text(f"✅ Модифікацію для <b>{record.get(config.POST_SHEET_COLS['model'])}</b> оновлено на '<code>{new_modification}</code>'.", parse_mode='HTML', reply_markup=get_employee_keyboard(user.id))
-        asyncio.create_task(synchronize_working_sheets(gs_manager))
+        request_sync(gs_manager, {vin})
     else:
         await update.message.reply_text("❌ Не вдалося оновити дані в таблиці.", reply_markup=get_employee_keyboard(user.id))
 
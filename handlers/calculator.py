@@ -63,12 +63,11 @@ async def parse_auction_data_from_gsheet(gs_manager_instance: GoogleSheetManager
     rates = {}
     logger.info(f"Спроба завантажити тарифи з аркуша Google: '{sheet_name}'")
     try:
-        sheet = await gs_manager_instance.get_sheet(sheet_name)
-        if not sheet:
+        all_values = await gs_manager_instance.get_all_values(sheet_name)
+        if all_values is None:
             logger.error(f"Аркуш '{sheet_name}' не знайдено.")
             return {}
         
-        all_values = await gs_manager_instance._run_in_executor(sheet.get_all_values)
         if not all_values or len(all_values) < 2:
             logger.warning(f"Аркуш '{sheet_name}' порожній або містить тільки заголовок.")
             return {}
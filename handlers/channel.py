@@ -12,7 +12,9 @@ from telegram.error import BadRequest, Forbidden
 
 import config
 from utils.helpers import escape_markdown_v2
-from utils.sync import synchronize_working_sheets
+from utils.records import format_price
+from utils.quota import Lane, in_lane
+from utils.sync import request_sync
 from .start import cancel_command, start_command
 from .keyboards import get_employee_keyboard
 from .utils import determine_fuel_type
@@ -20,6 +22,7 @@ from .utils import determine_fuel_type
 logger = logging.getLogger(__name__)
 gs_manager = None
 
+@in_lane(Lane.BACKGROUND)
 async def check_reminders(application: Application):
     """
     Periodically checks the "Notes" sheet for reminders that are due.
@@ -36,8 +39,8 @@ async def check_reminders(application: Application):
             return
 
         now = datetime.datetime.now()
-        
-        for note in notes:
+
+        async def send_reminder(note):
             reminder_time_str = note.get("Час нагадування")
             status = note.get("Статус")
             note_id = note.get("ID Нотатки")
@@ -51,7 +54,7 @@ async def check_reminders(application: Application):
                         
                         if not manager_id or not note_text:
                             logger.warning(f"Skipping reminder for ID {note_id} due to missing data.")
-                            continue
+                            return
 
                         keyboard = InlineKeyboardMarkup([
                             [
@@ -71,13 +74,18 @@ async def check_reminders(application: Application):
                             config.SHEET_NAMES['notes'], 
                             "ID Нотатки", 
                             note_id, 
-                            {"Статус": "Нагадування відправлено"}
+                            {"Статус": "Нагадування відправлено"},
+                            wait=False
                         )
                         logger.info(f"Sent reminder for ID {note_id} to manager {manager_id}.")
                 except ValueError:
                     logger.error(f"Could not parse time '{reminder_time_str}' for note ID {note_id}.")
                 except Exception as e:
                     logger.error(f"Error processing reminder for ID {note_id}: {e}", exc_info=True)
+
+        # Нагадування різним менеджерам надсилаються паралельно, темп задає обмежувач Telegram
+        await asyncio.gather(*(send_reminder(note) for note in notes))
+        await gs_manager.flush_writes(config.SHEET_NAMES['notes'])
     except Exception as e:
         logger.error(f"Failed to check reminders: {e}", exc_info=True)
 
@@ -97,15 +105,10 @@ def build_caption(data: dict, user_id: int) -> str:
     """Creates a caption for a post in the Telegram channel."""
     vin = data.get(config.POST_SHEET_COLS['vin'], "N/A")
     model = data.get(config.POST_SHEET_COLS['model'], "Модель не вказано")
-    price_str = data.get(config.POST_SHEET_COLS['price'], "Ціна не вказана")
+    price = format_price(data.get(config.POST_SHEET_COLS['price']))
     modification = data.get(config.POST_SHEET_COLS['modification'], "Деталі не вказано")
     condition = data.get(config.POST_SHEET_COLS['condition'], "")
 
-    try:
-        price = f"${int(float(price_str)):,}".replace(',', ' ')
-    except (ValueError, TypeError):
-        price = price_str
-        
     status_prefix = data.get(config.POST_SHEET_COLS['status_prefix'], "✅ В НАЯВНОСТІ")
 
     caption_parts = [
@@ -441,7 +444,8 @@ async def add_or_publish_publication_callback(update: Update, context: ContextTy
             config.POST_SHEET_COLS['fuel_type']: post_data.get(config.POST_SHEET_COLS['fuel_type'])
         }
 
-        success = await gs_manager.add_row(config.SHEET_NAMES['published_posts'], record_to_save, config.POST_SHEET_HEADER_ORDER)
+        # Запис журналізується локально, тож користувачу не треба чекати на Google Sheets.
+        success = await gs_manager.add_row(config.SHEET_NAMES['published_posts'], record_to_save, config.POST_SHEET_HEADER_ORDER, wait=False)
 
         if success:
             await query.edit_message_text(
@@ -449,7 +453,7 @@ async def add_or_publish_publication_callback(update: Update, context: ContextTy
                 reply_markup=get_employee_keyboard(user.id)
             )
             # Trigger background sync
-            asyncio.create_task(synchronize_working_sheets(gs_manager))
+            request_sync(gs_manager, {record_to_save.get(config.POST_SHEET_COLS['vin'])})
         else:
             await query.edit_message_text(
                 "⚠️ Пост опубліковано, але не вдалося зберегти дані в таблицю.",
@@ -476,7 +480,7 @@ async def sync_sheets_callback(update: Update, context: ContextTypes.DEFAULT_TYP
     query = update.callback_query
     await query.answer("Запускаю синхронізацію...")
     await query.edit_message_text("🔄 Синхронізація даних запущена у фоновому режимі. Це може зайняти до хвилини.")
-    asyncio.create_task(synchronize_working_sheets(gs_manager))
+    request_sync(gs_manager)
 
 async def clear_post_data_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     query = update.callback_query
@@ -38,7 +38,8 @@ async def choose_sold_location(update, context):
     await context.bot_data['gs_manager'].update_record(
         config.SHEET_NAMES['published_posts'],
         rec,
-        key_col=config.POST_SHEET_COLS['vin']
+        key_col=config.POST_SHEET_COLS['vin'],
+        wait=False
     )
     await update.message.reply_text(
         "Продаж зафіксовано.",
@@ -10,6 +10,7 @@ from telegram.ext import (
 from telegram.error import TelegramError, BadRequest
 
 import config
+from utils.records import DealRecord
 from .start import cancel_command
 from .keyboards import get_employee_keyboard
 
@@ -23,18 +24,16 @@ PAYMENT_SHEET_HEADERS = ["Назва авто", "ВІН-код", "Клієнт",
 
 def build_finance_notification_text(deal_record: dict, manager_name: str, action_text: str = "Створено нову угоду") -> str:
     """Формує стандартизований текст сповіщення для фінансового каналу."""
-    total_paid = float(deal_record.get('Сплачено', 0))
-    total_price = float(deal_record.get('Загальна вартість', 0))
-    remainder = total_price - total_paid
+    deal = DealRecord.from_row(deal_record)
 
     return (f"💼 *{action_text}*\n\n"
-            f"*{deal_record.get('Назва авто', 'Авто')}*\n"
-            f"*VIN:* `{deal_record['ВІН-код']}`\n"
-            f"*Клієнт:* {deal_record['Клієнт']}\n"
-            f"*Джерело:* {deal_record['Джерело']}\n"
-            f"*Сума:* ${total_price:,.2f}\n"
-            f"*Сплачено:* ${total_paid:,.2f}\n"
-            f"*Залишок:* `${remainder:,.2f}`\n"
+            f"*{deal.model or 'Авто'}*\n"
+            f"*VIN:* `{deal.vin}`\n"
+            f"*Клієнт:* {deal.client}\n"
+            f"*Джерело:* {deal.source}\n"
+            f"*Сума:* ${deal.total_price or 0:,.2f}\n"
+            f"*Сплачено:* ${deal.paid or 0:,.2f}\n"
+            f"*Залишок:* `${deal.balance:,.2f}`\n"
             f"*Менеджер:* {manager_name}")
 
 async def send_or_edit_finance_notification(context: ContextTypes.DEFAULT_TYPE, deal_record: dict, manager_name: str, action_text: str) -> int | None:
@@ -128,14 +127,14 @@ async def find_deal_by_vin_query(vin_query: str) -> dict | None:
     for i, deal in enumerate(all_deals):
         deal_vin = str(deal.get("ВІН-код", "")).strip()
         if deal_vin == vin_query:
-            return {"record": deal, "row_index": i + 2}
+            return {"record": deal, "row_index": i + 2, "key": deal_vin}
     
     # Пошук по частині VIN
     if len(vin_query) >= 4:
         for i, deal in enumerate(all_deals):
             deal_vin = str(deal.get("ВІН-код", "")).strip()
             if deal_vin and deal_vin.endswith(vin_query):
-                return {"record": deal, "row_index": i + 2}
+                return {"record": deal, "row_index": i + 2, "key": deal_vin}
                 
     return None
 
@@ -292,9 +291,9 @@ async def add_payment_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -
         except TelegramError as e:
             logger.warning(f"Не вдалося видалити повідомлення {msg_id}: {e}")
 
-    total_paid = float(deal_record.get('Сплачено', 0)) + amount
-    total_price = float(deal_record.get('Загальна вартість', 0))
-    remainder = total_price - total_paid
+    deal = DealRecord.from_row(deal_record)
+    total_paid = (deal.paid or 0) + amount
+    remainder = (deal.total_price or 0) - total_paid
 
     payment_entry = f"({datetime.datetime.now().strftime('%Y-%m-%d')}: ${amount:,.2f} - {comment})"
     new_history = f"{deal_record.get('Історія оплат', '')}; {payment_entry}".strip('; ')
@@ -309,7 +308,7 @@ async def add_payment_save(update: Update, context: ContextTypes.DEFAULT_TYPE) -
     if new_msg_id:
         deal_record["ID повідомлення в каналі"] = new_msg_id
 
-    success = await gs_manager.update_row(config.SHEET_NAMES['payments'], deal_info['row_index'], deal_record, PAYMENT_SHEET_HEADERS)
+    success = await gs_manager.update_row_by_key(config.SHEET_NAMES['payments'], deal_info.get('key'), deal_record, PAYMENT_SHEET_HEADERS, fallback_row_index=deal_info['row_index'], wait=False)
 
     if success:
         await context.bot.send_message(chat_id=user.id, text=f"✅ Оплату успішно додано! Новий залишок: ${remainder:,.2f}", reply_markup=get_employee_keyboard(user.id))
@@ -337,14 +336,15 @@ async def view_deal_details(update: Update, context: ContextTypes.DEFAULT_TYPE,
 
     context.user_data['current_deal_info'] = deal_info
     deal = deal_info['record']
+    typed_deal = DealRecord.from_row(deal)
     history_text = "\n".join([f"  • {item.strip()}" for item in deal.get('Історія оплат', 'Історія порожня').split(';') if item])
     
     text = (f"📊 *Стан угоди для* `{deal.get('Назва авто', deal['ВІН-код'])}`\n\n"
             f"👤 *Клієнт:* {deal['Клієнт']}\n"
             f"🌍 *Джерело:* {deal['Джерело']}\n"
-            f"💲 *Загальна вартість:* ${float(deal.get('Загальна вартість', 0)):,.2f}\n"
-            f"✅ *Сплачено:* ${float(deal.get('Сплачено', 0)):,.2f}\n"
-            f"⏳ *Залишок:* `${float(deal.get('Залишок', 0)):,.2f}`\n"
+            f"💲 *Загальна вартість:* ${typed_deal.total_price or 0:,.2f}\n"
+            f"✅ *Сплачено:* ${typed_deal.paid or 0:,.2f}\n"
+            f"⏳ *Залишок:* `${typed_deal.remainder or 0:,.2f}`\n"
             f"📈 *Статус:* {deal['Статус']}\n"
             f"🚚 *Трекер:* `{deal.get('Трекер') or 'Не додано'}`\n\n"
             f"📜 *Історія оплат:*\n{history_text}")
@@ -435,7 +435,7 @@ async def edit_deal_save_value(update: Update, context: ContextTypes.DEFAULT_TYP
     if new_msg_id:
         deal_record["ID повідомлення в каналі"] = new_msg_id
 
-    success = await gs_manager.update_row(config.SHEET_NAMES['payments'], deal_info['row_index'], deal_record, PAYMENT_SHEET_HEADERS)
+    success = await gs_manager.update_row_by_key(config.SHEET_NAMES['payments'], deal_info.get('key'), deal_record, PAYMENT_SHEET_HEADERS, fallback_row_index=deal_info['row_index'])
 
     if success:
         await update.message.reply_text("✅ Дані успішно оновлено!", reply_markup=get_employee_keyboard(user.id))
@@ -471,7 +471,7 @@ async def add_tracker_save_value(update: Update, context: ContextTypes.DEFAULT_T
     if new_msg_id:
         deal_record["ID повідомлення в каналі"] = new_msg_id
 
-    success = await gs_manager.update_row(config.SHEET_NAMES['payments'], deal_info['row_index'], deal_record, PAYMENT_SHEET_HEADERS)
+    success = await gs_manager.update_row_by_key(config.SHEET_NAMES['payments'], deal_info.get('key'), deal_record, PAYMENT_SHEET_HEADERS, fallback_row_index=deal_info['row_index'])
 
     if success:
         await context.bot.send_message(chat_id=user.id, text="✅ Трекер успішно додано/оновлено!", reply_markup=get_employee_keyboard(user.id))
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+# handlers/reports.py
+
+import logging
+from telegram import Update
+from telegram.ext import ContextTypes, CallbackQueryHandler
+from telegram.error import BadRequest
+
+from utils.reports import report_store, REPORT_CALLBACK_PREFIX
+
+logger = logging.getLogger(__name__)
+
+
+async def report_page_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Гортає сторінки звіту в тому ж повідомленні."""
+    query = update.callback_query
+    try:
+        _, report_id, page = query.data.split(":")
+        page = int(page)
+    except ValueError:
+        await query.answer()
+        return
+
+    report = report_store.get(report_id)
+    if not report:
+        await query.answer("Звіт застарів. Сформуйте його заново.", show_alert=True)
+        return
+
+    await query.answer()
+    text, keyboard = report.render(page)
+    try:
+        await query.message.edit_text(text, parse_mode=report.parse_mode, reply_markup=keyboard)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            logger.warning(f"Не вдалося показати сторінку {page} звіту {report_id}: {e}")
+
+
+def get_report_handler() -> CallbackQueryHandler:
+    """Обробник кнопок ◀️/▶️ для всіх сторінкових звітів."""
+    return CallbackQueryHandler(report_page_callback, pattern=f"^{REPORT_CALLBACK_PREFIX}:")
@@ -4,8 +4,10 @@
 import logging
 import datetime
 import asyncio
-import requests
+import time
 import html
+import re
+import dataclasses
 from functools import partial
 from telegram import Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import (
@@ -15,7 +17,12 @@ from telegram.error import BadRequest, Forbidden
 
 import config
 from utils.helpers import escape_markdown_v2
-from utils.sync import synchronize_working_sheets
+from utils.records import RiaAdRecord
+from utils.quota import Lane, in_lane
+from utils.ria_client import ria_client, RiaResponseCache, RIA_HTTP_ERRORS
+from utils.deadlines import ExpiryDeadlines
+from utils.reports import send_report
+from utils.sync import request_sync
 from .start import cancel_command, start_command
 from .keyboards import get_employee_keyboard
 # Імпортуємо всі необхідні функції з channel.py
@@ -31,35 +38,108 @@ from .channel import (
 logger = logging.getLogger(__name__)
 gs_manager = None
 
+# Скільки запитів до RIA одночасно виконує масова перевірка оголошень;
+# темп все одно задає спільний лімітер, це лише межа паралельних з'єднань.
+RIA_REFRESH_CONCURRENCY = 4
+RIA_REFRESH_INTERVAL = 6 * 3600  # секунд між фоновими звірками статусів з Auto.RIA
+RIA_REFRESH_JOB_NAME = "ria_status_refresh"
+RIA_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Масовий імпорт: стан розмови, межа кількості ID та частота оновлення прогресу
+RIA_BULK_GET_IDS = 9200
+RIA_BULK_MAX_IDS = 100
+RIA_BULK_PROGRESS_INTERVAL = 3.0  # секунд
+RIA_ID_RE = re.compile(r"(\d{5,})(?:\.html)?/?(?:[?#]\S*)?$")
+
 # --- Допоміжні функції для роботи з API ---
 
 async def make_ria_request(url: str, context: ContextTypes.DEFAULT_TYPE, chat_id: int):
-    """Робить безпечний запит до API Auto.RIA з обробкою лімітів."""
-    max_retries = 3
-    base_wait_time = 60
-    for i in range(max_retries):
-        try:
-            await asyncio.sleep(1.2)
-            response = requests.get(url)
-            if response.status_code == 429:
-                wait_time = base_wait_time * (i + 1)
-                logger.warning(f"RIA API rate limit hit. Retry {i+1}/{max_retries}. Waiting {wait_time}s.")
-                if context and chat_id:
-                    await context.bot.send_message(chat_id=chat_id, text=f"⏳ API Auto.RIA перевантажено. Спроба через {wait_time // 60} хв.")
-                await asyncio.sleep(wait_time)
-                continue
-            if response.status_code == 404:
-                logger.warning(f"Запит до {url} повернув 404 Not Found.")
-                return None
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            logger.error(f"Помилка запиту до API {url}: {e}")
+    """
+    Робить запит до API Auto.RIA. Темп запитів, паузи та повтори після 429
+    регулює спільний лімітер ria_client, тож тут лише обробка відповіді.
+    """
+    try:
+        response = await ria_client.get(url)
+        if response.status_code == 429:
+            logger.critical(f"Ліміт API Auto.RIA вичерпано, запит до {url} не виконано.")
+            if context and chat_id:
+                await context.bot.send_message(chat_id=chat_id, text="⏳ API Auto.RIA перевантажено. Спробуйте за кілька хвилин.")
             return None
-    logger.critical(f"Не вдалося виконати запит до {url} після {max_retries} спроб.")
-    if context and chat_id:
-        await context.bot.send_message(chat_id=chat_id, text=f"❌ Не вдалося отримати дані з Auto.RIA. Спробуйте пізніше.")
-    return None
+        if response.status_code == 404:
+            logger.warning(f"Запит до {url} повернув 404 Not Found.")
+            return None
+        response.raise_for_status()
+        return response.json()
+    except RIA_HTTP_ERRORS as e:
+        logger.error(f"Помилка запиту до API {url}: {e}")
+        return None
+
+# Кеш /auto/info за auto_id: повторні перегляди одного оголошення не витрачають ліміт RIA
+ria_info_cache = RiaResponseCache()
+
+
+async def fetch_ria_ad_info(auto_id: int, context: ContextTypes.DEFAULT_TYPE, chat_id: int, fresh: bool = False):
+    """Інформація про оголошення з кешу або з API; fresh=True — завжди свіжі дані (перевірка продовження)."""
+    info_url = f"https://developers.ria.com/auto/info?api_key={config.AUTORIA_API_KEY}&auto_id={auto_id}"
+    return await ria_info_cache.get_or_fetch(
+        int(auto_id), lambda: make_ria_request(info_url, context=context, chat_id=chat_id), fresh=fresh
+    )
+
+def _ria_ad_is_active(ad_info: dict, auto_id) -> bool:
+    """Оголошення активне за статусом RIA або має дату закінчення в майбутньому."""
+    status_id = ad_info.get('stateData', {}).get('statusId', 0)
+    if status_id == 1:
+        return True
+
+    logger.warning(f"RIA API повернуло неактивний статус ({status_id}) для ID {auto_id}.")
+    expire_date_str = ad_info.get('expireDate')
+    if expire_date_str:
+        try:
+            expire_datetime = datetime.datetime.strptime(expire_date_str, RIA_DATE_FORMAT)
+            if expire_datetime > datetime.datetime.now():
+                logger.info(f"Оголошення {auto_id} має неактивний статус, але дата закінчення в майбутньому. Вважаємо його активним.")
+                return True
+        except (ValueError, TypeError):
+             logger.warning(f"Не вдалося перевірити expireDate для {auto_id}, значення: {expire_date_str}")
+    return False
+
+
+def _ria_draft_rows(ad_info: dict, employee_id, expire_datetime):
+    """Рядок чернетки для 'Опубліковані Пости' та рядок трекера AutoRIA_Ads з відповіді /auto/info."""
+    auto_data = ad_info.get('autoData', {})
+    vin = ad_info.get('VIN')
+    mark_name = ad_info.get('markName', '')
+    model_name = ad_info.get('modelName', '')
+    year = auto_data.get('year')
+    model = f"{mark_name} {model_name} {year}" if year else f"{mark_name} {model_name}"
+    modification = auto_data.get('fuelName', '')
+
+    technical_condition_data = ad_info.get('technicalCondition') or {}
+    condition_annotation = technical_condition_data.get('annotation', 'Ввести менеджером')
+
+    post_draft_data = {
+        config.POST_SHEET_COLS['vin']: vin,
+        config.POST_SHEET_COLS['emp_id']: employee_id,
+        config.POST_SHEET_COLS['status']: 'draft_ria',
+        config.POST_SHEET_COLS['model']: model,
+        config.POST_SHEET_COLS['price']: ad_info.get('USD', '0'),
+        config.POST_SHEET_COLS['modification']: modification,
+        config.POST_SHEET_COLS['mileage']: f"{auto_data.get('raceInt', 0) * 1000} км",
+        config.POST_SHEET_COLS['drivetrain']: auto_data.get('driveName', ''),
+        config.POST_SHEET_COLS['gearbox']: auto_data.get('gearboxName', ''),
+        config.POST_SHEET_COLS['condition']: condition_annotation,
+        config.POST_SHEET_COLS['status_prefix']: '✅ В НАЯВНОСТІ',
+        config.POST_SHEET_COLS['ria_auto_id']: ad_info.get('autoId', ''),
+        config.POST_SHEET_COLS['ria_link']: ad_info.get('linkToView', ''),
+        config.POST_SHEET_COLS['location']: ''
+    }
+
+    autoria_ad_record = {**post_draft_data, **{
+        config.POST_SHEET_COLS['date']: expire_datetime.isoformat() if expire_datetime else datetime.datetime.now().isoformat(),
+        config.POST_SHEET_COLS['status']: 'active',
+        config.POST_SHEET_COLS['notify_date']: 'none',
+    }}
+    return post_draft_data, autoria_ad_record
 
 # --- Нові допоміжні функції для публікації чернеток ---
 
@@ -107,6 +187,7 @@ async def ria_menu(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
     keyboard = [
         [InlineKeyboardButton("➕ Додати авто за ID з RIA", callback_data="ria_add_by_id_start")],
+        [InlineKeyboardButton("📥 Масовий імпорт з RIA", callback_data="ria_bulk_import_start")],
         [InlineKeyboardButton("📝 Опублікувати мої чернетки", callback_data="ria_publish_my_draft_start")],
         [InlineKeyboardButton("🔄 Оновити термін дії оголошення", callback_data="ria_renew_start")],
         [InlineKeyboardButton("🗂️ Перевірити архів та сповіщення", callback_data="ria_check_full")],
@@ -140,8 +221,7 @@ async def ria_add_get_id(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         return config.RIA_ADD_GET_ID
 
     await update.message.reply_text(f"🔍 Шукаю інформацію для ID: {auto_id}...")
-    info_url = f"https://developers.ria.com/auto/info?api_key={config.AUTORIA_API_KEY}&auto_id={auto_id}"
-    ad_info = await make_ria_request(info_url, context=context, chat_id=update.effective_chat.id)
+    ad_info = await fetch_ria_ad_info(auto_id, context, update.effective_chat.id)
 
     if not ad_info:
         await update.message.reply_text("❌ Не вдалося знайти оголошення з таким ID.")
@@ -165,22 +245,7 @@ async def ria_add_get_id(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
             await update.message.reply_text(message_text, parse_mode='MarkdownV2')
             return ConversationHandler.END
 
-    status_id = ad_info.get('stateData', {}).get('statusId', 0)
-    is_active = (status_id == 1)
-
-    if not is_active:
-        logger.warning(f"RIA API повернуло неактивний статус ({status_id}) для ID {auto_id}.")
-        expire_date_str = ad_info.get('expireDate')
-        if expire_date_str:
-            try:
-                expire_datetime = datetime.datetime.strptime(expire_date_str, '%Y-%m-%d %H:%M:%S')
-                if expire_datetime > datetime.datetime.now():
-                    logger.info(f"Оголошення {auto_id} має неактивний статус, але дата закінчення в майбутньому. Вважаємо його активним.")
-                    is_active = True
-            except (ValueError, TypeError):
-                 logger.warning(f"Не вдалося перевірити expireDate для {auto_id}, значення: {expire_date_str}")
-
-    if not is_active:
+    if not _ria_ad_is_active(ad_info, auto_id):
         status_name = ad_info.get('stateData', {}).get('status', 'невідомий')
         await update.message.reply_text(f"❌ Оголошення не є активним (статус: {status_name}). Додавання неможливе.")
         return ConversationHandler.END
@@ -243,44 +308,21 @@ async def ria_add_save_drafts_and_ask_publish(update: Update, context: ContextTy
 
     await query.edit_message_text("💾 Зберігаю чернетку в базі даних...")
 
-    auto_data = ad_info.get('autoData', {})
-    vin = ad_info.get('VIN')
-    mark_name = ad_info.get('markName', '')
-    model_name = ad_info.get('modelName', '')
-    year = auto_data.get('year')
-    model = f"{mark_name} {model_name} {year}" if year else f"{mark_name} {model_name}"
-    modification = auto_data.get('fuelName', '')
-
-    technical_condition_data = ad_info.get('technicalCondition') or {}
-    condition_annotation = technical_condition_data.get('annotation', 'Ввести менеджером')
-
-    post_draft_data = {
-        config.POST_SHEET_COLS['vin']: vin,
-        config.POST_SHEET_COLS['emp_id']: employee_id,
-        config.POST_SHEET_COLS['status']: 'draft_ria',
-        config.POST_SHEET_COLS['model']: model,
-        config.POST_SHEET_COLS['price']: ad_info.get('USD', '0'),
-        config.POST_SHEET_COLS['modification']: modification,
-        config.POST_SHEET_COLS['mileage']: f"{auto_data.get('raceInt', 0) * 1000} км",
-        config.POST_SHEET_COLS['drivetrain']: auto_data.get('driveName', ''),
-        config.POST_SHEET_COLS['gearbox']: auto_data.get('gearboxName', ''),
-        config.POST_SHEET_COLS['condition']: condition_annotation,
-        config.POST_SHEET_COLS['status_prefix']: '✅ В НАЯВНОСТІ',
-        config.POST_SHEET_COLS['ria_auto_id']: ad_info.get('autoId', ''),
-        config.POST_SHEET_COLS['ria_link']: ad_info.get('linkToView', ''),
-        config.POST_SHEET_COLS['location']: ''
-    }
-    await gs_manager.add_row(config.SHEET_NAMES['published_posts'], post_draft_data, config.POST_SHEET_HEADER_ORDER)
+    post_draft_data, autoria_ad_record = _ria_draft_rows(ad_info, employee_id, context.user_data.get('expire_date_dt'))
+    vin = post_draft_data[config.POST_SHEET_COLS['vin']]
+    if not await gs_manager.add_row(config.SHEET_NAMES['published_posts'], post_draft_data, config.POST_SHEET_HEADER_ORDER):
+        await query.edit_message_text("❌ Помилка збереження чернетки в таблицю. Спробуйте ще раз.")
+        return ConversationHandler.END
     context.user_data['vin_of_new_draft'] = vin
 
-    expire_datetime = context.user_data.get('expire_date_dt')
-    autoria_ad_record = {**post_draft_data, **{
-        config.POST_SHEET_COLS['date']: expire_datetime.isoformat() if expire_datetime else datetime.datetime.now().isoformat(),
-        config.POST_SHEET_COLS['status']: 'active',
-        config.POST_SHEET_COLS['notify_date']: 'none',
-    }}
-    await gs_manager.add_row(config.SHEET_NAMES['autoria_ads'], autoria_ad_record, config.POST_SHEET_HEADER_ORDER)
-    logger.info(f"Added RIA ad {ad_info.get('autoId', 'N/A')} to tracking sheet.")
+    tracking_note = ""
+    if await gs_manager.add_row(config.SHEET_NAMES['autoria_ads'], autoria_ad_record, config.POST_SHEET_HEADER_ORDER):
+        # Дедлайни ставимо лише для оголошення, яке справді записано в трекер
+        track_ad_deadlines(context.application, autoria_ad_record)
+        logger.info(f"Added RIA ad {ad_info.get('autoId', 'N/A')} to tracking sheet.")
+    else:
+        logger.error(f"Не вдалося додати оголошення RIA {ad_info.get('autoId', 'N/A')} до трекера.")
+        tracking_note = "⚠️ Оголошення не додано до відстеження RIA — сповіщень про закінчення терміну не буде.\n\n"
     
     keyboard = InlineKeyboardMarkup([
         [InlineKeyboardButton("✅ Так, опублікувати", callback_data="publish_now_yes")],
@@ -288,6 +330,7 @@ async def ria_add_save_drafts_and_ask_publish(update: Update, context: ContextTy
     ])
     await query.edit_message_text(
         "✅ Чернетку створено.\n\n"
+        f"{tracking_note}"
         "Опублікувати цей автомобіль в каналі зараз?",
         reply_markup=keyboard
     )
@@ -326,7 +369,8 @@ async def ria_add_set_location_and_finish(update: Update, context: ContextTypes.
 
     if query.data == "cancel_action":
         await query.edit_message_text("Створення чернетки завершено без вказання локації.")
-        asyncio.create_task(synchronize_working_sheets(gs_manager))
+        draft_vin = (context.user_data.get('post_data') or {}).get(config.POST_SHEET_COLS['vin'])
+        request_sync(gs_manager, {draft_vin})
         return ConversationHandler.END
 
     location = query.data.replace("set_location_", "")
@@ -351,7 +395,7 @@ async def ria_add_set_location_and_finish(update: Update, context: ContextTypes.
 
     if success:
         await query.edit_message_text(f"✅ Успішно! Чернетку створено та розміщено в '{location}'.")
-        asyncio.create_task(synchronize_working_sheets(gs_manager))
+        request_sync(gs_manager, {post_info_record.get(config.POST_SHEET_COLS['vin'])})
     else:
         await query.edit_message_text("❌ Помилка при оновленні розташування в таблиці.")
         
@@ -420,6 +464,178 @@ async def ria_publish_draft_select(update: Update, context: ContextTypes.DEFAULT
 
 # --- Щоденні завдання та оновлення ---
 
+# Дедлайни всіх активних оголошень трекера; один job_queue-таймер на найближчий з них.
+expiry_deadlines = ExpiryDeadlines()
+EXPIRY_JOB_NAME = "ria_expiry_deadline"
+EXPIRY_RETRY_DELAY = datetime.timedelta(minutes=10)  # повтор дедлайну, обробка якого не вдалася
+# Купа дедлайнів періодично перебудовується з трекера, щоб врахувати ручні правки
+EXPIRY_RECONCILE_INTERVAL = 3600  # секунд
+EXPIRY_RECONCILE_JOB_NAME = "ria_expiry_reconcile"
+
+
+def _expiry_action(ad: RiaAdRecord, now: datetime.datetime):
+    """Що потрібно зробити з оголошенням зараз: 'archive', 'sent_24h', 'sent_12h' або None."""
+    if ad.status != 'active' or not ad.expires_at:
+        return None
+    time_left = (ad.expires_at - now).total_seconds()
+    if time_left <= 0:
+        return 'archive'
+    notification_status = ad.notify_date or 'none'
+    if 12 * 3600 < time_left <= 24 * 3600 and notification_status not in ['sent_24h', 'sent_12h']:
+        return 'sent_24h'
+    if time_left <= 12 * 3600 and notification_status != 'sent_12h':
+        return 'sent_12h'
+    return None
+
+
+async def _archive_ad(application: Application, ad: RiaAdRecord, row_index: int) -> None:
+    """Повідомляє канал архіву та ставить у чергу зміну статусу на 'archived'."""
+    vin = ad.vin or 'N/A'
+    model = ad.model or 'Авто'
+    link = ad.link
+
+    safe_model = escape_markdown_v2(model)
+    safe_vin = escape_markdown_v2(vin)
+
+    message = (f"🗂️ *В архіві*\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) "
+               f"переміщено в архів \\(термін дії минув\\)\\.")
+    if link:
+        message += f"\n[Відновити оголошення]({link})"
+
+    await application.bot.send_message(chat_id=config.RIA_ARCHIVE_CHANNEL_ID, text=message, parse_mode='MarkdownV2')
+
+    archived_ad = dataclasses.replace(ad, status='archived')
+    queued = await gs_manager.update_row_by_key(config.SHEET_NAMES['autoria_ads'], ad.ria_auto_id, archived_ad.to_row(), config.POST_SHEET_HEADER_ORDER, fallback_row_index=row_index, wait=False)
+    expiry_deadlines.cancel(ad.ria_auto_id)
+    if queued:
+        logger.info(f"Оголошення {ad.ria_auto_id} (VIN: {vin}) позначено як 'archived'.")
+    else:
+        logger.warning(f"Не вдалося позначити оголошення {ad.ria_auto_id} (VIN: {vin}) як 'archived': рядка вже немає в трекері.")
+
+
+async def _notify_ad_expiry(application: Application, ad: RiaAdRecord, row_index: int, notification_level: str) -> None:
+    """Надсилає сповіщення про закінчення терміну в канал і менеджеру та зберігає рівень сповіщення."""
+    vin = ad.vin or 'N/A'
+    link = ad.link
+    manager_id = ad.emp_id
+    model = ad.model or 'Авто'
+    auto_id = ad.ria_auto_id
+    keyboard = None
+
+    safe_model = escape_markdown_v2(model)
+    safe_vin = escape_markdown_v2(vin)
+
+    if auto_id and link:
+        keyboard = InlineKeyboardMarkup([
+            [InlineKeyboardButton("🔄 Оновити на RIA та перевірити", url=link)],
+            [InlineKeyboardButton("✅ Я вже оновив, перевір дату", callback_data=f"ria_renew_{auto_id}")]
+        ])
+
+    if notification_level == 'sent_24h':
+        message = (f"🔔 *Увага\\!* \\~24 години\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) буде в архіві завтра\\.\n👉 [Перейти до оголошення]({link})")
+    else:
+        message = (f"⏳ *Увага\\!* \\~12 годин\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) буде в архіві сьогодні\\.\n👉 [Перейти до оголошення]({link})")
+
+    async def notify_manager():
+        try:
+            await application.bot.send_message(chat_id=int(manager_id), text=message, parse_mode='MarkdownV2', reply_markup=keyboard)
+        except (BadRequest, Forbidden) as e:
+            logger.warning(f"Не вдалося надіслати сповіщення менеджеру {manager_id}: {e}")
+
+    # Канал і менеджер — різні чати, тож надсилаємо паралельно
+    channel_send = application.bot.send_message(chat_id=config.RIA_ARCHIVE_CHANNEL_ID, text=message, parse_mode='MarkdownV2', reply_markup=keyboard)
+    if manager_id:
+        await asyncio.gather(channel_send, notify_manager())
+    else:
+        await channel_send
+
+    notified_ad = dataclasses.replace(ad, notify_date=notification_level)
+    if not await gs_manager.update_row_by_key(config.SHEET_NAMES['autoria_ads'], notified_ad.ria_auto_id, notified_ad.to_row(), config.POST_SHEET_HEADER_ORDER, fallback_row_index=row_index, wait=False):
+        logger.warning(f"Не вдалося зберегти рівень сповіщення '{notification_level}' для оголошення {auto_id}: рядка вже немає в трекері.")
+
+
+def _arm_expiry_job(application: Application) -> None:
+    """Переставляє таймер job_queue на найближчий дедлайн."""
+    job_queue = application.job_queue
+    if job_queue is None:
+        return
+    for job in job_queue.get_jobs_by_name(EXPIRY_JOB_NAME):
+        job.schedule_removal()
+    deadline = expiry_deadlines.next_deadline()
+    if deadline is None:
+        return
+    delay = max((deadline - datetime.datetime.now()).total_seconds(), 0)
+    job_queue.run_once(_on_expiry_deadline, delay, name=EXPIRY_JOB_NAME)
+
+
+def track_ad_deadlines(application: Application, ad) -> None:
+    """
+    Оновлює дедлайни оголошення після додавання, продовження чи архівації.
+    ad — RiaAdRecord або рядок трекера (словник).
+    """
+    if isinstance(ad, dict):
+        ad = RiaAdRecord.from_row(ad)
+    if not ad.ria_auto_id:
+        return
+    expiry_deadlines.schedule(ad.ria_auto_id, ad.expires_at if ad.status == 'active' else None)
+    _arm_expiry_job(application)
+
+
+async def start_expiry_deadlines(application: Application) -> None:
+    """Будує купу дедлайнів з трекера (одне читання) і запускає таймер."""
+    all_tracked_ads = await gs_manager.get_typed_records(config.SHEET_NAMES['autoria_ads'], RiaAdRecord) if gs_manager else None
+    if all_tracked_ads is None:
+        logger.error("Не вдалося завантажити трекер RIA для планування дедлайнів.")
+        return
+    expiry_deadlines.rebuild(
+        (ad.ria_auto_id, ad.expires_at) for ad in all_tracked_ads if ad.status == 'active'
+    )
+    logger.info(f"Заплановано дедлайни для {len(expiry_deadlines)} оголошень RIA.")
+    _arm_expiry_job(application)
+
+
+@in_lane(Lane.BACKGROUND)
+async def _on_expiry_deadline(context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Обробляє дедлайни, що настали, і переставляє таймер на наступний."""
+    application = context.application
+    sheet_name = config.SHEET_NAMES['autoria_ads']
+    try:
+        now = datetime.datetime.now()
+
+        async def handle(auto_id, kind):
+            try:
+                rows = await gs_manager.get_rows_by_key(sheet_name, auto_id)
+                if not rows:
+                    expiry_deadlines.cancel(auto_id)
+                    return
+                ad, row_index = RiaAdRecord.from_row(rows[0]['record']), rows[0]['row_index']
+                # Рядок міг змінитися після планування — рішення приймається за поточними даними
+                action = _expiry_action(ad, now)
+                if action == 'archive':
+                    await _archive_ad(application, ad, row_index)
+                elif action:
+                    await _notify_ad_expiry(application, ad, row_index, action)
+            except Exception as e:
+                # Дедлайн уже забрано з купи, тож повертаємо його, інакше він загубиться
+                logger.warning(f"Помилка обробки дедлайну '{kind}' оголошення {auto_id}, повтор через {EXPIRY_RETRY_DELAY}: {e}")
+                expiry_deadlines.retry(auto_id, kind, now + EXPIRY_RETRY_DELAY)
+                return
+            if ad.expires_at and ad.expires_at > now and ad.status == 'active':
+                expiry_deadlines.schedule(auto_id, ad.expires_at)
+
+        # Сповіщення розсилаються паралельно, темп задає обмежувач Telegram
+        results = await asyncio.gather(*(handle(auto_id, kind) for auto_id, kind in expiry_deadlines.pop_due(now)), return_exceptions=True)
+        for error in results:
+            if isinstance(error, Exception):
+                logger.error(f"Помилка обробки дедлайну оголошення RIA: {error}", exc_info=error)
+        await gs_manager.flush_writes(sheet_name)
+    except Exception as e:
+        logger.error(f"Помилка обробки дедлайнів оголошень RIA: {e}", exc_info=True)
+    finally:
+        _arm_expiry_job(application)
+
+
+@in_lane(Lane.BACKGROUND)
 async def _archive_expired_logic(application: Application) -> str:
     """Основна логіка перевірки та архівації оголошень. Повертає звіт."""
     logger.info("Running archival check logic...")
@@ -428,61 +644,47 @@ async def _archive_expired_logic(application: Application) -> str:
     
     archived_count = 0
     try:
-        all_tracked_ads = await gs_manager.get_all_records(config.SHEET_NAMES['autoria_ads'], expected_headers=config.POST_SHEET_HEADER_ORDER)
+        all_tracked_ads = await gs_manager.get_typed_records(config.SHEET_NAMES['autoria_ads'], RiaAdRecord)
         now = datetime.datetime.now()
         
         if not all_tracked_ads:
             return "✅ Перевірку завершено. Оголошень для відстеження не знайдено."
             
-        for i, ad in enumerate(list(all_tracked_ads)):
-            row_index = i + 2
-            if ad.get(config.POST_SHEET_COLS['status']) != 'active':
-                continue
-            
-            expiry_date_str = ad.get(config.POST_SHEET_COLS['date'])
-            if not expiry_date_str:
-                continue
-
+        async def archive(ad, row_index):
             try:
-                expiry_datetime = datetime.datetime.fromisoformat(expiry_date_str)
-                if expiry_datetime < now:
-                    vin = ad.get(config.POST_SHEET_COLS['vin'], 'N/A')
-                    model = ad.get(config.POST_SHEET_COLS['model'], 'Авто')
-                    link = ad.get(config.POST_SHEET_COLS['ria_link'], '')
-                    if link and not link.startswith('http'):
-                        link = f"https://auto.ria.com{link}"
-
-                    safe_model = escape_markdown_v2(model)
-                    safe_vin = escape_markdown_v2(vin)
-
-                    message = (f"🗂️ *В архіві*\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) "
-                               f"переміщено в архів \\(термін дії минув\\)\\.")
-                    if link:
-                        message += f"\n[Відновити оголошення]({link})"
-
-                    await application.bot.send_message(chat_id=config.RIA_ARCHIVE_CHANNEL_ID, text=message, parse_mode='MarkdownV2')
-                    
-                    ad[config.POST_SHEET_COLS['status']] = 'archived'
-                    await gs_manager.update_row(config.SHEET_NAMES['autoria_ads'], row_index, ad, config.POST_SHEET_HEADER_ORDER)
-                    
-                    logger.info(f"Оголошення {ad.get(config.POST_SHEET_COLS['ria_auto_id'])} (VIN: {vin}) позначено як 'archived'.")
-                    archived_count += 1
+                await _archive_ad(application, ad, row_index)
+                return True
             except (ValueError, TypeError, BadRequest, Forbidden) as e:
-                logger.warning(f"Помилка обробки оголошення {ad.get(config.POST_SHEET_COLS['ria_auto_id'])}: {e}")
+                logger.warning(f"Помилка обробки оголошення {ad.ria_auto_id}: {e}")
+                return False
+
+        results = await asyncio.gather(*(
+            archive(ad, i + 2) for i, ad in enumerate(all_tracked_ads) if _expiry_action(ad, now) == 'archive'
+        ), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.error(f"Помилка архівації оголошення RIA: {error}", exc_info=error)
+        archived_count = sum(result is True for result in results)
+        await gs_manager.flush_writes(config.SHEET_NAMES['autoria_ads'])
     except Exception as e:
         logger.error(f"Критична помилка під час логіки архівації: {e}", exc_info=True)
         return "Сталася критична помилка під час перевірки."
 
+    if errors:
+        return f"⚠️ Перевірку завершено. Заархівовано {archived_count} оголошень, не вдалося обробити: {len(errors)}."
     if archived_count > 0:
         return f"✅ Перевірку завершено. Заархівовано {archived_count} оголошень."
     else:
         return "✅ Перевірку завершено. Застарілих оголошень не знайдено."
 
 async def archive_expired_ads_by_date(application: Application):
-    """Автоматично архівує оголошення, термін дії яких минув (запланована задача)."""
-    logger.info("Запуск архівації оголошень за датою...")
-    await _archive_expired_logic(application)
+    """
+    Запланована задача архівації. Архівацію виконує таймер дедлайнів, тож тут
+    купа лише звіряється з трекером (ручні правки, пропущені дедлайни).
+    """
+    await start_expiry_deadlines(application)
 
+@in_lane(Lane.BACKGROUND)
 async def _check_upcoming_expiry_logic(application: Application) -> str:
     """Основна логіка перевірки оголошень, що скоро закінчуються. Повертає звіт."""
     logger.info("Running upcoming expiry check logic...")
@@ -492,72 +694,184 @@ async def _check_upcoming_expiry_logic(application: Application) -> str:
     sent_24h = 0
     sent_12h = 0
     try:
-        all_tracked_ads = await gs_manager.get_all_records(config.SHEET_NAMES['autoria_ads'], expected_headers=config.POST_SHEET_HEADER_ORDER)
+        all_tracked_ads = await gs_manager.get_typed_records(config.SHEET_NAMES['autoria_ads'], RiaAdRecord)
         now = datetime.datetime.now()
         
         if not all_tracked_ads:
             return "Сповіщень немає: оголошень для відстеження не знайдено."
             
-        for i, ad in enumerate(all_tracked_ads):
-            row_index = i + 2
-            if ad.get(config.POST_SHEET_COLS['status']) != 'active': continue
-            expiry_date_str = ad.get(config.POST_SHEET_COLS['date'])
-            if not expiry_date_str: continue
+        async def notify(ad, row_index, notification_level):
             try:
-                expiry_datetime = datetime.datetime.fromisoformat(expiry_date_str)
-                time_left = expiry_datetime - now
-                vin = ad.get(config.POST_SHEET_COLS['vin'], 'N/A')
-                link = ad.get(config.POST_SHEET_COLS['ria_link'], '')
-                if link and not link.startswith('http'):
-                    link = f"https://auto.ria.com{link}"
-
-                notification_status = ad.get(config.POST_SHEET_COLS['notify_date'], 'none')
-                manager_id = ad.get(config.POST_SHEET_COLS['emp_id'])
-                model = ad.get(config.POST_SHEET_COLS['model'], 'Авто')
-                auto_id = ad.get(config.POST_SHEET_COLS['ria_auto_id'])
-                message, notification_level, keyboard = None, None, None
-
-                safe_model = escape_markdown_v2(model)
-                safe_vin = escape_markdown_v2(vin)
-
-                if auto_id and link:
-                    keyboard = InlineKeyboardMarkup([
-                        [InlineKeyboardButton("🔄 Оновити на RIA та перевірити", url=link)],
-                        [InlineKeyboardButton("✅ Я вже оновив, перевір дату", callback_data=f"ria_renew_{auto_id}")]
-                    ])
-
-                if 12 * 3600 < time_left.total_seconds() <= 24 * 3600 and notification_status not in ['sent_24h', 'sent_12h']:
-                    message = (f"🔔 *Увага\\!* \\~24 години\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) буде в архіві завтра\\.\n👉 [Перейти до оголошення]({link})")
-                    notification_level = 'sent_24h'
-                    sent_24h += 1
-                elif 0 < time_left.total_seconds() <= 12 * 3600 and notification_status != 'sent_12h':
-                    message = (f"⏳ *Увага\\!* \\~12 годин\nОголошення для *{safe_model}* \\(VIN: `{safe_vin}`\\) буде в архіві сьогодні\\.\n👉 [Перейти до оголошення]({link})")
-                    notification_level = 'sent_12h'
-                    sent_12h += 1
-
-                if message and notification_level:
-                    await application.bot.send_message(chat_id=config.RIA_ARCHIVE_CHANNEL_ID, text=message, parse_mode='MarkdownV2', reply_markup=keyboard)
-                    if manager_id:
-                        try:
-                            await application.bot.send_message(chat_id=int(manager_id), text=message, parse_mode='MarkdownV2', reply_markup=keyboard)
-                        except (BadRequest, Forbidden) as e:
-                            logger.warning(f"Не вдалося надіслати сповіщення менеджеру {manager_id}: {e}")
-
-                    ad[config.POST_SHEET_COLS['notify_date']] = notification_level
-                    await gs_manager.update_row(config.SHEET_NAMES['autoria_ads'], row_index, ad, config.POST_SHEET_HEADER_ORDER)
+                await _notify_ad_expiry(application, ad, row_index, notification_level)
+                return notification_level
             except (ValueError, TypeError, BadRequest, Forbidden) as e:
-                logger.warning(f"Помилка обробки оголошення {ad.get(config.POST_SHEET_COLS['ria_auto_id'], 'N/A')}: {e}")
+                logger.warning(f"Помилка обробки оголошення {ad.ria_auto_id or 'N/A'}: {e}")
+                return None
+
+        levels = [(i + 2, ad, _expiry_action(ad, now)) for i, ad in enumerate(all_tracked_ads)]
+        results = await asyncio.gather(*(
+            notify(ad, row_index, level) for row_index, ad, level in levels if level in ('sent_24h', 'sent_12h')
+        ), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        for error in errors:
+            logger.error(f"Помилка сповіщення про закінчення терміну оголошення RIA: {error}", exc_info=error)
+        sent_24h = results.count('sent_24h')
+        sent_12h = results.count('sent_12h')
+        await gs_manager.flush_writes(config.SHEET_NAMES['autoria_ads'])
     except Exception as e:
         logger.error(f"Критична помилка під час перевірки терміну дії оголошень: {e}", exc_info=True)
         return "Сталася критична помилка під час перевірки сповіщень."
     
-    return f"Надіслано сповіщень:\n • ~24 години: {sent_24h}\n • ~12 годин: {sent_12h}"
+    report = f"Надіслано сповіщень:\n • ~24 години: {sent_24h}\n • ~12 годин: {sent_12h}"
+    if errors:
+        report += f"\n • помилок: {len(errors)}"
+    return report
 
 
 async def check_upcoming_expiry(application: Application):
-    """Щоденна перевірка оголошень, термін дії яких скоро закінчується (запланована задача)."""
-    logger.info("Запуск перевірки оголошень, що скоро потрапять в архів...")
-    await _check_upcoming_expiry_logic(application)
+    """
+    Запланована задача сповіщень. Сповіщення надсилає таймер дедлайнів у
+    момент настання кожного з них, тож тут купа лише звіряється з трекером.
+    """
+    await start_expiry_deadlines(application)
+
+
+async def scheduled_expiry_reconcile(context: ContextTypes.DEFAULT_TYPE):
+    """Колбек job_queue: перебудовує купу дедлайнів з трекера (див. schedule_expiry_deadlines)."""
+    await start_expiry_deadlines(context.application)
+
+
+def schedule_expiry_deadlines(application: Application, interval: float = EXPIRY_RECONCILE_INTERVAL) -> None:
+    """
+    Будує купу дедлайнів одразу після запуску бота і далі перебудовує її з
+    трекера кожні interval секунд, щоб зміни в трекері повз бота не загубилися.
+    """
+    if application.job_queue is None:
+        logger.warning("JobQueue недоступна, дедлайни оголошень RIA не заплановано.")
+        return
+    application.job_queue.run_repeating(scheduled_expiry_reconcile, interval=interval, first=0,
+                                        name=EXPIRY_RECONCILE_JOB_NAME)
+
+def _ria_ad_corrections(ad: RiaAdRecord, ad_info: dict, now: datetime.datetime):
+    """
+    Порівнює рядок трекера з відповіддю /auto/info. Повертає виправлений запис
+    (або None, якщо все збігається) та список знайдених змін.
+    """
+    changes = {}
+    kinds = []
+
+    expires_at = ad.expires_at
+    try:
+        expires_at = datetime.datetime.strptime(ad_info.get('expireDate') or '', RIA_DATE_FORMAT)
+    except (ValueError, TypeError):
+        pass
+    if expires_at and expires_at != ad.expires_at:
+        changes['date'] = expires_at
+        if not ad.expires_at or expires_at > ad.expires_at:
+            # Нова дата — нові сповіщення про закінчення терміну
+            changes['notify_date'] = 'renewed'
+            kinds.append('renewed')
+        else:
+            kinds.append('date')
+
+    status_id = ad_info.get('stateData', {}).get('statusId', 0)
+    if status_id != 1 and (not expires_at or expires_at <= now):
+        changes['status'] = 'archived'
+        kinds.append('archived')
+
+    price = ad_info.get('USD')
+    try:
+        price = float(price) if price not in (None, '') else None
+    except (ValueError, TypeError):
+        price = None
+    if price is not None and price != ad.price:
+        changes['price'] = price
+        kinds.append('price')
+
+    if not changes:
+        return None, kinds
+    return dataclasses.replace(ad, **changes), kinds
+
+
+@in_lane(Lane.BULK)
+async def _refresh_ria_statuses_logic(application: Application) -> str:
+    """
+    Звіряє всі активні оголошення трекера з Auto.RIA: продовження, архівацію
+    та зміну ціни. Виправлення записуються одним пакетним оновленням. Повертає звіт.
+    """
+    logger.info("Running RIA status refresh logic...")
+    if not gs_manager:
+        return "Помилка: немає зв'язку з Google Sheets."
+
+    sheet_name = config.SHEET_NAMES['autoria_ads']
+    counts = {'renewed': 0, 'date': 0, 'archived': 0, 'price': 0}
+    failed = 0
+    try:
+        all_tracked_ads = await gs_manager.get_typed_records(sheet_name, RiaAdRecord)
+        active_ads = [(i + 2, ad) for i, ad in enumerate(all_tracked_ads or [])
+                      if ad.status == 'active' and ad.ria_auto_id]
+        if not active_ads:
+            return "Перевірку RIA завершено: активних оголошень не знайдено."
+
+        semaphore = asyncio.Semaphore(RIA_REFRESH_CONCURRENCY)
+
+        async def fetch(auto_id):
+            async with semaphore:
+                return await fetch_ria_ad_info(auto_id, None, None, fresh=True)
+
+        started = time.monotonic()
+        results = await asyncio.gather(*(fetch(ad.ria_auto_id) for _, ad in active_ads), return_exceptions=True)
+        elapsed = time.monotonic() - started
+
+        now = datetime.datetime.now()
+        for (row_index, ad), ad_info in zip(active_ads, results):
+            if isinstance(ad_info, Exception) or not ad_info:
+                failed += 1
+                continue
+            corrected, kinds = _ria_ad_corrections(ad, ad_info, now)
+            if not corrected:
+                continue
+            if not await gs_manager.update_row_by_key(sheet_name, ad.ria_auto_id, corrected.to_row(), config.POST_SHEET_HEADER_ORDER, fallback_row_index=row_index, wait=False):
+                # Оголошення прибрали з трекера, поки тривала перевірка
+                continue
+            for kind in kinds:
+                counts[kind] += 1
+            track_ad_deadlines(application, corrected)
+        await gs_manager.flush_writes(sheet_name)
+    except Exception as e:
+        logger.error(f"Критична помилка під час перевірки статусів RIA: {e}", exc_info=True)
+        return "Сталася критична помилка під час перевірки статусів RIA."
+
+    checked = len(active_ads) - failed
+    per_minute = len(active_ads) / elapsed * 60 if elapsed else 0.0
+    logger.info(f"Перевірка статусів RIA: {len(active_ads)} оголошень за {elapsed:.1f} с ({per_minute:.1f}/хв), помилок: {failed}.")
+    return (
+        f"Перевірено оголошень на RIA: {checked} з {len(active_ads)} ({per_minute:.0f} за хв)\n"
+        f" • продовжено: {counts['renewed']}\n"
+        f" • виправлено дату: {counts['date']}\n"
+        f" • в архіві: {counts['archived']}\n"
+        f" • змінено ціну: {counts['price']}"
+    )
+
+
+async def refresh_ria_statuses(application: Application):
+    """Фонова звірка активних оголошень з Auto.RIA (запланована задача)."""
+    logger.info("Запуск звірки статусів оголошень з Auto.RIA...")
+    await _refresh_ria_statuses_logic(application)
+
+
+async def scheduled_ria_status_refresh(context: ContextTypes.DEFAULT_TYPE):
+    """Колбек job_queue для refresh_ria_statuses (див. schedule_ria_status_refresh)."""
+    await refresh_ria_statuses(context.application)
+
+
+def schedule_ria_status_refresh(application: Application, interval: float = RIA_REFRESH_INTERVAL) -> None:
+    """Реєструє періодичну звірку статусів оголошень з Auto.RIA в job_queue застосунку."""
+    if application.job_queue is None:
+        logger.warning("JobQueue недоступна, звірку статусів Auto.RIA не заплановано.")
+        return
+    application.job_queue.run_repeating(scheduled_ria_status_refresh, interval=interval, first=interval,
+                                        name=RIA_REFRESH_JOB_NAME)
 
 async def ria_manual_full_check(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробник для ручного запуску повної перевірки (архів + сповіщення)."""
@@ -585,9 +899,9 @@ async def ria_manual_full_check(update: Update, context: ContextTypes.DEFAULT_TY
 async def perform_ria_renewal(update: Update, context: ContextTypes.DEFAULT_TYPE, auto_id: int, ad_to_update: dict, row_index_to_update: int):
     """Виконує логіку оновлення дати оголошення."""
     target_message = update.callback_query.message if update.callback_query else update.message
+    row_key = ad_to_update.get(config.POST_SHEET_COLS['ria_auto_id'])
 
-    info_url = f"https://developers.ria.com/auto/info?api_key={config.AUTORIA_API_KEY}&auto_id={auto_id}"
-    ad_info = await make_ria_request(info_url, context=context, chat_id=update.effective_chat.id)
+    ad_info = await fetch_ria_ad_info(auto_id, context, update.effective_chat.id, fresh=True)
 
     if not ad_info:
         await target_message.reply_text("❌ Не вдалося отримати оновлену інформацію з Auto.RIA. Можливо, оголошення видалено.")
@@ -608,11 +922,14 @@ async def perform_ria_renewal(update: Update, context: ContextTypes.DEFAULT_TYPE
              ad_to_update[config.POST_SHEET_COLS['ria_auto_id']] = ad_info.get('autoId', '')
              logger.info(f"Healed missing auto_id for VIN {ad_to_update.get(config.POST_SHEET_COLS['vin'])}")
 
-        success = await gs_manager.update_row(
-            config.SHEET_NAMES['autoria_ads'], row_index_to_update, ad_to_update, config.POST_SHEET_HEADER_ORDER
+        # Поки тривав запит до RIA, рядки могли зсунутись — шукаємо рядок за ID оголошення.
+        success = await gs_manager.update_row_by_key(
+            config.SHEET_NAMES['autoria_ads'], row_key, ad_to_update, config.POST_SHEET_HEADER_ORDER,
+            fallback_row_index=row_index_to_update
         )
 
         if success:
+            track_ad_deadlines(context.application, ad_to_update)
             new_date_formatted = new_expire_datetime.strftime('%d.%m.%Y %H:%M')
             success_text = f"✅ Успішно оновлено!\nНова дата закінчення: *{new_date_formatted}*"
             if update.callback_query:
@@ -786,55 +1103,181 @@ async def ria_sync_with_posts(update: Update, context: ContextTypes.DEFAULT_TYPE
 
         missing_in_ria_vins = posts_vins - ria_vins
 
-        report_lines = []
-        keyboard = None
         if not missing_in_ria_vins:
-            report_lines.append("✅ <b>Все синхронізовано!</b>\n\nВсі активні пости відстежуються в аркуші 'AutoRIA_Ads'.")
-        else:
-            report_lines.append(f"⚠️ <b>Знайдено розбіжності ({len(missing_in_ria_vins)} авто):</b>\n\n"
-                                "Ці авто є в 'Опубліковані Пости', але відсутні в 'AutoRIA_Ads'. "
-                                "Можливо, їх варто додати для відстеження терміну дії оголошення на RIA.\n")
-
-            vin_to_model_map = {
-                p.get(config.POST_SHEET_COLS['vin']).strip().upper(): p.get(config.POST_SHEET_COLS['model'], 'Без назви')
-                for p in posts_records if p.get(config.POST_SHEET_COLS['vin'])
-            }
-            context.user_data['missing_ria_vins'] = list(missing_in_ria_vins)
-            context.user_data['vin_to_model_map'] = vin_to_model_map
-
-
-            for vin in sorted(list(missing_in_ria_vins)):
-                model = vin_to_model_map.get(vin, 'Невідома модель')
-                safe_model = html.escape(model)
-                safe_vin = html.escape(vin)
-                report_lines.append(f"• {safe_model} (<code>{safe_vin}</code>)")
-            
-            keyboard = InlineKeyboardMarkup([[
-                InlineKeyboardButton("🔗 Прив'язати авто до RIA", callback_data="ria_link_start")
-            ]])
-
-        final_report = "\n".join(report_lines)
-        
-        if len(final_report) > 4096:
-            await query.edit_message_text(report_lines[0])
-            chunk = ""
-            for line in report_lines[1:]:
-                if len(chunk) + len(line) > 4000:
-                    await context.bot.send_message(chat_id=query.from_user.id, text=chunk, parse_mode='HTML')
-                    chunk = line
-                else:
-                    chunk += f"\n{line}"
-            if chunk:
-                await context.bot.send_message(chat_id=query.from_user.id, text=chunk, parse_mode='HTML', reply_markup=keyboard)
+            await query.edit_message_text("✅ <b>Все синхронізовано!</b>\n\nВсі активні пости відстежуються в аркуші 'AutoRIA_Ads'.", parse_mode='HTML')
+            return
 
-        else:
-             await query.edit_message_text(final_report, parse_mode='HTML', reply_markup=keyboard)
+        vin_to_model_map = {
+            p.get(config.POST_SHEET_COLS['vin']).strip().upper(): p.get(config.POST_SHEET_COLS['model'], 'Без назви')
+            for p in posts_records if p.get(config.POST_SHEET_COLS['vin'])
+        }
+        context.user_data['missing_ria_vins'] = list(missing_in_ria_vins)
+        context.user_data['vin_to_model_map'] = vin_to_model_map
+
+        header = (f"⚠️ <b>Знайдено розбіжності ({len(missing_in_ria_vins)} авто):</b>\n\n"
+                  "Ці авто є в 'Опубліковані Пости', але відсутні в 'AutoRIA_Ads'. "
+                  "Можливо, їх варто додати для відстеження терміну дії оголошення на RIA.\n")
+        lines = (
+            f"• {html.escape(vin_to_model_map.get(vin, 'Невідома модель'))} (<code>{html.escape(vin)}</code>)"
+            for vin in sorted(missing_in_ria_vins)
+        )
+        link_button = [[InlineKeyboardButton("🔗 Прив'язати авто до RIA", callback_data="ria_link_start")]]
+        await send_report(query.message, lines, parse_mode='HTML', header=header, extra_rows=link_button, edit=True)
 
     except Exception as e:
         logger.error(f"Error during RIA sync with posts: {e}", exc_info=True)
         await query.edit_message_text(f"❌ Сталася помилка під час синхронізації: {e}")
 
 
+# --- Масовий імпорт оголошень з RIA ---
+
+def parse_ria_ids(text: str):
+    """ID оголошень з тексту: числа або посилання виду .../auto_bmw_x5_35123456.html, без повторів."""
+    ids = []
+    for token in re.split(r'[\s,;]+', text or ''):
+        match = RIA_ID_RE.search(token)
+        if match and int(match.group(1)) not in ids:
+            ids.append(int(match.group(1)))
+    return ids
+
+
+async def ria_bulk_import_start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """Запитує список ID або посилань для масового імпорту."""
+    query = update.callback_query
+    await query.answer()
+    await query.message.edit_text(
+        f"📥 Надішліть ID оголошень або посилання на RIA (до {RIA_BULK_MAX_IDS} шт.) — через пробіл, кому або з нового рядка.\n\n"
+        "Усі авто будуть додані як ваші чернетки та поставлені на відстеження."
+    )
+    return RIA_BULK_GET_IDS
+
+
+async def _edit_progress(message, text: str) -> None:
+    try:
+        await message.edit_text(text)
+    except BadRequest as e:
+        if "not modified" not in str(e).lower():
+            logger.warning(f"Не вдалося оновити повідомлення з прогресом імпорту: {e}")
+
+
+@in_lane(Lane.BACKGROUND)
+async def ria_bulk_import_get_ids(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
+    """
+    Імпортує список оголошень: паралельно отримує їх з RIA під спільним лімітером,
+    відсіює дублікати за індексом VIN і записує всі чернетки та рядки трекера
+    двома пакетними append. Прогрес показується в одному повідомленні.
+    """
+    auto_ids = parse_ria_ids(update.message.text)
+    if not auto_ids:
+        await update.message.reply_text("❌ Не знайдено жодного ID. Надішліть числа або посилання на оголошення RIA.")
+        return RIA_BULK_GET_IDS
+    if len(auto_ids) > RIA_BULK_MAX_IDS:
+        await update.message.reply_text(f"❌ Забагато оголошень ({len(auto_ids)}). За один раз — не більше {RIA_BULK_MAX_IDS}.")
+        return RIA_BULK_GET_IDS
+
+    tracker_sheet = config.SHEET_NAMES['autoria_ads']
+    posts_sheet = config.SHEET_NAMES['published_posts']
+    employee_id = update.effective_user.id
+    total = len(auto_ids)
+    progress = await update.message.reply_text(f"⏳ Імпорт з RIA: 0/{total}...")
+
+    skipped = {'tracked': [], 'restored': [], 'duplicate': [], 'inactive': [], 'failed': []}
+    for auto_id in list(auto_ids):
+        if await gs_manager.get_rows_by_key(tracker_sheet, auto_id):
+            skipped['tracked'].append(str(auto_id))
+            auto_ids.remove(auto_id)
+
+    semaphore = asyncio.Semaphore(RIA_REFRESH_CONCURRENCY)
+    done = total - len(auto_ids)
+    last_edit = time.monotonic()
+
+    async def fetch(auto_id):
+        nonlocal done, last_edit
+        async with semaphore:
+            ad_info = await fetch_ria_ad_info(auto_id, None, None)
+        done += 1
+        # Редагуємо не частіше ніж раз на кілька секунд, щоб не впертися в ліміт Telegram
+        if time.monotonic() - last_edit >= RIA_BULK_PROGRESS_INTERVAL:
+            last_edit = time.monotonic()
+            await _edit_progress(progress, f"⏳ Імпорт з RIA: {done}/{total}...")
+        return ad_info
+
+    started = time.monotonic()
+    results = await asyncio.gather(*(fetch(auto_id) for auto_id in auto_ids), return_exceptions=True)
+
+    drafts, tracker_rows, seen_vins = [], [], set()
+    for auto_id, ad_info in zip(auto_ids, results):
+        if isinstance(ad_info, Exception) or not ad_info:
+            skipped['failed'].append(str(auto_id))
+            continue
+        if not _ria_ad_is_active(ad_info, auto_id):
+            skipped['inactive'].append(str(auto_id))
+            continue
+        vin = str(ad_info.get('VIN') or '').strip().upper()
+        draft_saved = False
+        if vin:
+            existing_car = await gs_manager.find_car_by_vin(vin, [posts_sheet])
+            existing_record = existing_car['record'] if existing_car else {}
+            # Чернетку цього оголошення вже записав попередній імпорт, а рядок трекера — ні
+            draft_saved = str(existing_record.get(config.POST_SHEET_COLS['ria_auto_id']) or '') == str(auto_id)
+            if vin in seen_vins or (existing_car and not draft_saved and existing_record.get(config.POST_SHEET_COLS['status']) not in ['sold', 'archived']):
+                skipped['duplicate'].append(str(auto_id))
+                continue
+            seen_vins.add(vin)
+        expire_datetime = None
+        try:
+            expire_datetime = datetime.datetime.strptime(ad_info.get('expireDate') or '', RIA_DATE_FORMAT)
+        except (ValueError, TypeError):
+            pass
+        post_draft_data, autoria_ad_record = _ria_draft_rows(ad_info, employee_id, expire_datetime)
+        if draft_saved:
+            skipped['restored'].append(str(auto_id))
+        else:
+            drafts.append(post_draft_data)
+        tracker_rows.append(autoria_ad_record)
+
+    drafts_saved = tracker_saved = True
+    if tracker_rows:
+        await _edit_progress(progress, f"💾 Зберігаю {len(tracker_rows)} оголошень...")
+        if drafts:
+            drafts_saved = await gs_manager.add_rows(posts_sheet, drafts, config.POST_SHEET_HEADER_ORDER)
+        if drafts_saved:
+            tracker_saved = await gs_manager.add_rows(tracker_sheet, tracker_rows, config.POST_SHEET_HEADER_ORDER)
+        if drafts_saved and tracker_saved:
+            for autoria_ad_record in tracker_rows:
+                track_ad_deadlines(context.application, autoria_ad_record)
+    elapsed = time.monotonic() - started
+    logger.info(f"Масовий імпорт RIA: {len(drafts)} з {total} за {elapsed:.1f} с (менеджер {employee_id}).")
+
+    if not drafts_saved:
+        await _edit_progress(progress, "❌ Помилка збереження чернеток у таблицю. Спробуйте ще раз.")
+        return ConversationHandler.END
+    if not tracker_saved:
+        logger.error(f"Масовий імпорт RIA: чернетки збережено, а рядки трекера — ні (менеджер {employee_id}).")
+        await _edit_progress(
+            progress,
+            f"⚠️ Чернетки ({len(drafts)}) збережено, але оголошення не додано до відстеження RIA. "
+            f"Надішліть ті самі ID ще раз — імпорт допише лише відстеження."
+        )
+        return ConversationHandler.END
+
+    lines = [f"✅ Імпорт завершено за {elapsed:.0f} с: додано {len(drafts)} з {total} чернеток."]
+    labels = {
+        'tracked': "вже відстежуються",
+        'restored': "чернетка вже була, додано до відстеження",
+        'duplicate': "дублікати за VIN",
+        'inactive': "неактивні на RIA",
+        'failed': "не знайдено або помилка RIA",
+    }
+    for kind, label in labels.items():
+        if skipped[kind]:
+            lines.append(f"• {label} ({len(skipped[kind])}): {', '.join(skipped[kind])}")
+    if drafts:
+        lines.append("\nОпублікувати їх можна через «📝 Опублікувати мої чернетки».")
+    await _edit_progress(progress, "\n".join(lines))
+    return ConversationHandler.END
+
+
 # --- Функції для створення обробників ---
 
 def get_ria_add_handler():
@@ -856,6 +1299,18 @@ def get_ria_add_handler():
         allow_reentry=True
     )
 
+def get_ria_bulk_import_handler():
+    """Створює обробник масового імпорту оголошень з RIA."""
+    return ConversationHandler(
+        entry_points=[CallbackQueryHandler(ria_bulk_import_start, pattern="^ria_bulk_import_start$")],
+        states={
+            RIA_BULK_GET_IDS: [MessageHandler(filters.TEXT & ~filters.COMMAND, ria_bulk_import_get_ids)],
+        },
+        fallbacks=[CommandHandler("start", start_command), CommandHandler("cancel", cancel_command)],
+        per_message=False,
+        allow_reentry=True
+    )
+
 def get_ria_publish_draft_handler():
     """Створює обробник для публікації існуючих чернеток."""
     return ConversationHandler(
@@ -933,8 +1388,7 @@ async def ria_link_get_ria_id(update: Update, context: ContextTypes.DEFAULT_TYPE
     await update.message.reply_text(f"⏳ Перевіряю ID {auto_id} на RIA та готую дані...")
 
     # 1. Fetch RIA ad info to get expireDate and link
-    info_url = f"https://developers.ria.com/auto/info?api_key={config.AUTORIA_API_KEY}&auto_id={auto_id}"
-    ad_info = await make_ria_request(info_url, context=context, chat_id=update.effective_chat.id)
+    ad_info = await fetch_ria_ad_info(auto_id, context, update.effective_chat.id)
 
     if not ad_info:
         await update.message.reply_text("❌ Не вдалося знайти оголошення з таким ID на RIA. Перевірте ID та спробуйте ще раз.")
@@ -968,6 +1422,7 @@ async def ria_link_get_ria_id(update: Update, context: ContextTypes.DEFAULT_TYPE
     success = await gs_manager.add_row(config.SHEET_NAMES['autoria_ads'], new_ad_record, config.POST_SHEET_HEADER_ORDER)
 
     if success:
+        track_ad_deadlines(context.application, new_ad_record)
         await update.message.reply_text(f"✅ Успішно! Авто {new_ad_record.get('model')} прив'язано до оголошення RIA і додано до відстеження.")
     else:
         await update.message.reply_text("❌ Помилка збереження даних в таблицю 'AutoRIA_Ads'.")
@@ -4,10 +4,14 @@ from telegram.ext import Application, MessageHandler, filters
 from config import TOKEN
 from utils.g_sheets import setup_gspread_client
 from utils.auth import load_managers_from_sheet
+from utils.broadcast import TelegramRateLimiter
+from utils.sync import schedule_full_sync
 
 # Імпортуємо наші обробники
 from handlers.start import start_handler
 from handlers.admin import admin_panel, admin_handler # Імпортуємо функцію admin_panel
+from handlers.reports import get_report_handler
+from handlers.ria import schedule_expiry_deadlines, schedule_ria_status_refresh
 
 # Налаштування логування
 logging.basicConfig(
@@ -22,8 +26,8 @@ def main() -> None:
     # Завантаження ID менеджерів з таблиці
     load_managers_from_sheet()
 
-    # Створення Application
-    application = Application.builder().token(TOKEN).build()
+    # Створення Application; усі запити до Bot API проходять через спільний обмежувач
+    application = Application.builder().token(TOKEN).rate_limiter(TelegramRateLimiter()).build()
 
     # --- РЕЄСТРАЦІЯ ОБРОБНИКІВ ---
 
@@ -38,6 +42,18 @@ def main() -> None:
     admin_button_handler = MessageHandler(filters.Text(["🔐 Адмін-панель"]), admin_panel)
     application.add_handler(admin_button_handler)
 
+    # 4. Кнопки гортання сторінкових звітів (окрема група, щоб спрацьовувати в будь-якому стані розмов)
+    application.add_handler(get_report_handler(), group=-1)
+
+    # --- ФОНОВІ ЗАДАЧІ ---
+
+    # Періодична повна звірка робочих аркушів з "Опублікованими Постами"
+    schedule_full_sync(application)
+    # Періодична звірка активних оголошень з Auto.RIA (продовження, архівація, ціна)
+    schedule_ria_status_refresh(application)
+    # Дедлайни оголошень RIA: побудова з трекера при старті та періодична звірка
+    schedule_expiry_deadlines(application)
+
     # Запуск бота
     logger.info("Starting bot...")
     application.run_polling()
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+# utils/broadcast.py
+
+import datetime
+import logging
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from .quota import Lane, QuotaGovernor, current_lane
+
+logger = logging.getLogger(__name__)
+
+# Ліміти Bot API: ~30 повідомлень/с загалом, ~1/с в особистий чат, 20/хв у групу чи канал.
+TG_GLOBAL_RATE = 30.0
+TG_GLOBAL_BURST = 30
+TG_GLOBAL_RESERVES = {Lane.BACKGROUND: 5, Lane.BULK: 10}
+TG_PRIVATE_RATE = 1.0
+TG_PRIVATE_BURST = 3
+TG_GROUP_RATE = 20 / 60
+TG_GROUP_BURST = 3
+TG_MAX_RETRIES = 3
+TG_MAX_TRACKED_CHATS = 1000
+
+
+def _is_group(chat_id: str) -> bool:
+    # Групи та канали мають від'ємний ID або @username
+    return chat_id.startswith(("-", "@"))
+
+
+class TelegramRateLimiter(BaseRateLimiter[Lane]):
+    """
+    Обмежувач вихідних запитів Bot API для Application.builder().rate_limiter().
+    Кожен запит спершу чекає токен у бакеті свого чату, потім у глобальному,
+    тож повідомлення в різні чати йдуть паралельно. Смуга пріоритету береться
+    з поточного контексту (in_lane/sheets_lane) або з rate_limit_args, тому
+    відповіді користувачам обслуговуються раніше за масові сповіщення.
+    На RetryAfter бакет чату призупиняється, а запит повторюється.
+    """
+
+    def __init__(self, max_retries: int = TG_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.global_quota = QuotaGovernor(rate=TG_GLOBAL_RATE, burst=TG_GLOBAL_BURST, reserves=TG_GLOBAL_RESERVES)
+        self._chats: Dict[str, QuotaGovernor] = {}
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+
+    def _chat_quota(self, chat_id: Any) -> QuotaGovernor:
+        chat_id = str(chat_id)
+        quota = self._chats.get(chat_id)
+        if quota is None:
+            if len(self._chats) >= TG_MAX_TRACKED_CHATS:
+                # Забуваємо бакети чатів без черги: вони вже давно поповнились
+                for idle in [c for c, q in self._chats.items() if q.idle()]:
+                    del self._chats[idle]
+            if _is_group(chat_id):
+                quota = QuotaGovernor(rate=TG_GROUP_RATE, burst=TG_GROUP_BURST)
+            else:
+                quota = QuotaGovernor(rate=TG_PRIVATE_RATE, burst=TG_PRIVATE_BURST)
+            self._chats[chat_id] = quota
+        return quota
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Union[bool, Dict[str, Any], List[Dict[str, Any]]]]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[Lane],
+    ) -> Union[bool, Dict[str, Any], List[Dict[str, Any]]]:
+        lane = current_lane.get() if rate_limit_args is None else rate_limit_args
+        chat_id = data.get("chat_id")
+        chat_quota = self._chat_quota(chat_id) if chat_id is not None else None
+
+        attempt = 0
+        while True:
+            if chat_quota:
+                await chat_quota.acquire(lane)
+            await self.global_quota.acquire(lane)
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                retry_after = e.retry_after
+                if isinstance(retry_after, datetime.timedelta):
+                    retry_after = retry_after.total_seconds()
+                logger.warning(f"Telegram RetryAfter {retry_after} с для '{endpoint}' (чат {chat_id}), спроба {attempt}/{self.max_retries}.")
+                # Наступний acquire дочекається кінця паузи
+                (chat_quota or self.global_quota).penalize(float(retry_after))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"global": self.global_quota.stats(), "chats": len(self._chats)}
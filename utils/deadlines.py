@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+# utils/deadlines.py
+
+import datetime
+import heapq
+import itertools
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Дедлайни оголошення відносно дати закінчення: сповіщення за 24 та 12 годин і архівація.
+EXPIRY_DEADLINES = (
+    ("sent_24h", datetime.timedelta(hours=24)),
+    ("sent_12h", datetime.timedelta(hours=12)),
+    ("archive", datetime.timedelta(0)),
+)
+
+
+class ExpiryDeadlines:
+    """
+    Min-heap дедлайнів (expiry − 24h, expiry − 12h, expiry) для оголошень трекера.
+    Повторне планування оголошення не видаляє старі елементи з купи: вони
+    відкидаються під час вибірки, бо дата закінчення в них уже не актуальна.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[datetime.datetime, int, Any, str, datetime.datetime]] = []
+        self._expiry: Dict[Any, datetime.datetime] = {}
+        self._seq = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._expiry)
+
+    def __contains__(self, key: Any) -> bool:
+        return str(key) in self._expiry
+
+    def schedule(self, key: Any, expires_at: Optional[datetime.datetime]) -> None:
+        """Планує (або переплановує) дедлайни оголошення; None скасовує їх."""
+        key = str(key)
+        if expires_at is None:
+            self._expiry.pop(key, None)
+            return
+        if self._expiry.get(key) == expires_at:
+            return
+        self._expiry[key] = expires_at
+        for kind, before in EXPIRY_DEADLINES:
+            heapq.heappush(self._heap, (expires_at - before, next(self._seq), key, kind, expires_at))
+
+    def retry(self, key: Any, kind: str, at: datetime.datetime) -> None:
+        """
+        Повертає в купу дедлайн, обробка якого не вдалася, на момент at.
+        На відміну від schedule(), спрацьовує й тоді, коли дата закінчення не змінилася.
+        """
+        key = str(key)
+        expires_at = self._expiry.setdefault(key, at)
+        heapq.heappush(self._heap, (at, next(self._seq), key, kind, expires_at))
+
+    def cancel(self, key: Any) -> None:
+        self._expiry.pop(str(key), None)
+
+    def rebuild(self, items: Iterable[Tuple[Any, Optional[datetime.datetime]]]) -> None:
+        """Будує купу заново з пар (ключ, дата закінчення)."""
+        self._expiry = {str(key): expires_at for key, expires_at in items if key not in (None, "") and expires_at}
+        self._heap = [
+            (expires_at - before, next(self._seq), key, kind, expires_at)
+            for key, expires_at in self._expiry.items()
+            for kind, before in EXPIRY_DEADLINES
+        ]
+        heapq.heapify(self._heap)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._expiry.get(self._heap[0][2]) != self._heap[0][4]:
+            heapq.heappop(self._heap)
+
+    def next_deadline(self) -> Optional[datetime.datetime]:
+        """Найближчий актуальний дедлайн або None, якщо купа порожня."""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now: datetime.datetime) -> List[Tuple[str, str]]:
+        """Забирає всі дедлайни, що настали: [(ключ, вид)], по одному на оголошення."""
+        due: Dict[str, str] = {}
+        self._drop_stale()
+        while self._heap and self._heap[0][0] <= now:
+            _, _, key, kind, _ = heapq.heappop(self._heap)
+            # Пізніший дедлайн оголошення важливіший: архівація замість сповіщення
+            due[key] = kind
+            if kind == "archive":
+                self._expiry.pop(key, None)
+            self._drop_stale()
+        return list(due.items())
@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+# utils/fake_sheets.py
+
+import asyncio
+import collections
+import json
+import logging
+import math
+import random
+import re
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+import httpx
+
+from .quota import QuotaGovernor
+from .sheets_transport import SheetsBackend
+
+logger = logging.getLogger(__name__)
+
+# Реальні ліміти Google Sheets API: 60 запитів на хвилину на користувача
+FAKE_QUOTA_PER_MINUTE = 60
+FAKE_LATENCY = 0.15  # секунд, середня затримка відповіді
+FAKE_JITTER = 0.05
+
+_CELL_RE = re.compile(r"^([A-Z]*)(\d*)$")
+
+
+def _column_index(letters: str) -> int:
+    index = 0
+    for char in letters:
+        index = index * 26 + ord(char) - ord("A") + 1
+    return index
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+def parse_a1(a1_range: str) -> Tuple[str, Optional[int], Optional[int], Optional[int], Optional[int]]:
+    """
+    Розбирає A1-діапазон на (аркуш, перший рядок, перша колонка, останній рядок, остання колонка);
+    None означає відкриту межу ('Аркуш'!C:C, 'Аркуш'!5:5, 'Аркуш').
+    """
+    if a1_range.startswith("'"):
+        end = a1_range.index("'!", 1) if "'!" in a1_range else len(a1_range) - 1
+        title = a1_range[1:end].replace("''", "'")
+        cells = a1_range[end + 2:] if end + 1 < len(a1_range) else ""
+    else:
+        title, _, cells = a1_range.partition("!")
+    if not cells:
+        return title, None, None, None, None
+    start, _, stop = cells.partition(":")
+    stop = stop or start
+    bounds = []
+    for ref in (start, stop):
+        letters, digits = _CELL_RE.match(ref.upper()).groups()
+        bounds.append((int(digits) if digits else None, _column_index(letters) if letters else None))
+    (r1, c1), (r2, c2) = bounds
+    return title, r1, c1, r2, c2
+
+
+class FakeSheetsBackend(SheetsBackend):
+    """
+    Таблиця Google Sheets у пам'яті для локальних замірів без мережі.
+    Відповідає на ті самі запити, що й SheetsTransport, і моделює затримку
+    відповіді, хвилинний ліміт запитів (з відповідями 429 та Retry-After)
+    та випадкові 503. Лічильники запитів і клітинок доступні в stats().
+    """
+
+    def __init__(self, sheets: Optional[Dict[str, List[List[Any]]]] = None,
+                 latency: float = FAKE_LATENCY, jitter: float = FAKE_JITTER,
+                 quota_per_minute: Optional[int] = FAKE_QUOTA_PER_MINUTE,
+                 error_rate: float = 0.0, seed: Optional[int] = None,
+                 quota: Optional[QuotaGovernor] = None):
+        super().__init__(quota)
+        self.latency = latency
+        self.jitter = jitter
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._sheets: Dict[str, List[List[str]]] = {}
+        self._sheet_ids: Dict[str, int] = {}
+        self._window: collections.deque = collections.deque()
+        self.counters: collections.Counter = collections.Counter()
+        for title, rows in (sheets or {}).items():
+            self.seed(title, rows)
+
+    def seed(self, title: str, rows: List[List[Any]]) -> None:
+        """Створює (або замінює) аркуш із заданими рядками; перший рядок — заголовки."""
+        self._sheet_ids.setdefault(title, len(self._sheet_ids))
+        self._sheets[title] = [["" if v is None else str(v) for v in row] for row in rows]
+
+    def rows(self, title: str) -> List[List[str]]:
+        """Поточний вміст аркуша (для перевірок у бенчмарках)."""
+        return [list(row) for row in self._sheets.get(title, [])]
+
+    def stats(self) -> Dict[str, int]:
+        return dict(self.counters)
+
+    # --- Модель мережі та квоти ---
+
+    def _throttle(self) -> Optional[float]:
+        """Повертає Retry-After (с), якщо хвилинний ліміт вичерпано."""
+        if not self.quota_per_minute:
+            return None
+        now = time.monotonic()
+        while self._window and now - self._window[0] >= 60:
+            self._window.popleft()
+        if len(self._window) >= self.quota_per_minute:
+            return max(60 - (now - self._window[0]), 0.0)
+        self._window.append(now)
+        return None
+
+    @staticmethod
+    def _response(method: str, path: str, status: int, payload: Dict[str, Any],
+                  headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+        return httpx.Response(
+            status, headers=headers, content=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+            request=httpx.Request(method, "https://sheets.fake/" + path.lstrip("/"))
+        )
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(self._random.uniform(self.latency - self.jitter, self.latency + self.jitter), 0))
+        self.counters["requests"] += 1
+        retry_after = self._throttle()
+        if retry_after is not None:
+            self.counters["throttled"] += 1
+            return self._response(method, path, 429, {"error": {"code": 429, "status": "RESOURCE_EXHAUSTED"}},
+                                  {"Retry-After": str(math.ceil(retry_after))})
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.counters["errors"] += 1
+            return self._response(method, path, 503, {"error": {"code": 503, "status": "UNAVAILABLE"}})
+        try:
+            payload = self._dispatch(method, path, kwargs.get("params"), kwargs.get("json"))
+        except KeyError as e:
+            return self._response(method, path, 400, {"error": {"code": 400, "message": f"Unable to parse range: {e}"}})
+        return self._response(method, path, 200, payload)
+
+    # --- Обробка запитів ---
+
+    def _dispatch(self, method: str, path: str, params: Any, body: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        params = list(params.items()) if isinstance(params, dict) else list(params or [])
+        if path == "":
+            self.counters["metadata"] += 1
+            return {"sheets": [{"properties": {"sheetId": sid, "title": t}} for t, sid in self._sheet_ids.items()]}
+        if path == ":batchUpdate":
+            self.counters["batch_update"] += 1
+            return {"replies": [self._structure_request(r) for r in body.get("requests", [])]}
+        if path == "/values:batchGet":
+            self.counters["values_batch_get"] += 1
+            ranges = [value for name, value in params if name == "ranges"]
+            return {"valueRanges": [{"range": r, "values": self._read(r)} for r in ranges]}
+        if path == "/values:batchUpdate":
+            self.counters["values_batch_update"] += 1
+            for item in body.get("data", []):
+                self._write(item["range"], item["values"])
+            return {"totalUpdatedRows": len(body.get("data", []))}
+        if path.endswith(":append"):
+            self.counters["values_append"] += 1
+            return {"updates": {"updatedRange": self._append(unquote(path[len("/values/"):-len(":append")]), body["values"])}}
+        a1 = unquote(path[len("/values/"):])
+        if method == "PUT":
+            self.counters["values_update"] += 1
+            self._write(a1, body["values"])
+            return {"updatedRange": a1}
+        self.counters["values_get"] += 1
+        return {"range": a1, "values": self._read(a1)}
+
+    def _read(self, a1: str) -> List[List[str]]:
+        title, r1, c1, r2, c2 = parse_a1(a1)
+        rows = self._sheets[title]
+        start, stop = (r1 or 1) - 1, r2 or len(rows)
+        values = []
+        for row in rows[start:stop]:
+            cells = row[(c1 or 1) - 1:c2 or len(row)]
+            while cells and cells[-1] == "":
+                cells = cells[:-1]
+            values.append(cells)
+        while values and not values[-1]:
+            values.pop()
+        self.counters["cells_read"] += sum(len(row) for row in values)
+        return values
+
+    def _write(self, a1: str, values: List[List[Any]]) -> None:
+        title, r1, c1, _, _ = parse_a1(a1)
+        rows = self._sheets[title]
+        for offset, row_values in enumerate(values):
+            row_index = (r1 or 1) - 1 + offset
+            while len(rows) <= row_index:
+                rows.append([])
+            row = rows[row_index]
+            col = (c1 or 1) - 1
+            row.extend([""] * (col + len(row_values) - len(row)))
+            row[col:col + len(row_values)] = ["" if v is None else str(v) for v in row_values]
+            self.counters["cells_written"] += len(row_values)
+
+    def _append(self, a1: str, values: List[List[Any]]) -> str:
+        title = parse_a1(a1)[0]
+        rows = self._sheets[title]
+        last = len(rows)
+        while last and not any(rows[last - 1]):
+            last -= 1
+        first_row = last + 1
+        del rows[last:]
+        self._write(f"'{title}'!A{first_row}", values)
+        width = max((len(row) for row in values), default=1)
+        return f"'{title}'!A{first_row}:{_column_letter(width)}{first_row + len(values) - 1}"
+
+    def _structure_request(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        if "addSheet" in request:
+            title = request["addSheet"]["properties"]["title"]
+            self.seed(title, [])
+            return {"addSheet": {"properties": {"sheetId": self._sheet_ids[title], "title": title}}}
+        if "deleteDimension" in request:
+            rng = request["deleteDimension"]["range"]
+            title = next(t for t, sid in self._sheet_ids.items() if sid == rng["sheetId"])
+            if rng.get("dimension", "ROWS") == "ROWS":
+                del self._sheets[title][rng["startIndex"]:rng["endIndex"]]
+            return {}
+        logger.warning(f"Фейкова таблиця не підтримує запит: {list(request)}")
+        return {}
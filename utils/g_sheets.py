@@ -1,12 +1,31 @@
 import gspread
+from gspread.utils import numericise_all
 from oauth2client.service_account import ServiceAccountCredentials
 import logging
+import asyncio
+import re
+from functools import partial
+from typing import Dict, Any, List, Optional, Type
+import config
 from config import SHEET_NAMES
 from datetime import datetime
 import time
 
+from .replica import SheetReplica, REPLICA_DB_PATH
+from .vin_index import VinIndex
+from .row_keys import RowKeyIndex
+from .records import SheetRecord
+from .sheet_cache import RecordCache, DEFAULT_CACHE_TTL
+from .quota import QuotaGovernor, Lane, sheets_lane
+from .sheets_transport import SheetsBackend, SheetsTransport, AsyncWorksheet, a1_range
+from .write_queue import WriteQueue, PendingWrite, WRITE_FLUSH_INTERVAL, WRITE_MAX_BATCH
+from .journal import WriteJournal, JOURNAL_PATH, JOURNAL_MAX_ATTEMPTS
+from .write_planner import contiguous_ranges
+from .revisions import RevisionTracker, REVISION_SHEET, STAMP_COLUMN
+
 # Налаштування логування
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
 
 # Області доступу для API та шлях до файлу облікових даних
 SCOPE = ["https://spreadsheets.google.com/feeds",
@@ -33,22 +52,17 @@ def authorize_gspread():
         logging.error(f"Не вдалося підключитися до Google таблиці: {e}")
         return None
 
-# Ініціалізація підключення при завантаженні модуля
-spreadsheet = authorize_gspread()
-
 # --- УНІВЕРСАЛЬНА ФУНКЦІЯ ДОСТУПУ ДО АРКУШІВ ---
 def get_worksheet_by_name(sheet_name):
     """
     Отримує аркуш (worksheet) за його назвою.
     Це централізована функція для доступу до будь-якого аркуша.
     """
-    if not spreadsheet:
-        logging.error("Об'єкт таблиці не ініціалізовано. Спроба повторної авторизації...")
-        authorize_gspread()
-        if not spreadsheet:
-            logging.error("Повторна авторизація не вдалася. Неможливо отримати аркуш.")
-            return None
-    
+    # Підключення відкладене до першого звернення, щоб імпорт модуля не ходив у мережу.
+    if not authorize_gspread():
+        logging.error("Авторизація не вдалася. Неможливо отримати аркуш.")
+        return None
+
     try:
         return spreadsheet.worksheet(sheet_name)
     except gspread.exceptions.WorksheetNotFound:
@@ -60,49 +74,97 @@ def get_worksheet_by_name(sheet_name):
 
 # --- ВАШІ ІСНУЮЧІ ФУНКЦІЇ, ОНОВЛЕНІ ДЛЯ НАДІЙНОСТІ ---
 
+# Кеш заголовків: назва аркуша -> {заголовок: номер колонки (з 1)}
+_header_cache: Dict[str, Dict[str, int]] = {}
+# Останній виданий ID нотатки, щоб не перечитувати аркуш 'Нотатки'
+_last_note_id: Optional[int] = None
+
+CAR_SEARCH_SHEET_KEYS = ['all_cars', 'sydora_site', 'halytska_site', 'in_transit_usa', 'in_transit_china']
+VIN_COLUMN = 2
+VIN_LENGTH = 17
+
+
+def get_header_map(worksheet) -> Dict[str, int]:
+    """Повертає {заголовок: номер колонки} аркуша, читаючи заголовки лише один раз."""
+    if worksheet.title not in _header_cache:
+        headers = worksheet.row_values(1)
+        _header_cache[worksheet.title] = {header: i + 1 for i, header in enumerate(headers) if header}
+    return _header_cache[worksheet.title]
+
+
+def invalidate_header_cache(sheet_name: str = None) -> None:
+    """Скидає кеш заголовків (після ручної зміни колонок у таблиці)."""
+    global _last_note_id
+    if sheet_name:
+        _header_cache.pop(sheet_name, None)
+    else:
+        _header_cache.clear()
+    if sheet_name in (None, SHEET_NAMES["notes"]):
+        _last_note_id = None
+
+
+def _locate_car(vin_code):
+    """
+    Знаходить рядок авто за VIN одним пакетним запитом колонок VIN усіх аркушів.
+    Повертає (аркуш, номер рядка) або (None, None).
+    """
+    if not authorize_gspread():
+        return None, None
+    sheet_names = [SHEET_NAMES[key] for key in CAR_SEARCH_SHEET_KEYS]
+    column = _column_letter(VIN_COLUMN)
+    try:
+        response = spreadsheet.values_batch_get(
+            [f"'{name}'!{column}:{column}" for name in sheet_names], params={'majorDimension': 'COLUMNS'}
+        )
+    except Exception as e:
+        logging.error(f"Помилка пошуку VIN {vin_code}: {e}")
+        return None, None
+
+    for sheet_name, value_range in zip(sheet_names, response.get('valueRanges', [])):
+        columns = value_range.get('values', [])
+        vins = columns[0] if columns else []
+        if vin_code in vins:
+            worksheet = get_worksheet_by_name(sheet_name)
+            if worksheet:
+                return worksheet, vins.index(vin_code) + 1
+    return None, None
+
+
 def find_car_in_sheets(vin_code):
     """Шукає автомобіль за VIN-кодом у всіх відповідних аркушах."""
-    sheets_to_search = [
-        SHEET_NAMES['all_cars'],
-        SHEET_NAMES['sydora_site'],
-        SHEET_NAMES['halytska_site'],
-        SHEET_NAMES['in_transit_usa'],
-        SHEET_NAMES['in_transit_china']
-    ]
-    for sheet_name in sheets_to_search:
-        worksheet = get_worksheet_by_name(sheet_name)
-        if not worksheet:
-            continue
-        try:
-            cell = worksheet.find(vin_code, in_column=2)
-            if cell:
-                row_values = worksheet.row_values(cell.row)
-                headers = worksheet.row_values(1)
-                car_data = dict(zip(headers, row_values))
-                return car_data, worksheet
-        except gspread.exceptions.CellNotFound:
-            continue
-        except Exception as e:
-            logging.error(f"Помилка пошуку VIN {vin_code} в аркуші '{sheet_name}': {e}")
-    return None, None
+    worksheet, row_index = _locate_car(vin_code)
+    if not worksheet:
+        return None, None
+    try:
+        headers = get_header_map(worksheet)
+        row_values = worksheet.row_values(row_index)
+        car_data = {header: row_values[col - 1] if col <= len(row_values) else "" for header, col in headers.items()}
+        return car_data, worksheet
+    except Exception as e:
+        logging.error(f"Помилка читання VIN {vin_code} з аркуша '{worksheet.title}': {e}")
+        return None, None
 
 def update_car_in_sheet(vin_code, updates):
-    """Оновлює дані автомобіля за VIN-кодом."""
-    car_data, worksheet = find_car_in_sheets(vin_code)
-    if not worksheet or not car_data:
+    """Оновлює дані автомобіля за VIN-кодом, переписуючи рядок одним діапазоном A{row}:{last}{row}."""
+    worksheet, row_index = _locate_car(vin_code)
+    if not worksheet:
         logging.error(f"Автомобіль з VIN {vin_code} не знайдено для оновлення.")
         return False
     try:
-        cell = worksheet.find(vin_code, in_column=2)
-        headers = worksheet.row_values(1)
-        for key, value in updates.items():
-            if key in headers:
-                col = headers.index(key) + 1
-                worksheet.update_cell(cell.row, col, value)
+        headers = get_header_map(worksheet)
+        values = {headers[key]: value for key, value in updates.items() if key in headers}
         # Оновлюємо дату
         if 'Дата оновлення' in headers:
-            col = headers.index('Дата оновлення') + 1
-            worksheet.update_cell(cell.row, col, datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            values[headers['Дата оновлення']] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        if values:
+            # Формули незмінених комірок переписуємо як формули, а не як їхні значення
+            row = worksheet.row_values(row_index, value_render_option='FORMULA')
+            row += [""] * (max(max(headers.values()), len(row)) - len(row))
+            for col, value in values.items():
+                row[col - 1] = value
+            worksheet.batch_update([
+                {'range': f"A{row_index}:{_column_letter(len(row))}{row_index}", 'values': [row]}
+            ], value_input_option='USER_ENTERED')
         logging.info(f"Дані для VIN {vin_code} успішно оновлено.")
         return True
     except Exception as e:
@@ -121,10 +183,10 @@ def add_new_car_to_sheet(car_data, sheet_name_key):
         return False
         
     try:
-        headers = worksheet.row_values(1)
-        row_to_add = []
-        for header in headers:
-            row_to_add.append(car_data.get(header, ""))
+        headers = get_header_map(worksheet)
+        row_to_add = [""] * max(headers.values(), default=0)
+        for header, col in headers.items():
+            row_to_add[col - 1] = car_data.get(header, "")
         worksheet.append_row(row_to_add)
         logging.info(f"Новий автомобіль {car_data.get('ВІН-код')} додано до '{sheet_name}'.")
         return True
@@ -134,12 +196,17 @@ def add_new_car_to_sheet(car_data, sheet_name_key):
         
 def add_note_to_sheet(user_id, note_text, reminder_time=None):
     """Додає нотатку користувача в аркуш 'Нотатки'."""
+    global _last_note_id
     worksheet = get_worksheet_by_name(SHEET_NAMES["notes"])
     if not worksheet:
         return None
     try:
-        all_notes = worksheet.get_all_records()
-        new_id = max([note.get('ID Нотатки', 0) for note in all_notes] + [0]) + 1
+        if _last_note_id is None:
+            # Читаємо лише колонку ID, а далі рахуємо ID локально.
+            id_col = get_header_map(worksheet).get('ID Нотатки', 1)
+            ids = worksheet.col_values(id_col)[1:]
+            _last_note_id = max([int(v) for v in ids if str(v).strip().isdigit()] + [0])
+        new_id = _last_note_id + 1
         
         row_data = [
             new_id,
@@ -150,6 +217,7 @@ def add_note_to_sheet(user_id, note_text, reminder_time=None):
             "Активно" if reminder_time else "Без нагадування"
         ]
         worksheet.append_row(row_data)
+        _last_note_id = new_id
         logging.info(f"Нотатку з ID {new_id} для користувача {user_id} додано.")
         return new_id
     except Exception as e:
@@ -160,3 +228,979 @@ def add_note_to_sheet(user_id, note_text, reminder_time=None):
 # Переконайтесь, що всі вони використовують get_worksheet_by_name()
 # для отримання доступу до аркушів.
 
+
+
+# --- АСИНХРОННИЙ МЕНЕДЖЕР ТАБЛИЦІ ---
+
+REPLICA_REFRESH_INTERVAL = 60  # секунд між фоновими оновленнями репліки
+# TTL кешу записів (секунд) для окремих аркушів за ключем config.SHEET_NAMES;
+# решта аркушів кешується на DEFAULT_CACHE_TTL.
+SHEET_CACHE_TTLS = {
+    'notes': 10,
+    'payments': 10,
+    'autoria_ads': 60,
+    'archive': 300,
+}
+# Дельта-оновлення репліки вмикається явно (delta_refresh=True): воно додає в
+# таблицю прихований аркуш REVISION_SHEET і колонку STAMP_COLUMN у службові
+# аркуші нижче; робочі аркуші з авто не змінюються. Тоді звичайне оновлення —
+# одне читання REVISION_SHEET, після якого дочитуються лише змінені рядки та
+# аркуші з ручними правками (за відбитком вмісту), а повне — раз на
+# FULL_REFRESH_INTERVAL як страховка.
+DELTA_REFRESH_ENABLED = False
+DELTA_REFRESH_INTERVAL = 15  # секунд між дельта-оновленнями
+FULL_REFRESH_INTERVAL = 1800  # секунд між повними оновленнями за увімкненої дельти
+FINGERPRINT_COLUMNS = "A:BL"  # колонки аркуша, що входять у відбиток вмісту
+DELTA_SHEET_KEYS = ('published_posts', 'archive', 'autoria_ads', 'notes', 'payments')
+
+_ROW_RANGE_RE = re.compile(r"^[A-Z]+(\d+)(?::[A-Z]+\d+)?$")
+_UPDATED_RANGE_RE = re.compile(r"![A-Z]+(\d+)")
+
+
+def _values_to_records(values: List[List[str]]) -> tuple[List[str], List[Dict[str, Any]]]:
+    """Перетворює сирі значення аркуша на заголовки та записи (як gspread.get_all_records)."""
+    if not values:
+        return [], []
+    headers = [str(h).strip() for h in values[0]]
+    width = len(headers)
+    records = []
+    for row in values[1:]:
+        padded = list(row[:width]) + [""] * (width - len(row))
+        records.append(dict(zip(headers, numericise_all(padded))))
+    return headers, records
+
+
+def _column_letter(index: int) -> str:
+    """Повертає буквене позначення колонки за її номером (1 -> A)."""
+    letters = ""
+    while index > 0:
+        index, rem = divmod(index - 1, 26)
+        letters = chr(ord("A") + rem) + letters
+    return letters
+
+
+class GoogleSheetManager:
+    """
+    Асинхронний клас для управління всіма операціями з Google Sheets.
+    Усі читання обслуговуються з локальної SQLite-репліки, записи
+    надсилаються в таблицю та одразу відображаються в репліці.
+    Запити до API йдуть через SheetsBackend: мережевий SheetsTransport або
+    переданий бекенд (FakeSheetsBackend для замірів без мережі).
+    """
+
+    def __init__(self, credentials_path: str, spreadsheet_key: str,
+                 replica_path: str = REPLICA_DB_PATH,
+                 refresh_interval: float = REPLICA_REFRESH_INTERVAL,
+                 cache_ttls: Optional[Dict[str, float]] = None,
+                 default_cache_ttl: float = DEFAULT_CACHE_TTL,
+                 write_flush_interval: float = WRITE_FLUSH_INTERVAL,
+                 write_max_batch: int = WRITE_MAX_BATCH,
+                 quota: Optional[QuotaGovernor] = None,
+                 journal_path: str = JOURNAL_PATH,
+                 backend: Optional[SheetsBackend] = None,
+                 delta_refresh: bool = DELTA_REFRESH_ENABLED,
+                 delta_refresh_interval: float = DELTA_REFRESH_INTERVAL,
+                 full_refresh_interval: float = FULL_REFRESH_INTERVAL):
+        self.credentials_path = credentials_path
+        self.spreadsheet_key = spreadsheet_key
+        # Готовий бекенд (наприклад, FakeSheetsBackend для локальних замірів) замість мережевого
+        self.backend = backend
+        self.transport: Optional[SheetsBackend] = None
+        self.is_authorized = False
+        self.replica = SheetReplica(replica_path)
+        self.vin_index = VinIndex((config.POST_SHEET_COLS['vin'], config.CAR_SHEET_COLS['vin']))
+        self.row_keys = RowKeyIndex(self._row_key_columns())
+        for sheet_name in self.replica.sheet_names():
+            records = self.replica.get_records(sheet_name)
+            self.vin_index.build_sheet(sheet_name, records)
+            self.row_keys.build_sheet(sheet_name, records)
+        self.refresh_interval = refresh_interval
+        self.delta_refresh = delta_refresh
+        self.delta_refresh_interval = delta_refresh_interval
+        self.full_refresh_interval = full_refresh_interval
+        ttls = {config.SHEET_NAMES[key]: ttl for key, ttl in SHEET_CACHE_TTLS.items() if key in config.SHEET_NAMES}
+        ttls.update(cache_ttls or {})
+        self.record_cache = RecordCache(default_cache_ttl, ttls)
+        self.quota = quota or (backend.quota if backend else QuotaGovernor())
+        self.write_queue = WriteQueue(self._flush_writes, write_flush_interval, write_max_batch)
+        self.journal = WriteJournal(journal_path)
+        # Номери змін журналу, що зараз стоять у черзі записів, та кількість невдалих спроб
+        self._journal_inflight: set = set()
+        self._journal_attempts: Dict[int, int] = {}
+        self._worksheets: Dict[str, AsyncWorksheet] = {}
+        self._write_generation: Dict[str, int] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.revisions = RevisionTracker()
+        self._delta_enabled = False
+        self._last_full_refresh = 0.0
+        # Покоління записів аркуша, при якому зафіксовано його відбиток вмісту
+        self._fingerprint_generation: Dict[str, int] = {}
+        # Блокування структури аркуша: поки видаляються рядки, номери рядків за ключем не видаються.
+        self._structure_locks: Dict[str, asyncio.Lock] = {}
+
+    # --- Службові методи ---
+
+    def quota_stats(self) -> Dict[str, Any]:
+        """Стан квоти: токени, пауза після 429 та глибина черг по смугах."""
+        return self.quota.stats()
+
+    @staticmethod
+    def _row_key_columns() -> Dict[str, str]:
+        """Колонки, значення яких стабільно ідентифікують рядок у своєму аркуші."""
+        columns = {config.SHEET_NAMES['published_posts']: config.POST_SHEET_COLS['vin']}
+        for sheet_name in config.WORKING_SHEETS:
+            columns[sheet_name] = config.CAR_SHEET_COLS['vin']
+        columns.update({
+            config.SHEET_NAMES['autoria_ads']: config.POST_SHEET_COLS['ria_auto_id'],
+            config.SHEET_NAMES['payments']: "ВІН-код",
+            config.SHEET_NAMES['notes']: "ID Нотатки",
+        })
+        return columns
+
+    def _structure_lock(self, sheet_name: str) -> asyncio.Lock:
+        return self._structure_locks.setdefault(sheet_name, asyncio.Lock())
+
+    def _bump_generation(self, sheet_name: str) -> None:
+        """Позначає, що аркуш змінено локально (щоб фонове оновлення не затерло запис)."""
+        self._write_generation[sheet_name] = self._write_generation.get(sheet_name, 0) + 1
+        self.record_cache.invalidate(sheet_name)
+
+    async def authorize(self) -> bool:
+        """Авторизується, відкриває таблицю та наповнює локальну репліку."""
+        if self.is_authorized:
+            return True
+        try:
+            self.transport = self.backend or SheetsTransport(self.credentials_path, self.spreadsheet_key, quota=self.quota)
+            await self._load_worksheets()
+            self.is_authorized = True
+            logger.info("Авторизація в Google Sheets успішна.")
+        except Exception as e:
+            logger.error(f"Помилка авторизації в Google Sheets: {e}")
+            self.is_authorized = False
+            return False
+
+        if self.delta_refresh:
+            await self._ensure_revision_sheet()
+        await self.refresh_replica()
+        await self._ensure_stamp_columns()
+        await self.replay_journal()
+        self.start_replica_refresh()
+        return True
+
+    async def _load_worksheets(self) -> None:
+        """Оновлює перелік аркушів таблиці (назва -> sheetId)."""
+        metadata = await self.transport.get_metadata()
+        self._worksheets = {
+            title: AsyncWorksheet(self.transport, title, sheet_id) for title, sheet_id in metadata.items()
+        }
+
+    async def get_sheet(self, sheet_name: str) -> Optional[AsyncWorksheet]:
+        """Повертає об'єкт аркуша (з кешуванням)."""
+        if sheet_name in self._worksheets:
+            return self._worksheets[sheet_name]
+        if not self.is_authorized and not await self.authorize():
+            return None
+        try:
+            # Аркуш міг з'явитися після авторизації.
+            await self._load_worksheets()
+        except Exception as e:
+            logger.error(f"Невідома помилка при відкритті аркуша '{sheet_name}': {e}")
+            return None
+        if sheet_name not in self._worksheets:
+            logger.error(f"Аркуш з назвою '{sheet_name}' не знайдено.")
+            return None
+        return self._worksheets[sheet_name]
+
+    async def open_worksheet(self, sheet_name: str) -> Optional[AsyncWorksheet]:
+        """Синонім get_sheet для сумісності зі старим кодом."""
+        return await self.get_sheet(sheet_name)
+
+    async def get_all_values(self, sheet_name: str) -> List[List[str]] | None:
+        """Повертає сирі значення аркуша (включно з заголовком) напряму з Google Sheets."""
+        worksheet = await self.get_sheet(sheet_name)
+        if not worksheet:
+            return None
+        return await worksheet.get_all_values()
+
+    async def close(self) -> None:
+        """Зупиняє фонові задачі, скидає чергу записів та закриває з'єднання."""
+        if self._refresh_task:
+            self._refresh_task.cancel()
+        await self.write_queue.flush()
+        if self.transport:
+            await self.transport.close()
+        self.replica.close()
+        self.journal.close()
+
+    # --- Репліка ---
+
+    def _replicated_sheets(self) -> List[str]:
+        return list(dict.fromkeys(config.SHEET_NAMES.values()))
+
+    async def _load_sheet_into_replica(self, sheet_name: str) -> bool:
+        """Завантажує один аркуш з Google Sheets у репліку."""
+        await self.write_queue.flush(sheet_name)
+        generation = self._write_generation.get(sheet_name, 0)
+        worksheet = await self.get_sheet(sheet_name)
+        if not worksheet:
+            return False
+        values = await worksheet.get_all_values()
+        if self._write_generation.get(sheet_name, 0) != generation:
+            logger.info(f"Аркуш '{sheet_name}' змінився під час завантаження, оновлення репліки відкладено.")
+            return False
+        headers, records = _values_to_records(values)
+        self._replica_replace(sheet_name, headers, records)
+        return True
+
+    async def refresh_replica(self, sheet_names: Optional[List[str]] = None) -> None:
+        """
+        Повністю підтягує в репліку аркуші (за замовчуванням усі з config.SHEET_NAMES)
+        одним пакетним запитом; в тому ж запиті читаються ревізії аркушів.
+        """
+        if not self.is_authorized:
+            return
+        sheet_names = sheet_names or self._replicated_sheets()
+        generations = {name: self._write_generation.get(name, 0) for name in sheet_names}
+        try:
+            await self._load_worksheets()
+            sheet_names = [name for name in sheet_names if name in self._worksheets]
+            ranges = [a1_range(name) for name in sheet_names]
+            if self._delta_enabled:
+                ranges.append(a1_range(REVISION_SHEET, "A:C"))
+            response = await self.transport.values_batch_get(ranges)
+        except Exception as e:
+            logger.error(f"Не вдалося оновити репліку пакетним запитом: {e}")
+            return
+
+        value_ranges = response.get('valueRanges', [])
+        if self._delta_enabled and len(value_ranges) > len(sheet_names):
+            self.revisions.load(value_ranges[-1].get('values', []))
+        for sheet_name, value_range in zip(sheet_names, value_ranges):
+            if self._write_generation.get(sheet_name, 0) != generations[sheet_name]:
+                continue
+            if self.write_queue.has_pending(sheet_name):
+                continue
+            headers, records = _values_to_records(value_range.get('values', []))
+            self._replica_replace(sheet_name, headers, records)
+            self.revisions.seen[sheet_name] = self.revisions.remote.get(sheet_name, 0)
+            self._accept_fingerprint(sheet_name)
+        logger.info(f"Репліку оновлено: {len(sheet_names)} аркушів.")
+
+    def _accept_fingerprint(self, sheet_name: str) -> None:
+        self.revisions.accept_fingerprint(sheet_name)
+        self._fingerprint_generation[sheet_name] = self._write_generation.get(sheet_name, 0)
+
+    async def refresh_replica_delta(self) -> None:
+        """
+        Звичайне оновлення репліки за увімкненої дельти: одне читання REVISION_SHEET.
+        Аркуші, у яких змінився лише відбиток вмісту (ручна правка), перечитуються
+        повністю. Для аркушів з колонкою STAMP_COLUMN і новою ревізією читається
+        колонка позначок, а потім лише рядки з новішою позначкою. Якщо нічого не
+        змінилося, оновлення коштує один запит.
+        """
+        if not self.is_authorized:
+            return
+        try:
+            self.revisions.load(await self.transport.values_get(a1_range(REVISION_SHEET, "A:C")))
+        except Exception as e:
+            logger.error(f"Не вдалося прочитати ревізії аркушів: {e}")
+            return
+
+        delta_sheets = [name for name in self._delta_sheets() if self._stamp_index(name) is not None]
+        changed = [name for name in delta_sheets if self.revisions.changed(name)]
+        edited = []
+        for sheet_name in self._replicated_sheets():
+            if sheet_name in changed or not self.revisions.fingerprint_changed(sheet_name):
+                continue
+            if self._write_generation.get(sheet_name, 0) != self._fingerprint_generation.get(sheet_name, 0):
+                # Відбиток змінив запис самого бота, а він уже є в репліці
+                self._accept_fingerprint(sheet_name)
+            else:
+                edited.append(sheet_name)
+        if edited:
+            logger.info(f"Виявлено зовнішні правки в аркушах: {', '.join(edited)}.")
+            await self.refresh_replica(edited)
+        if not changed:
+            return
+
+        generations = {name: self._write_generation.get(name, 0) for name in changed}
+        try:
+            stamp_columns = {name: _column_letter(self._stamp_index(name) + 1) for name in changed}
+            response = await self.transport.values_batch_get(
+                [a1_range(name, f"{stamp_columns[name]}:{stamp_columns[name]}") for name in changed]
+            )
+            spans = {}
+            for sheet_name, value_range in zip(changed, response.get('valueRanges', [])):
+                stamps = [row[0] if row else "" for row in value_range.get('values', [])]
+                rows = self.revisions.changed_rows(stamps, self.revisions.seen.get(sheet_name, 0))
+                spans[sheet_name] = self.revisions.coalesce(rows)
+            ranges = [
+                (sheet_name, first, a1_range(sheet_name, f"A{first}:{stamp_columns[sheet_name]}{last}"))
+                for sheet_name, sheet_spans in spans.items() for first, last in sheet_spans
+            ]
+            rows_response = await self.transport.values_batch_get([r[2] for r in ranges]) if ranges else {}
+        except Exception as e:
+            logger.error(f"Не вдалося виконати дельта-оновлення репліки: {e}")
+            return
+
+        fetched = 0
+        skipped = {
+            name for name in changed
+            if self._write_generation.get(name, 0) != generations[name] or self.write_queue.has_pending(name)
+        }
+        for (sheet_name, first, _), value_range in zip(ranges, rows_response.get('valueRanges', [])):
+            if sheet_name in skipped:
+                continue
+            headers = self.replica.get_headers(sheet_name) or []
+            for offset, row in enumerate(value_range.get('values', [])):
+                self._replica_set_row(sheet_name, first + offset, self._to_replica_record(sheet_name, row, headers))
+                fetched += 1
+        for sheet_name in changed:
+            if sheet_name not in skipped:
+                self.revisions.seen[sheet_name] = self.revisions.remote.get(sheet_name, 0)
+                self._accept_fingerprint(sheet_name)
+        logger.info(f"Дельта-оновлення репліки: {len(changed)} змінених аркушів, {fetched} рядків.")
+
+    def _delta_sheets(self) -> List[str]:
+        return [config.SHEET_NAMES[key] for key in DELTA_SHEET_KEYS if key in config.SHEET_NAMES]
+
+    def _stamp_index(self, sheet_name: str) -> Optional[int]:
+        """Індекс (з 0) колонки STAMP_COLUMN, якщо аркуш бере участь у дельта-читанні."""
+        if not self._delta_enabled or sheet_name not in self._delta_sheets():
+            return None
+        headers = self.replica.get_headers(sheet_name) or []
+        return headers.index(STAMP_COLUMN) if STAMP_COLUMN in headers else None
+
+    async def _ensure_revision_sheet(self) -> None:
+        """
+        Створює прихований службовий аркуш ревізій, якщо його ще немає, і додає
+        в нього формули-відбитки для всіх аркушів репліки.
+        """
+        try:
+            if REVISION_SHEET not in self._worksheets:
+                await self.transport.batch_update({"requests": [{
+                    "addSheet": {"properties": {"title": REVISION_SHEET, "hidden": True}}
+                }]})
+                await self._load_worksheets()
+            self.revisions.load(await self.transport.values_get(a1_range(REVISION_SHEET, "A:C")))
+            data = self.revisions.fingerprint_rows({
+                name: a1_range(name, FINGERPRINT_COLUMNS) for name in self._replicated_sheets() if name in self._worksheets
+            })
+            if data:
+                await self.transport.values_batch_update(
+                    [{**item, "range": a1_range(REVISION_SHEET, item["range"])} for item in data],
+                    value_input_option='USER_ENTERED'
+                )
+            self._delta_enabled = True
+        except Exception as e:
+            logger.warning(f"Аркуш ревізій недоступний, дельта-оновлення вимкнено: {e}")
+            self._delta_enabled = False
+
+    async def _ensure_stamp_columns(self) -> None:
+        """Додає заголовок STAMP_COLUMN у кінець аркушів, що оновлюються дельтами."""
+        if not self._delta_enabled:
+            return
+        data, new_headers = [], {}
+        for sheet_name in self._delta_sheets():
+            headers = self.replica.get_headers(sheet_name)
+            if not headers or STAMP_COLUMN in headers:
+                continue
+            column = _column_letter(len(headers) + 1)
+            data.append({"range": a1_range(sheet_name, f"{column}1"), "values": [[STAMP_COLUMN]]})
+            new_headers[sheet_name] = headers + [STAMP_COLUMN]
+        if not data:
+            return
+        try:
+            await self.transport.values_batch_update(data)
+        except Exception as e:
+            logger.warning(f"Не вдалося додати колонку '{STAMP_COLUMN}': {e}")
+            return
+        for sheet_name, headers in new_headers.items():
+            self.replica.set_headers(sheet_name, headers)
+            self.record_cache.invalidate(sheet_name)
+        logger.info(f"Колонку '{STAMP_COLUMN}' додано в аркуші: {', '.join(new_headers)}.")
+
+    def start_replica_refresh(self) -> None:
+        """Запускає фонове оновлення репліки, щоб підхоплювати ручні правки в таблиці."""
+        if self._refresh_task and not self._refresh_task.done():
+            return
+        self._refresh_task = asyncio.create_task(self._replica_refresh_loop())
+
+    async def _replica_refresh_loop(self) -> None:
+        self._last_full_refresh = time.monotonic()
+        while True:
+            interval = self.delta_refresh_interval if self._delta_enabled else self.refresh_interval
+            await asyncio.sleep(interval)
+            try:
+                # Зміни, які не вдалося записати (збій API), повторюються з журналу
+                await self.replay_journal()
+                with sheets_lane(Lane.BULK):
+                    if self._delta_enabled and time.monotonic() - self._last_full_refresh < self.full_refresh_interval:
+                        await self.refresh_replica_delta()
+                    else:
+                        self._last_full_refresh = time.monotonic()
+                        await self.refresh_replica()
+            except Exception as e:
+                logger.error(f"Помилка фонового оновлення репліки: {e}", exc_info=True)
+
+    def _replica_replace(self, sheet_name: str, headers: List[str], records: List[Dict[str, Any]]) -> None:
+        self.record_cache.invalidate(sheet_name)
+        self.replica.replace_sheet(sheet_name, headers, records)
+        self.vin_index.build_sheet(sheet_name, records)
+        self.row_keys.build_sheet(sheet_name, records)
+
+    def _replica_set_row(self, sheet_name: str, row_index: int, record: Dict[str, Any]) -> None:
+        self.record_cache.invalidate(sheet_name)
+        self.replica.upsert_row(sheet_name, row_index, record)
+        self.vin_index.set_row(sheet_name, row_index, record)
+        self.row_keys.set_row(sheet_name, row_index, record)
+
+    def _replica_delete_rows(self, sheet_name: str, row_indices: List[int]) -> None:
+        self.record_cache.invalidate(sheet_name)
+        self.replica.delete_rows(sheet_name, row_indices)
+        self.vin_index.delete_rows(sheet_name, row_indices)
+        self.row_keys.delete_rows(sheet_name, row_indices)
+
+    def _replica_drop(self, sheet_name: str) -> None:
+        self.record_cache.invalidate(sheet_name)
+        self.replica.drop_sheet(sheet_name)
+        self.vin_index.drop_sheet(sheet_name)
+        self.row_keys.drop_sheet(sheet_name)
+
+    def _to_replica_record(self, sheet_name: str, row_values: List[Any], headers_order: List[str]) -> Dict[str, Any]:
+        headers = self.replica.get_headers(sheet_name) or headers_order
+        values = ["" if v is None else str(v) for v in row_values]
+        values += [""] * (len(headers) - len(values))
+        return dict(zip(headers, numericise_all(values)))
+
+    # --- Читання ---
+
+    async def _load_records(self, sheet_name: str) -> List[Dict[str, Any]] | None:
+        """Завантажує записи з репліки (а за її відсутності — з Google Sheets)."""
+        if not self.replica.has_sheet(sheet_name):
+            if not await self._load_sheet_into_replica(sheet_name):
+                return None
+        return self.replica.get_records(sheet_name)
+
+    async def get_all_records(self, sheet_name: str, expected_headers: List[str] = None) -> List[Dict[str, Any]] | None:
+        """
+        Отримує всі записи з аркуша у вигляді списку словників.
+        Результат кешується на TTL аркуша; кожен запис через менеджер скидає кеш.
+        """
+        try:
+            records = await self.record_cache.get_or_load(sheet_name, partial(self._load_records, sheet_name))
+            if records is None:
+                return None
+            if expected_headers and records:
+                actual_headers = self.replica.get_headers(sheet_name) or []
+                if not set(expected_headers).issubset(actual_headers):
+                    logger.warning(f"Заголовки в аркуші '{sheet_name}' не співпадають з очікуваними.")
+            return records
+        except Exception as e:
+            logger.error(f"Помилка при отриманні всіх записів з '{sheet_name}': {e}", exc_info=True)
+            return None
+
+    async def get_typed_records(self, sheet_name: str, record_cls: Type[SheetRecord]) -> List[SheetRecord] | None:
+        """
+        Повертає записи аркуша як типізовані об'єкти record_cls (PostRecord, DealRecord, ...).
+        Розбір цін і дат виконується один раз на версію кешу; об'єкти спільні, тож
+        для змін використовуйте dataclasses.replace.
+        """
+        try:
+            return await self.record_cache.get_or_derive(
+                sheet_name, record_cls, partial(self._load_records, sheet_name),
+                lambda records: [record_cls.from_row(record) for record in records]
+            )
+        except Exception as e:
+            logger.error(f"Помилка при отриманні типізованих записів з '{sheet_name}': {e}", exc_info=True)
+            return None
+
+    async def get_row_by_id(self, sheet_name: str, row_id: Any, id_column_name: str = "ID") -> Dict[str, Any] | None:
+        """Знаходить запис за значенням у колонці-ідентифікаторі."""
+        if self.row_keys.key_column(sheet_name) == id_column_name:
+            row_index = await self.row_for_key(sheet_name, row_id)
+            record = self.replica.get_row(sheet_name, row_index) if row_index else None
+            return {"record": record, "row_index": row_index, "sheet_name": sheet_name} if record else None
+        records = await self.get_all_records(sheet_name)
+        for i, record in enumerate(records or []):
+            if str(record.get(id_column_name)) == str(row_id):
+                return {"record": record, "row_index": i + 2, "sheet_name": sheet_name}
+        return None
+
+    async def row_for_key(self, sheet_name: str, key: Any, hint: Optional[int] = None) -> Optional[int]:
+        """
+        Поточний номер рядка запису з ключем key (див. _row_key_columns).
+        hint — номер рядка зі знімка викликача, якщо ключ у аркуші повторюється.
+        """
+        if not self.row_keys.has_sheet(sheet_name):
+            await self.get_all_records(sheet_name)
+        async with self._structure_lock(sheet_name):
+            return self.row_keys.resolve_row(sheet_name, key, hint)
+
+    async def get_rows_by_key(self, sheet_name: str, key: Any) -> List[Dict[str, Any]]:
+        """Усі записи аркуша з ключем key (за зростанням номера рядка) без звернень до API."""
+        if not self.row_keys.has_sheet(sheet_name):
+            await self.get_all_records(sheet_name)
+        async with self._structure_lock(sheet_name):
+            rows = []
+            for row_index in self.row_keys.rows_for(sheet_name, key):
+                record = self.replica.get_row(sheet_name, row_index)
+                if record is not None:
+                    rows.append({"record": record, "row_index": row_index, "sheet_name": sheet_name})
+            return rows
+
+    async def find_car_by_vin(self, vin: str, search_sheets: List[str] = None) -> Dict[str, Any] | None:
+        """
+        Шукає авто за повним VIN у вказаних аркушах через індекс VIN,
+        а якщо не знайдено і VIN неповний — за його останніми 4+ символами.
+        """
+        vin = str(vin or "").strip().upper()
+        if not vin:
+            return None
+        search_sheets = search_sheets or [config.SHEET_NAMES['published_posts']]
+        for sheet_name in search_sheets:
+            if not self.vin_index.has_sheet(sheet_name):
+                await self.get_all_records(sheet_name)
+
+        found = self.vin_index.lookup(vin, search_sheets)
+        # Повний VIN, якого немає в індексі, не шукаємо повним перебором суфіксів
+        if not found and 4 <= len(vin) < VIN_LENGTH:
+            found = self.vin_index.lookup_suffix(vin, search_sheets)
+        return found
+
+    async def find_posts_by_manager_id(self, manager_id: int) -> List[Dict[str, Any]]:
+        """Повертає активні пости та чернетки, закріплені за менеджером."""
+        sheet_name = config.SHEET_NAMES['published_posts']
+        records = await self.get_all_records(sheet_name) or []
+        return [
+            {"record": record, "row_index": i + 2, "sheet_name": sheet_name}
+            for i, record in enumerate(records)
+            if str(record.get(config.POST_SHEET_COLS['emp_id'])) == str(manager_id)
+            and record.get(config.POST_SHEET_COLS['status']) in ('active', 'draft_ria', 'draft_manual')
+        ]
+
+    async def get_full_inventory(self) -> List[Dict[str, Any]]:
+        """Повертає всі унікальні (за VIN) активні авто з 'Опубліковані Пости'."""
+        records = await self.get_all_records(config.SHEET_NAMES['published_posts']) or []
+        inventory = {}
+        for record in records:
+            vin = str(record.get(config.POST_SHEET_COLS['vin'], '')).strip().upper()
+            if vin and record.get(config.POST_SHEET_COLS['status']) in ('active', 'draft_ria', 'draft_manual'):
+                inventory[vin] = record
+        return list(inventory.values())
+
+    async def get_managers_summary(self) -> Dict[int, int]:
+        """Підраховує кількість авто на робочих аркушах по кожному менеджеру."""
+        summary: Dict[int, int] = {}
+        for sheet_name in config.WORKING_SHEETS:
+            for record in await self.get_all_records(sheet_name) or []:
+                manager_id = str(record.get(config.CAR_SHEET_COLS['manager_id'], '')).strip()
+                if manager_id.isdigit():
+                    summary[int(manager_id)] = summary.get(int(manager_id), 0) + 1
+        return summary
+
+    def cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Лічильники кешу записів (влучання, промахи, час завантаження) по аркушах."""
+        return self.record_cache.stats()
+
+    # --- Запис ---
+
+    async def add_row(self, sheet_name: str, data: Dict[str, Any], headers_order: List[str],
+                      get_row_index: bool = False, wait: bool = True) -> bool | int:
+        """
+        Додає новий рядок в аркуш. За потреби повертає номер доданого рядка.
+        З wait=False запис журналізується (True повертається лише після fsync журналу)
+        і ставиться в чергу (див. flush_writes); якщо таблиця недоступна, він буде
+        повторений з журналу.
+        """
+        try:
+            future = await self._queue_append(sheet_name, data, headers_order)
+            if future is None:
+                return False
+            if not wait and not get_row_index:
+                return await self._sync_journal(sheet_name)
+
+            await self.write_queue.flush(sheet_name)
+            row_index = await future
+            if row_index is False:
+                return False
+            return (row_index if isinstance(row_index, int) else False) if get_row_index else True
+        except Exception as e:
+            logger.error(f"Помилка при додаванні рядка в '{sheet_name}': {e}")
+            return False
+
+    async def _queue_append(self, sheet_name: str, data: Dict[str, Any],
+                            headers_order: List[str]) -> Optional[asyncio.Future]:
+        """Журналізує новий рядок і ставить його в чергу; повертає future результату або None."""
+        if not await self.get_sheet(sheet_name):
+            return None
+        row_to_add = [data.get(header, "") for header in headers_order]
+        seq = self._journal_write('append', sheet_name, None, row_to_add, headers_order, data)
+        self._bump_generation(sheet_name)
+        predicted_row = None
+        if self.replica.has_sheet(sheet_name):
+            predicted_row = self.replica.next_row_index(sheet_name)
+            self._replica_set_row(sheet_name, predicted_row, self._to_replica_record(sheet_name, row_to_add, headers_order))
+        return self.write_queue.enqueue_append(sheet_name, row_to_add, predicted_row, journal_seq=seq)
+
+    async def add_rows(self, sheet_name: str, rows: List[Dict[str, Any]], headers_order: List[str],
+                       wait: bool = True) -> bool:
+        """
+        Додає кілька рядків одним append (усі стають у чергу й скидаються одним пакетом).
+        З wait=True повертає False, якщо не записався хоча б один рядок.
+        """
+        futures = []
+        try:
+            for data in rows:
+                future = await self._queue_append(sheet_name, data, headers_order)
+                if future is None:
+                    return False
+                futures.append(future)
+            if not futures:
+                return True
+            if not wait:
+                return await self._sync_journal(sheet_name)
+            await self.write_queue.flush(sheet_name)
+            results = await asyncio.gather(*futures)
+        except Exception as e:
+            logger.error(f"Помилка при додаванні рядків в '{sheet_name}': {e}", exc_info=True)
+            return False
+        failed = sum(result is False for result in results)
+        if failed:
+            logger.error(f"Не вдалося додати {failed} з {len(futures)} рядків в '{sheet_name}'.")
+        return not failed
+
+    async def update_row(self, sheet_name: str, row_index: int, data: Dict[str, Any], headers_order: List[str],
+                         wait: bool = True) -> bool:
+        """
+        Повністю перезаписує рядок значеннями з data у порядку headers_order.
+        З wait=False запис журналізується і ставиться в чергу, а буде надісланий
+        пакетом разом з іншими; True повертається лише після fsync журналу.
+        """
+        try:
+            future = await self._queue_update(sheet_name, row_index, data, headers_order)
+            if future is None:
+                return False
+            if not wait:
+                return await self._sync_journal(sheet_name)
+
+            await self.write_queue.flush(sheet_name)
+            return bool(await future)
+        except Exception as e:
+            logger.error(f"Помилка при оновленні рядка {row_index} в '{sheet_name}': {e}", exc_info=True)
+            return False
+
+    async def _queue_update(self, sheet_name: str, row_index: int, data: Dict[str, Any],
+                            headers_order: List[str]) -> Optional[asyncio.Future]:
+        """Журналізує перезапис рядка і ставить його в чергу; повертає future результату або None."""
+        if not await self.get_sheet(sheet_name):
+            return None
+        row_values = [data.get(header, "") for header in headers_order]
+        seq = self._journal_write('update', sheet_name, row_index, row_values, headers_order, data)
+        self._bump_generation(sheet_name)
+        if self.replica.has_sheet(sheet_name):
+            self._replica_set_row(sheet_name, row_index, self._to_replica_record(sheet_name, row_values, headers_order))
+        return self.write_queue.enqueue_update(sheet_name, row_index, row_values, journal_seq=seq)
+
+    async def _sync_journal(self, sheet_name: str) -> bool:
+        """
+        Чекає, поки журнал з поставленими в чергу змінами потрапить на диск.
+        Це груповий коміт: одночасні виклики ділять один fsync.
+        """
+        try:
+            await self.journal.sync()
+            return True
+        except OSError as e:
+            logger.error(f"Не вдалося скинути журнал на диск для '{sheet_name}': {e}")
+            return False
+
+    def _journal_write(self, kind: str, sheet_name: str, row_index: Optional[int], values: List[Any],
+                       headers_order: List[str], data: Dict[str, Any]) -> int:
+        """Записує зміну в журнал до того, як вона потрапить у чергу."""
+        key_column = self.row_keys.key_column(sheet_name)
+        seq = self.journal.append({
+            "kind": kind,
+            "sheet": sheet_name,
+            "row": row_index,
+            "key": data.get(key_column, "") if key_column else "",
+            "headers": list(headers_order),
+            "values": ["" if v is None else v for v in values],
+        })
+        self._journal_inflight.add(seq)
+        return seq
+
+    def _journal_settle(self, sheet_name: str, writes: List[PendingWrite], results: List[Any]) -> None:
+        """Підтверджує в журналі записані зміни; невдалі лишаються для повтору."""
+        done = []
+        for write, result in zip(writes, results):
+            if write.journal_seq is None:
+                continue
+            self._journal_inflight.discard(write.journal_seq)
+            if result is False:
+                self._journal_attempts[write.journal_seq] = self._journal_attempts.get(write.journal_seq, 0) + 1
+                if self._journal_attempts[write.journal_seq] < JOURNAL_MAX_ATTEMPTS:
+                    continue
+                logger.error(f"Зміну журналу #{write.journal_seq} для '{sheet_name}' відкинуто після {JOURNAL_MAX_ATTEMPTS} спроб.")
+            self._journal_attempts.pop(write.journal_seq, None)
+            done.append(write.journal_seq)
+        self.journal.ack(done)
+
+    def _already_written(self, entry: Dict[str, Any]) -> bool:
+        """Чи є в репліці рядок з тим самим ключем і значеннями (додавання вже відбулося до збою)."""
+        if not entry.get("key"):
+            return False
+        for row_index in self.row_keys.rows_for(entry["sheet"], entry["key"]):
+            record = self.replica.get_row(entry["sheet"], row_index) or {}
+            if all(str(record.get(h, "")).strip() == str(v).strip() for h, v in zip(entry["headers"], entry["values"])):
+                return True
+        return False
+
+    async def replay_journal(self) -> int:
+        """
+        Повторно ставить у чергу непідтверджені зміни з журналу (після перезапуску
+        або збою API) і скидає їх пакетами. Оновлення шукають рядок за ключем,
+        тож зсув рядків між записом у журнал і повтором не страшний; оновлення,
+        ключа якого в аркуші вже немає, відкидається. Старий номер рядка
+        використовується лише для змін без ключа. Повертає кількість повторених змін.
+        """
+        entries = [e for e in self.journal.pending() if e["seq"] not in self._journal_inflight]
+        if not entries or not self.is_authorized:
+            return 0
+        appended, skipped, replayed = set(), [], 0
+        with sheets_lane(Lane.BACKGROUND):
+            for entry in entries:
+                sheet_name = entry["sheet"]
+                if not self.row_keys.has_sheet(sheet_name) and entry.get("key"):
+                    await self.get_all_records(sheet_name)
+                if entry["kind"] == 'append':
+                    if self._already_written(entry):
+                        skipped.append(entry["seq"])
+                        continue
+                    self.write_queue.enqueue_append(sheet_name, entry["values"], journal_seq=entry["seq"])
+                    appended.add(sheet_name)
+                else:
+                    row_index = entry["row"]
+                    if entry.get("key"):
+                        if not self.row_keys.has_sheet(sheet_name):
+                            # Аркуш не вдалося прочитати — повторимо наступного разу
+                            continue
+                        row_index = self.row_keys.resolve_row(sheet_name, entry["key"], row_index)
+                        if row_index is None:
+                            # Рядок з цим ключем видалено: старий номер тепер належить іншому запису
+                            logger.warning(f"Зміну журналу #{entry['seq']} для '{sheet_name}' пропущено: ключа '{entry['key']}' в аркуші вже немає.")
+                            skipped.append(entry["seq"])
+                            continue
+                    if self.replica.has_sheet(sheet_name):
+                        record = self._to_replica_record(sheet_name, entry["values"], entry["headers"])
+                        self._replica_set_row(sheet_name, row_index, record)
+                    self.write_queue.enqueue_update(sheet_name, row_index, entry["values"], journal_seq=entry["seq"])
+                self._journal_inflight.add(entry["seq"])
+                self._bump_generation(sheet_name)
+                replayed += 1
+            self.journal.ack(skipped)
+            for sheet_name in appended:
+                # Позиції повторених додавань репліка не знає — аркуш буде перечитано
+                self._replica_drop(sheet_name)
+            await self.write_queue.flush()
+        logger.info(f"З журналу повторено {replayed} змін, пропущено: {len(skipped)}.")
+        return replayed
+
+    async def flush_writes(self, sheet_name: str = None) -> None:
+        """Надсилає всі відкладені записи (усіх аркушів або одного) в Google Sheets."""
+        await self.write_queue.flush(sheet_name)
+
+    async def _flush_writes(self, sheet_name: str, writes: List[PendingWrite]) -> List[Any]:
+        """
+        Надсилає пакет відкладених записів аркуша: усі оновлення рядків одним
+        values.batchUpdate (останній запис у рядок перемагає) та всі нові
+        рядки одним append. Повертає результат для кожної операції.
+        """
+        results: List[Any] = [True] * len(writes)
+        worksheet = await self.get_sheet(sheet_name)
+        if not worksheet:
+            self._journal_settle(sheet_name, writes, [False] * len(writes))
+            return [False] * len(writes)
+        self._bump_generation(sheet_name)
+        try:
+            # Груповий коміт: зміни пакета потрапляють на диск до надсилання в таблицю
+            await self.journal.sync()
+        except OSError as e:
+            logger.error(f"Не вдалося скинути журнал на диск перед записом в '{sheet_name}': {e}")
+
+        updates: Dict[int, List[Any]] = {}
+        for write in writes:
+            if write.kind == 'update':
+                updates[write.row_index] = write.values
+        # Позначка ревізії йде в той самий запит, що й рядки, разом з новою ревізією аркуша.
+        stamp_index = self._stamp_index(sheet_name)
+        if stamp_index is not None and any(len(w.values) > stamp_index for w in writes):
+            stamp_index = None
+        revision, revision_data = self.revisions.bump(sheet_name) if stamp_index is not None else (None, [])
+        revision_data = [{**item, "range": a1_range(REVISION_SHEET, item["range"])} for item in revision_data]
+        stamp_column = _column_letter(stamp_index + 1) if stamp_index is not None else None
+        if updates:
+            data = [
+                {"range": a1_range(sheet_name, f"A{row_index}:{_column_letter(len(values))}{row_index}"), "values": [values]}
+                for row_index, values in updates.items()
+            ]
+            if stamp_column:
+                data += [
+                    {"range": a1_range(sheet_name, f"{stamp_column}{row_index}"), "values": [[revision]]}
+                    for row_index in updates
+                ]
+                data += revision_data
+                revision_data = []
+            try:
+                await self.transport.values_batch_update(data, value_input_option='USER_ENTERED')
+                logger.info(f"Оновлено {len(updates)} рядків в '{sheet_name}' одним запитом.")
+            except Exception as e:
+                logger.error(f"Помилка пакетного оновлення рядків в '{sheet_name}': {e}", exc_info=True)
+                results = [False if w.kind == 'update' else r for w, r in zip(writes, results)]
+                self._replica_drop(sheet_name)
+
+        appends = [i for i, write in enumerate(writes) if write.kind == 'append']
+        if appends:
+            try:
+                rows = [writes[i].values for i in appends]
+                if stamp_column:
+                    rows = [list(row) + [""] * (stamp_index - len(row)) + [revision] for row in rows]
+                response = await worksheet.append_rows(rows, value_input_option='USER_ENTERED')
+                match = _UPDATED_RANGE_RE.search(response.get('updates', {}).get('updatedRange', ''))
+                first_row = int(match.group(1)) if match else None
+                for offset, i in enumerate(appends):
+                    results[i] = first_row + offset if first_row else True
+                predicted_row = writes[appends[0]].row_index
+                if predicted_row is not None and predicted_row != first_row:
+                    # Репліка вгадала номер рядка неправильно — перечитаємо аркуш.
+                    self._replica_drop(sheet_name)
+                logger.info(f"Додано {len(appends)} нових рядків в аркуш '{sheet_name}'.")
+            except Exception as e:
+                logger.error(f"Помилка при додаванні рядків в '{sheet_name}': {e}", exc_info=True)
+                for i in appends:
+                    results[i] = False
+                self._replica_drop(sheet_name)
+        if revision_data:
+            try:
+                await self.transport.values_batch_update(revision_data)
+            except Exception as e:
+                logger.warning(f"Не вдалося записати ревізію аркуша '{sheet_name}': {e}")
+        self._journal_settle(sheet_name, writes, results)
+        return results
+
+    async def update_row_by_key(self, sheet_name: str, key: Any, data: Dict[str, Any], headers_order: List[str],
+                                fallback_row_index: Optional[int] = None, wait: bool = True) -> bool:
+        """
+        Перезаписує рядок, знайдений за стабільним ключем, а не за номером зі знімка,
+        тож запис не «з'їде», якщо тим часом рядки вище були видалені.
+        fallback_row_index використовується лише для записів без ключа; якщо
+        непорожнього ключа в аркуші вже немає, рядок не перезаписується.
+        """
+        if not self.row_keys.has_sheet(sheet_name):
+            await self.get_all_records(sheet_name)
+        try:
+            async with self._structure_lock(sheet_name):
+                if key in (None, ""):
+                    row_index = fallback_row_index
+                else:
+                    row_index = self.row_keys.resolve_row(sheet_name, key, fallback_row_index)
+                if row_index is None:
+                    logger.warning(f"Запис з ключем '{key}' не знайдено в '{sheet_name}'.")
+                    return False
+                # Ставимо запис у чергу під блокуванням, щоб видалення не зсунуло рядок між пошуком і записом.
+                future = await self._queue_update(sheet_name, row_index, data, headers_order)
+        except Exception as e:
+            logger.error(f"Помилка при оновленні запису з ключем '{key}' в '{sheet_name}': {e}", exc_info=True)
+            return False
+        if future is None:
+            return False
+        if not wait:
+            return await self._sync_journal(sheet_name)
+        await self.write_queue.flush(sheet_name)
+        return bool(await future)
+
+    async def update_record_by_key(self, sheet_name: str, key_column: str, key_value: Any, new_data: Dict[str, Any],
+                                   wait: bool = True) -> bool:
+        """
+        Знаходить рядок за унікальним ключем та оновлює його. Запис іде через
+        update_row_by_key: номер рядка визначається заново під блокуванням
+        структури, тож паралельне видалення рядків не зсуне запис.
+        """
+        row_info = await self.get_row_by_id(sheet_name, key_value, id_column_name=key_column)
+        if not row_info:
+            logger.warning(f"Запис з {key_column}='{key_value}' не знайдено в '{sheet_name}'.")
+            return False
+        headers = self.replica.get_headers(sheet_name) or list(row_info['record'].keys())
+        record = {**row_info['record'], **new_data}
+        # Рядок шукаємо за ключем індексу аркуша; номер зі знімка — лише для записів без нього
+        index_column = self.row_keys.key_column(sheet_name)
+        index_key = row_info['record'].get(index_column) if index_column else None
+        return await self.update_row_by_key(sheet_name, index_key, record, headers,
+                                            fallback_row_index=row_info['row_index'], wait=wait)
+
+    async def update_record(self, sheet_name: str, record: Dict[str, Any], key_col: str, wait: bool = True) -> bool:
+        """Оновлює запис, знаходячи його рядок за значенням key_col."""
+        return await self.update_record_by_key(sheet_name, key_col, record.get(key_col), record, wait=wait)
+
+    async def batch_update_cells(self, sheet_name: str, updates: List[Dict[str, Any]]) -> bool:
+        """Пакетно оновлює діапазони аркуша ([{'range': 'A5', 'values': [[...]]}, ...])."""
+        try:
+            worksheet = await self.get_sheet(sheet_name)
+            if not worksheet:
+                return False
+            await self.write_queue.flush(sheet_name)
+            self._bump_generation(sheet_name)
+            await worksheet.batch_update(updates, value_input_option='USER_ENTERED')
+
+            if self.replica.has_sheet(sheet_name):
+                headers = self.replica.get_headers(sheet_name) or []
+                for update in updates:
+                    match = _ROW_RANGE_RE.match(update['range'])
+                    if not match or not update['range'].startswith('A') or len(update['values']) != 1:
+                        # Нестандартний діапазон: перечитаємо аркуш при наступному зверненні.
+                        self._replica_drop(sheet_name)
+                        break
+                    self._replica_set_row(
+                        sheet_name, int(match.group(1)),
+                        self._to_replica_record(sheet_name, update['values'][0], headers)
+                    )
+            return True
+        except Exception as e:
+            logger.error(f"Помилка пакетного оновлення в '{sheet_name}': {e}", exc_info=True)
+            return False
+
+    async def batch_delete_rows(self, sheet_name: str, row_indices: List[int]) -> bool:
+        """
+        Видаляє кілька рядків одним запитом: сусідні рядки об'єднуються в один
+        DeleteDimension, діапазони йдуть знизу вгору, щоб індекси не зсувались.
+        """
+        if not row_indices:
+            return True
+        try:
+            worksheet = await self.get_sheet(sheet_name)
+            if not worksheet:
+                return False
+            async with self._structure_lock(sheet_name):
+                # Відкладені записи адресують рядки до видалення — надсилаємо їх першими.
+                await self.write_queue.flush(sheet_name)
+                requests = [
+                    {"deleteDimension": {"range": {
+                        "sheetId": worksheet.id, "dimension": "ROWS",
+                        "startIndex": start - 1, "endIndex": end
+                    }}}
+                    for start, end in reversed(contiguous_ranges(row_indices))
+                ]
+                self._bump_generation(sheet_name)
+                await self.transport.batch_update({"requests": requests})
+                if self.replica.has_sheet(sheet_name):
+                    self._replica_delete_rows(sheet_name, row_indices)
+            logger.info(f"Видалено {len(set(row_indices))} рядків з '{sheet_name}' ({len(requests)} діапазонів).")
+            return True
+        except Exception as e:
+            logger.error(f"Помилка пакетного видалення рядків з '{sheet_name}': {e}", exc_info=True)
+            # Невідомо, чи видалення застосувалось — перечитаємо аркуш при наступному зверненні.
+            self._replica_drop(sheet_name)
+            return False
+
+    async def delete_row(self, sheet_name: str, row_index: int) -> bool:
+        """Видаляє один рядок з аркуша."""
+        return await self.batch_delete_rows(sheet_name, [row_index])
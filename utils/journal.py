@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# utils/journal.py
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = "sheets_journal.jsonl"
+# Після скількох підтверджень журнал переписується лише з непідтвердженими записами
+JOURNAL_COMPACT_EVERY = 1000
+# Після скількох невдалих спроб запис вважається безнадійним і прибирається з журналу
+JOURNAL_MAX_ATTEMPTS = 10
+
+
+class WriteJournal:
+    """
+    Журнал попереднього запису (write-ahead log) змін для Google Sheets.
+    Кожна зміна одразу дописується в JSON-lines файл (переживає падіння
+    процесу), а на диск (fsync) журнал скидається груповим комітом — одним
+    викликом sync() на пакет записів перед надсиланням його в таблицю, в
+    окремому потоці, щоб не блокувати цикл подій. Після успішного запису в
+    таблицю в журнал додається відмітка {"ack": seq}. Непідтверджені записи
+    переживають перезапуск і повторюються при наступному старті.
+    """
+
+    def __init__(self, path: str = JOURNAL_PATH, compact_every: int = JOURNAL_COMPACT_EVERY):
+        self.path = path
+        self.compact_every = compact_every
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._next_seq = 1
+        self._acked_since_compact = 0
+        self._unsynced = False
+        self._sync_future: Optional[asyncio.Future] = None
+        self._load()
+        self._file = open(self.path, "a", encoding="utf-8")
+        if not self._pending:
+            self._truncate()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Обірваний останній рядок після аварійної зупинки
+                    logger.warning(f"Пошкоджений рядок журналу '{self.path}' пропущено.")
+                    continue
+                if "ack" in entry:
+                    self._pending.pop(entry["ack"], None)
+                else:
+                    self._pending[entry["seq"]] = entry
+                    self._next_seq = max(self._next_seq, entry["seq"] + 1)
+        if self._pending:
+            logger.info(f"У журналі '{self.path}' знайдено {len(self._pending)} непідтверджених записів.")
+
+    def _write(self, lines: Iterable[Dict[str, Any]]) -> None:
+        self._file.write("".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines))
+        self._file.flush()
+        self._unsynced = True
+
+    async def sync(self) -> None:
+        """
+        Груповий коміт: одним fsync у потоці скидає на диск усе, що дописано з
+        минулого sync(). Якщо fsync уже триває, нові записи чекають на нього і
+        потім спільно йдуть наступним fsync, а не кожен своїм.
+        """
+        while True:
+            with self._lock:
+                future = self._sync_future
+                if future is None or future.done():
+                    if not self._unsynced:
+                        break
+                    # Копія дескриптора: файл можуть закрити (компакція), поки триває fsync
+                    fd = os.dup(self._file.fileno())
+                    self._unsynced = False
+                    future = self._sync_future = asyncio.get_running_loop().run_in_executor(None, self._fsync, fd)
+            try:
+                await asyncio.shield(future)
+            except OSError:
+                # Записи так і не потрапили на диск — наступний sync() повторить fsync
+                self._unsynced = True
+                raise
+
+    @staticmethod
+    def _fsync(fd: int) -> None:
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def append(self, entry: Dict[str, Any]) -> int:
+        """Дописує зміну в журнал і повертає її порядковий номер (на диск — під час sync())."""
+        with self._lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            entry = {**entry, "seq": seq}
+            self._write([entry])
+            self._pending[seq] = entry
+            return seq
+
+    def ack(self, seqs: Iterable[int]) -> None:
+        """Позначає зміни як записані в таблицю."""
+        with self._lock:
+            seqs = [seq for seq in seqs if seq in self._pending]
+            if not seqs:
+                return
+            self._write({"ack": seq} for seq in seqs)
+            for seq in seqs:
+                del self._pending[seq]
+            self._acked_since_compact += len(seqs)
+            if not self._pending:
+                self._truncate()
+            elif self._acked_since_compact >= self.compact_every:
+                self._compact()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Непідтверджені зміни в порядку запису."""
+        with self._lock:
+            return [dict(self._pending[seq]) for seq in sorted(self._pending)]
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def _truncate(self) -> None:
+        self._file.truncate(0)
+        self._file.seek(0)
+        self._acked_since_compact = 0
+
+    def _compact(self) -> None:
+        """Переписує журнал лише з непідтвердженими змінами (атомарно через os.replace)."""
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for seq in sorted(self._pending):
+                f.write(json.dumps(self._pending[seq], ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._acked_since_compact = 0
+
+    def close(self) -> None:
+        self._file.close()
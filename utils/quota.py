@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+# utils/quota.py
+
+import asyncio
+import contextvars
+import logging
+import time
+from collections import deque
+from contextlib import contextmanager
+from enum import IntEnum
+from functools import wraps
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Google Sheets дозволяє ~60 запитів на хвилину на користувача.
+QUOTA_RATE = 1.0  # токенів за секунду
+QUOTA_BURST = 15
+QUOTA_MAX_RETRIES = 5
+
+
+class Lane(IntEnum):
+    """Смуги пріоритету: менше значення обслуговується першим."""
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+# Скільки токенів смуга має залишити в бакеті для вищих пріоритетів.
+LANE_RESERVES = {
+    Lane.INTERACTIVE: 0,
+    Lane.BACKGROUND: 3,
+    Lane.BULK: 6,
+}
+
+current_lane: contextvars.ContextVar[Lane] = contextvars.ContextVar("sheets_lane", default=Lane.INTERACTIVE)
+
+
+@contextmanager
+def sheets_lane(lane: Lane):
+    """Виконує звернення до Google Sheets всередині блоку у вказаній смузі пріоритету."""
+    token = current_lane.set(lane)
+    try:
+        yield
+    finally:
+        current_lane.reset(token)
+
+
+def in_lane(lane: Lane):
+    """Декоратор: усі звернення до Google Sheets з корутини йдуть у вказаній смузі."""
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            with sheets_lane(lane):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class QuotaGovernor:
+    """
+    Спільний token bucket для всіх викликів Google Sheets.
+    Запити чекають у черзі своєї смуги; токен завжди отримує найпріоритетніша
+    непорожня смуга, а фонові смуги допускаються лише якщо в бакеті
+    лишається резерв для інтерактивних запитів. Після 429 видача токенів
+    призупиняється на Retry-After.
+    """
+
+    def __init__(self, rate: float = QUOTA_RATE, burst: int = QUOTA_BURST,
+                 reserves: Optional[Dict[Lane, int]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.reserves = {**LANE_RESERVES, **(reserves or {})}
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._queues: Dict[Lane, Deque[asyncio.Future]] = {lane: deque() for lane in Lane}
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._granted = {lane: 0 for lane in Lane}
+        self._throttled = 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _required(self, lane: Lane) -> float:
+        # Резерв не може перевищувати розмір бакета, інакше смуга ніколи не отримає токен.
+        return min(1 + self.reserves[lane], self.burst)
+
+    def _try_grant(self, lane: Lane) -> bool:
+        self._refill()
+        if time.monotonic() < self._paused_until:
+            return False
+        if self._tokens >= self._required(lane):
+            self._tokens -= 1
+            self._granted[lane] += 1
+            return True
+        return False
+
+    def _delay(self, lane: Lane) -> float:
+        missing = self._required(lane) - self._tokens
+        return max(self._paused_until - time.monotonic(), missing / self.rate, 0.01)
+
+    async def acquire(self, lane: Optional[Lane] = None) -> None:
+        """Чекає на дозвіл виконати один запит до API."""
+        lane = current_lane.get() if lane is None else lane
+        ahead = any(self._queues[other] for other in Lane if other <= lane)
+        if not ahead and self._try_grant(lane):
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(future)
+        if not self._dispatcher or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        else:
+            # Новий запит може мати вищий пріоритет, ніж той, на який чекає диспетчер.
+            self._wakeup.set()
+        await future
+
+    async def _dispatch(self) -> None:
+        while True:
+            lane = next((lane for lane in Lane if self._queues[lane]), None)
+            if lane is None:
+                return
+            queue = self._queues[lane]
+            if queue[0].done():
+                queue.popleft()
+                continue
+            if self._try_grant(lane):
+                queue.popleft().set_result(None)
+                continue
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self._delay(lane))
+            except asyncio.TimeoutError:
+                pass
+
+    def penalize(self, retry_after: float) -> None:
+        """Призупиняє видачу токенів після відповіді 429."""
+        self._throttled += 1
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def idle(self) -> bool:
+        """Чи немає запитів, що чекають на токен."""
+        return not any(not f.done() for queue in self._queues.values() for f in queue)
+
+    def stats(self) -> Dict[str, Any]:
+        """Глибина черг та кількість виданих токенів по смугах."""
+        self._refill()
+        return {
+            "tokens": round(self._tokens, 2),
+            "paused_for": round(max(self._paused_until - time.monotonic(), 0.0), 2),
+            "throttled": self._throttled,
+            "lanes": {
+                lane.name.lower(): {
+                    "queued": sum(1 for f in self._queues[lane] if not f.done()),
+                    "granted": self._granted[lane],
+                }
+                for lane in Lane
+            },
+        }
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+# utils/records.py
+
+import datetime
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Any, ClassVar, Dict, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+SHEET_DATETIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+_PRICE_JUNK_RE = re.compile(r"[\s $,]")
+
+
+def parse_price(value: Any) -> Optional[float]:
+    """Перетворює ціну з аркуша ("15 000", "$15,000", 15000) на число."""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(_PRICE_JUNK_RE.sub("", str(value)))
+    except ValueError:
+        return None
+
+
+def format_price(value: Any, default: str = "Ціна не вказана") -> str:
+    """Форматує ціну для підпису: $15 000."""
+    price = parse_price(value)
+    if price is None:
+        return str(value) if value not in (None, "") else default
+    return f"${int(price):,}".replace(',', ' ')
+
+
+def parse_datetime(value: Any, fmt: Optional[str] = None) -> Optional[datetime.datetime]:
+    """Розбирає дату з аркуша: ISO-формат або вказаний fmt."""
+    if isinstance(value, datetime.datetime):
+        return value
+    if not value:
+        return None
+    value = str(value).strip()
+    try:
+        return datetime.datetime.strptime(value, fmt) if fmt else datetime.datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            return None
+
+
+def _sheet_number(value: Optional[float]) -> Any:
+    if value is None:
+        return ""
+    return int(value) if float(value).is_integer() else value
+
+
+class SheetRecord:
+    """
+    Базовий клас типізованих записів аркуша.
+    Ціни зберігаються як числа, дати — як datetime; колонки, для яких
+    немає поля, лежать у extra. Сирий текст розібраних комірок зберігається
+    в raw, і to_row повертає його для полів, які не змінювались, тож
+    «Договірна» чи «15 000 $» не переписуються. Об'єкти зі спільного кешу
+    не змінюються — для запису використовуйте dataclasses.replace(...).to_row().
+    """
+    __slots__ = ()
+
+    PRICE_FIELDS: ClassVar[Tuple[str, ...]] = ()
+    DATE_FIELDS: ClassVar[Tuple[str, ...]] = ()
+    DATE_FORMAT: ClassVar[Optional[str]] = None
+
+    @classmethod
+    def columns(cls) -> Dict[str, str]:
+        """Відповідність поле -> заголовок колонки."""
+        raise NotImplementedError
+
+    @classmethod
+    def _parse_field(cls, name: str, value: Any) -> Any:
+        if name in cls.PRICE_FIELDS:
+            return parse_price(value)
+        if name in cls.DATE_FIELDS:
+            return parse_datetime(value, cls.DATE_FORMAT)
+        return value
+
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]):
+        columns = cls.columns()
+        values, raw = {}, {}
+        for name, header in columns.items():
+            value = row.get(header, "")
+            if name in cls.PRICE_FIELDS or name in cls.DATE_FIELDS:
+                raw[name] = value
+            values[name] = cls._parse_field(name, value)
+        headers = set(columns.values())
+        extra = {header: value for header, value in row.items() if header not in headers}
+        return cls(**values, extra=extra or None, raw=raw or None)
+
+    def to_row(self) -> Dict[str, Any]:
+        """Повертає запис у вигляді словника заголовок -> значення для запису в аркуш."""
+        row = dict(self.extra or {})
+        for name, header in self.columns().items():
+            value = getattr(self, name)
+            if self.raw and name in self.raw and self._parse_field(name, self.raw[name]) == value:
+                # Поле не змінювалось: лишаємо комірку як є
+                value = self.raw[name]
+            elif name in self.PRICE_FIELDS:
+                value = _sheet_number(value)
+            elif name in self.DATE_FIELDS:
+                if value is None:
+                    value = ""
+                else:
+                    value = value.strftime(self.DATE_FORMAT) if self.DATE_FORMAT else value.isoformat()
+            row[header] = value
+        return row
+
+    def get(self, header: str, default: Any = None) -> Any:
+        """Значення колонки за її заголовком (для колонок без окремого поля)."""
+        if self.extra and header in self.extra:
+            return self.extra[header]
+        for name, column in self.columns().items():
+            if column == header:
+                return getattr(self, name)
+        return default
+
+
+@dataclass(slots=True)
+class PostRecord(SheetRecord):
+    """Рядок аркуша 'Опубліковані Пости' (колонки з config.POST_SHEET_COLS)."""
+    vin: Any = ""
+    model: Any = ""
+    price: Optional[float] = None
+    status: Any = ""
+    status_prefix: Any = ""
+    date: Optional[datetime.datetime] = None
+    notify_date: Any = ""
+    emp_id: Any = ""
+    chat_id: Any = ""
+    msg_id: Any = ""
+    ria_auto_id: Any = ""
+    ria_link: Any = ""
+    condition: Any = ""
+    drivetrain: Any = ""
+    fuel_type: Any = ""
+    gearbox: Any = ""
+    location: Any = ""
+    media_type: Any = ""
+    mileage: Any = ""
+    modification: Any = ""
+    photos: Any = ""
+    extra: Optional[Dict[str, Any]] = None
+    raw: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    PRICE_FIELDS: ClassVar[Tuple[str, ...]] = ("price",)
+    DATE_FIELDS: ClassVar[Tuple[str, ...]] = ("date",)
+
+    @classmethod
+    def columns(cls) -> Dict[str, str]:
+        return {name: header for name, header in config.POST_SHEET_COLS.items() if name in cls.__dataclass_fields__}
+
+
+@dataclass(slots=True)
+class RiaAdRecord(PostRecord):
+    """Рядок аркуша оголошень Auto.RIA; date — дата, коли оголошення піде в архів."""
+
+    @property
+    def expires_at(self) -> Optional[datetime.datetime]:
+        return self.date
+
+    @property
+    def link(self) -> str:
+        link = self.ria_link or ""
+        return f"https://auto.ria.com{link}" if link and not link.startswith('http') else link
+
+
+@dataclass(slots=True)
+class CarRecord(SheetRecord):
+    """Рядок робочого аркуша з авто (колонки з config.CAR_SHEET_COLS)."""
+    vin: Any = ""
+    model: Any = ""
+    modification: Any = ""
+    price: Optional[float] = None
+    manager_id: Any = ""
+    link: Any = ""
+    notes: Any = ""
+    last_update: Any = ""
+    extra: Optional[Dict[str, Any]] = None
+    raw: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    PRICE_FIELDS: ClassVar[Tuple[str, ...]] = ("price",)
+
+    @classmethod
+    def columns(cls) -> Dict[str, str]:
+        return {name: header for name, header in config.CAR_SHEET_COLS.items() if name in cls.__dataclass_fields__}
+
+
+DEAL_COLUMNS = {
+    "model": "Назва авто",
+    "vin": "ВІН-код",
+    "client": "Клієнт",
+    "source": "Джерело",
+    "total_price": "Загальна вартість",
+    "paid": "Сплачено",
+    "remainder": "Залишок",
+    "status": "Статус",
+    "tracker": "Трекер",
+    "manager_id": "ID Менеджера",
+    "payment_history": "Історія оплат",
+    "created_at": "Дата створення",
+    "channel_msg_id": "ID повідомлення в каналі",
+}
+
+
+@dataclass(slots=True)
+class DealRecord(SheetRecord):
+    """Рядок аркуша 'Оплати'."""
+    model: Any = ""
+    vin: Any = ""
+    client: Any = ""
+    source: Any = ""
+    total_price: Optional[float] = None
+    paid: Optional[float] = None
+    remainder: Optional[float] = None
+    status: Any = ""
+    tracker: Any = ""
+    manager_id: Any = ""
+    payment_history: Any = ""
+    created_at: Optional[datetime.datetime] = None
+    channel_msg_id: Any = ""
+    extra: Optional[Dict[str, Any]] = None
+    raw: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    PRICE_FIELDS: ClassVar[Tuple[str, ...]] = ("total_price", "paid", "remainder")
+    DATE_FIELDS: ClassVar[Tuple[str, ...]] = ("created_at",)
+    DATE_FORMAT: ClassVar[Optional[str]] = SHEET_DATETIME_FORMAT
+
+    @classmethod
+    def columns(cls) -> Dict[str, str]:
+        return DEAL_COLUMNS
+
+    @property
+    def balance(self) -> float:
+        """Залишок до сплати, розрахований з вартості та оплат."""
+        return (self.total_price or 0.0) - (self.paid or 0.0)
+
+
+NOTE_COLUMNS = {
+    "note_id": "ID Нотатки",
+    "manager_id": "ID Менеджера",
+    "text": "Текст нотатки",
+    "remind_at": "Час нагадування",
+    "created_at": "Дата створення",
+    "status": "Статус",
+}
+
+
+@dataclass(slots=True)
+class NoteRecord(SheetRecord):
+    """Рядок аркуша 'Нотатки'."""
+    note_id: Any = ""
+    manager_id: Any = ""
+    text: Any = ""
+    remind_at: Optional[datetime.datetime] = None
+    created_at: Optional[datetime.datetime] = None
+    status: Any = ""
+    extra: Optional[Dict[str, Any]] = None
+    raw: Optional[Dict[str, Any]] = field(default=None, repr=False, compare=False)
+
+    DATE_FIELDS: ClassVar[Tuple[str, ...]] = ("remind_at", "created_at")
+    DATE_FORMAT: ClassVar[Optional[str]] = SHEET_DATETIME_FORMAT
+
+    @classmethod
+    def columns(cls) -> Dict[str, str]:
+        return NOTE_COLUMNS
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+# utils/replica.py
+
+import json
+import logging
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_PATH = "sheets_replica.db"
+
+
+class SheetReplica:
+    """
+    Локальна SQLite-копія аркушів Google Sheets.
+    Зберігає заголовки та записи кожного аркуша з їхніми номерами рядків,
+    щоб читання не потребували звернень до API.
+    """
+
+    def __init__(self, db_path: str = REPLICA_DB_PATH):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS sheets (
+                name TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS rows (
+                sheet TEXT NOT NULL,
+                row_index INTEGER NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS rows_sheet_row ON rows (sheet, row_index);
+            CREATE TABLE IF NOT EXISTS fingerprints (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                PRIMARY KEY (scope, key)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def has_sheet(self, sheet_name: str) -> bool:
+        """Перевіряє, чи аркуш вже завантажено в репліку."""
+        cur = self.conn.execute("SELECT 1 FROM sheets WHERE name = ?", (sheet_name,))
+        return cur.fetchone() is not None
+
+    def sheet_names(self) -> List[str]:
+        """Повертає назви всіх аркушів у репліці."""
+        return [row[0] for row in self.conn.execute("SELECT name FROM sheets")]
+
+    def get_headers(self, sheet_name: str) -> Optional[List[str]]:
+        """Повертає заголовки аркуша або None, якщо аркуша немає в репліці."""
+        cur = self.conn.execute("SELECT headers FROM sheets WHERE name = ?", (sheet_name,))
+        row = cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def synced_at(self, sheet_name: str) -> Optional[float]:
+        """Час останньої повної синхронізації аркуша з Google Sheets."""
+        cur = self.conn.execute("SELECT synced_at FROM sheets WHERE name = ?", (sheet_name,))
+        row = cur.fetchone()
+        return row[0] if row else None
+
+    def replace_sheet(self, sheet_name: str, headers: List[str], records: List[Dict[str, Any]]) -> None:
+        """Повністю замінює вміст аркуша в репліці (записи йдуть з 2-го рядка)."""
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sheets (name, headers, synced_at) VALUES (?, ?, ?)",
+                (sheet_name, json.dumps(headers, ensure_ascii=False), time.time())
+            )
+            self.conn.execute("DELETE FROM rows WHERE sheet = ?", (sheet_name,))
+            self.conn.executemany(
+                "INSERT INTO rows (sheet, row_index, data) VALUES (?, ?, ?)",
+                [(sheet_name, i + 2, json.dumps(rec, ensure_ascii=False)) for i, rec in enumerate(records)]
+            )
+
+    def set_headers(self, sheet_name: str, headers: List[str]) -> None:
+        """Замінює заголовки аркуша, не чіпаючи записів."""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE sheets SET headers = ? WHERE name = ?",
+                (json.dumps(headers, ensure_ascii=False), sheet_name)
+            )
+
+    def drop_sheet(self, sheet_name: str) -> None:
+        """Видаляє аркуш з репліки, наступне читання завантажить його заново."""
+        with self.conn:
+            self.conn.execute("DELETE FROM sheets WHERE name = ?", (sheet_name,))
+            self.conn.execute("DELETE FROM rows WHERE sheet = ?", (sheet_name,))
+
+    def get_records(self, sheet_name: str) -> List[Dict[str, Any]]:
+        """Повертає всі записи аркуша у порядку рядків."""
+        cur = self.conn.execute(
+            "SELECT data FROM rows WHERE sheet = ? ORDER BY row_index", (sheet_name,)
+        )
+        return [json.loads(row[0]) for row in cur]
+
+    def get_row(self, sheet_name: str, row_index: int) -> Optional[Dict[str, Any]]:
+        """Повертає запис за номером рядка."""
+        cur = self.conn.execute(
+            "SELECT data FROM rows WHERE sheet = ? AND row_index = ?", (sheet_name, row_index)
+        )
+        row = cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_row(self, sheet_name: str, row_index: int, record: Dict[str, Any]) -> None:
+        """Записує запис у вказаний рядок, замінюючи попередній."""
+        data = json.dumps(record, ensure_ascii=False)
+        with self.conn:
+            cur = self.conn.execute(
+                "UPDATE rows SET data = ? WHERE sheet = ? AND row_index = ?", (data, sheet_name, row_index)
+            )
+            if cur.rowcount == 0:
+                self.conn.execute(
+                    "INSERT INTO rows (sheet, row_index, data) VALUES (?, ?, ?)", (sheet_name, row_index, data)
+                )
+
+    def next_row_index(self, sheet_name: str) -> int:
+        """Номер рядка, який отримає наступний доданий запис."""
+        cur = self.conn.execute("SELECT MAX(row_index) FROM rows WHERE sheet = ?", (sheet_name,))
+        last = cur.fetchone()[0]
+        return (last or 1) + 1
+
+    def delete_rows(self, sheet_name: str, row_indices: List[int]) -> None:
+        """Видаляє рядки та зсуває наступні вгору, як це робить Google Sheets."""
+        with self.conn:
+            for row_index in sorted(set(row_indices), reverse=True):
+                self.conn.execute(
+                    "DELETE FROM rows WHERE sheet = ? AND row_index = ?", (sheet_name, row_index)
+                )
+                self.conn.execute(
+                    "UPDATE rows SET row_index = row_index - 1 WHERE sheet = ? AND row_index > ?",
+                    (sheet_name, row_index)
+                )
+
+    def get_fingerprints(self, scope: str) -> Dict[str, str]:
+        """Збережені відбитки рядків ({ключ: хеш}) для області, зазвичай аркуша."""
+        cur = self.conn.execute("SELECT key, hash FROM fingerprints WHERE scope = ?", (scope,))
+        return dict(cur.fetchall())
+
+    def replace_fingerprints(self, scope: str, fingerprints: Dict[str, str]) -> None:
+        """Повністю замінює відбитки рядків області."""
+        with self.conn:
+            self.conn.execute("DELETE FROM fingerprints WHERE scope = ?", (scope,))
+            self.conn.executemany(
+                "INSERT INTO fingerprints (scope, key, hash) VALUES (?, ?, ?)",
+                [(scope, key, value) for key, value in fingerprints.items()]
+            )
+
+    def close(self) -> None:
+        self.conn.close()
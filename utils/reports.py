@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+# utils/reports.py
+
+import html
+import logging
+import re
+import secrets
+import time
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Message
+
+logger = logging.getLogger(__name__)
+
+# Telegram обмежує повідомлення 4096 символами; решта — на заголовок і запас.
+REPORT_PAGE_LIMIT = 3500
+REPORT_CACHE_SIZE = 128
+REPORT_TTL = 6 * 3600  # секунд
+REPORT_CALLBACK_PREFIX = "report"
+
+# Рядок звіту: текст або (текст, кнопка, що стосується цього рядка)
+ReportItem = Union[str, Tuple[str, InlineKeyboardButton]]
+
+_HTML_TAG_RE = re.compile(r"<[^>]+>")
+_MARKDOWN_V2_MARKUP = set("*_~|`[]()")
+
+
+def _plain_units(line: str, parse_mode: Optional[str]) -> List[str]:
+    """
+    Розбирає рядок на неподільні частини без розмітки: для HTML — символи
+    тексту (екрановані), для MarkdownV2 — символи разом з їхнім екрануванням.
+    """
+    if parse_mode == "HTML":
+        text = html.unescape(_HTML_TAG_RE.sub("", line))
+        return [html.escape(char, quote=False) for char in text]
+    if parse_mode == "MarkdownV2":
+        units, i = [], 0
+        while i < len(line):
+            if line[i] == "\\" and i + 1 < len(line):
+                units.append(line[i:i + 2])
+                i += 2
+                continue
+            if line[i] not in _MARKDOWN_V2_MARKUP:
+                units.append(line[i])
+            i += 1
+        return units
+    return list(line)
+
+
+def split_long_line(line: str, limit: int, parse_mode: Optional[str] = None) -> List[str]:
+    """
+    Ділить задовгий рядок на частини до limit символів. Розмітка такого рядка
+    відкидається: різати теги чи сутності MarkdownV2 посередині не можна.
+    """
+    if len(line) <= limit:
+        return [line]
+    chunks, current = [], ""
+    for unit in _plain_units(line, parse_mode):
+        if len(current) + len(unit) > limit:
+            chunks.append(current)
+            current = ""
+        current += unit
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class PagedReport:
+    """
+    Звіт, що видається сторінками одного повідомлення. Рядки беруться з
+    ітератора ліниво: сторінка формується, коли до неї вперше гортають
+    (плюс одна наперед, щоб знати, чи є наступна). Рядки не розриваються
+    між сторінками, тож HTML-теги та сутності MarkdownV2 лишаються цілими.
+    """
+
+    def __init__(self, items: Iterable[ReportItem], parse_mode: Optional[str] = None, header: str = "",
+                 extra_rows: Optional[Sequence[Sequence[InlineKeyboardButton]]] = None,
+                 page_limit: int = REPORT_PAGE_LIMIT, max_items: Optional[int] = None,
+                 empty_text: str = "Немає даних."):
+        self.id = secrets.token_hex(4)
+        self.parse_mode = parse_mode
+        self.header = header
+        self.extra_rows = [list(row) for row in (extra_rows or [])]
+        self.page_limit = page_limit
+        self.max_items = max_items
+        self.empty_text = empty_text
+        self.expires_at = time.monotonic() + REPORT_TTL
+        self.pages: List[Tuple[str, List[InlineKeyboardButton]]] = []
+        self.complete = False
+        self._items: Iterator[ReportItem] = iter(items)
+        self._pending: List[Tuple[str, Optional[InlineKeyboardButton]]] = []
+
+    def _next_item(self) -> Optional[Tuple[str, Optional[InlineKeyboardButton]]]:
+        if self._pending:
+            return self._pending.pop(0)
+        try:
+            item = next(self._items)
+        except StopIteration:
+            return None
+        line, button = item if isinstance(item, tuple) else (item, None)
+        limit = self.page_limit - len(self.header) - 1
+        parts = split_long_line(str(line), limit, self.parse_mode)
+        self._pending.extend((part, None) for part in parts[1:])
+        return parts[0], button
+
+    def _build_page(self) -> bool:
+        lines: List[str] = []
+        buttons: List[InlineKeyboardButton] = []
+        size = len(self.header) + 1 if self.header else 0
+        while True:
+            item = self._next_item()
+            if item is None:
+                self.complete = True
+                break
+            line, button = item
+            if lines and (size + len(line) + 1 > self.page_limit
+                          or (self.max_items and len(lines) >= self.max_items)):
+                self._pending.insert(0, item)
+                break
+            lines.append(line)
+            size += len(line) + 1
+            if button:
+                buttons.append(button)
+        if lines or not self.pages:
+            self.pages.append(("\n".join(lines), buttons))
+        return bool(lines)
+
+    def _ensure(self, page: int) -> None:
+        # Сторінка наперед потрібна, щоб знати, чи показувати кнопку «далі»
+        while len(self.pages) <= page + 1 and not self.complete:
+            self._build_page()
+
+    def render(self, page: int) -> Tuple[str, InlineKeyboardMarkup]:
+        """Текст і клавіатура сторінки page (нумерація з 0)."""
+        self._ensure(page)
+        page = max(0, min(page, len(self.pages) - 1))
+        body, buttons = self.pages[page]
+        text = "\n".join(part for part in (self.header, body or (self.empty_text if page == 0 else "")) if part)
+
+        rows = [[button] for button in buttons]
+        if len(self.pages) > 1:
+            total = f"{len(self.pages)}" if self.complete else f"{len(self.pages)}+"
+            nav = []
+            if page > 0:
+                nav.append(InlineKeyboardButton("◀️", callback_data=f"{REPORT_CALLBACK_PREFIX}:{self.id}:{page - 1}"))
+            nav.append(InlineKeyboardButton(f"{page + 1}/{total}", callback_data=f"{REPORT_CALLBACK_PREFIX}:{self.id}:{page}"))
+            if page + 1 < len(self.pages):
+                nav.append(InlineKeyboardButton("▶️", callback_data=f"{REPORT_CALLBACK_PREFIX}:{self.id}:{page + 1}"))
+            rows.append(nav)
+        rows.extend(self.extra_rows)
+        return text, InlineKeyboardMarkup(rows)
+
+
+class ReportStore:
+    """Кеш звітів за id (LRU з TTL), з якого обробник кнопок бере сторінки."""
+
+    def __init__(self, max_size: int = REPORT_CACHE_SIZE):
+        self.max_size = max_size
+        self._reports: "OrderedDict[str, PagedReport]" = OrderedDict()
+
+    def add(self, report: PagedReport) -> None:
+        self._reports[report.id] = report
+        while len(self._reports) > self.max_size:
+            self._reports.popitem(last=False)
+
+    def get(self, report_id: str) -> Optional[PagedReport]:
+        report = self._reports.get(report_id)
+        if report is None:
+            return None
+        if report.expires_at < time.monotonic():
+            del self._reports[report_id]
+            return None
+        self._reports.move_to_end(report_id)
+        return report
+
+
+report_store = ReportStore()
+
+
+async def send_report(message: Message, items: Iterable[ReportItem], parse_mode: Optional[str] = None,
+                      header: str = "", extra_rows: Optional[Sequence[Sequence[InlineKeyboardButton]]] = None,
+                      edit: bool = False, max_items: Optional[int] = None, empty_text: str = "Немає даних.") -> PagedReport:
+    """
+    Показує звіт першою сторінкою: редагує message (edit=True) або відповідає на нього.
+    Решта сторінок відкриваються кнопками ◀️/▶️ у тому ж повідомленні.
+    """
+    report = PagedReport(items, parse_mode=parse_mode, header=header, extra_rows=extra_rows,
+                         max_items=max_items, empty_text=empty_text)
+    report_store.add(report)
+    text, keyboard = report.render(0)
+    if edit:
+        await message.edit_text(text, parse_mode=parse_mode, reply_markup=keyboard)
+    else:
+        await message.reply_text(text, parse_mode=parse_mode, reply_markup=keyboard)
+    return report
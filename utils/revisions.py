@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+# utils/revisions.py
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Службовий аркуш з ревізіями: колонка A — назва аркуша, B — номер ревізії,
+# C — формула-відбиток вмісту аркуша, яку перераховує сама таблиця.
+REVISION_SHEET = "_revisions"
+# Колонка в кінці аркуша з ревізією, в якій рядок востаннє змінено.
+STAMP_COLUMN = "_rev"
+
+
+def _to_int(value: Any) -> int:
+    try:
+        return int(str(value).strip())
+    except (TypeError, ValueError):
+        return 0
+
+
+class RevisionTracker:
+    """
+    Ревізії аркушів для дельта-читання. Кожен пакет записів бота збільшує
+    ревізію аркуша та проставляє її в колонку STAMP_COLUMN змінених рядків,
+    тож фонове оновлення може завантажити лише рядки з новішою позначкою.
+    Ручні правки позначок не ставлять, тож для кожного аркуша в REVISION_SHEET
+    є ще й відбиток вмісту (fingerprint_formula): якщо він змінився, а бот у
+    аркуш не писав і ревізія та сама, — аркуш правили вручну.
+    """
+
+    def __init__(self):
+        # Ревізія, до якої репліка вже актуальна
+        self.seen: Dict[str, int] = {}
+        # Останні прочитані ревізії з таблиці
+        self.remote: Dict[str, int] = {}
+        # Відбитки вмісту: останні прочитані та ті, яким відповідає репліка
+        self.fingerprints: Dict[str, str] = {}
+        self.seen_fingerprints: Dict[str, str] = {}
+        # Номер рядка аркуша в REVISION_SHEET
+        self._meta_rows: Dict[str, int] = {}
+
+    def load(self, values: List[List[Any]]) -> Dict[str, int]:
+        """Розбирає вміст REVISION_SHEET і повертає {аркуш: ревізія}."""
+        self.remote = {}
+        self.fingerprints = {}
+        for row_index, row in enumerate(values, start=1):
+            if row and str(row[0]).strip():
+                name = str(row[0]).strip()
+                self._meta_rows[name] = row_index
+                self.remote[name] = _to_int(row[1] if len(row) > 1 else 0)
+                if len(row) > 2 and str(row[2]).strip():
+                    self.fingerprints[name] = str(row[2]).strip()
+        return self.remote
+
+    def fingerprint_rows(self, sheet_ranges: Dict[str, str]) -> List[Dict[str, Any]]:
+        """
+        Оновлення клітинок REVISION_SHEET (діапазони без назви аркуша), що додають
+        формулу-відбиток аркушам {назва: A1-діапазон аркуша}, у яких її ще немає.
+        """
+        data = []
+        for name, sheet_range in sheet_ranges.items():
+            if name in self.fingerprints:
+                continue
+            row = self._meta_rows.get(name)
+            if row is None:
+                row = max(self._meta_rows.values(), default=0) + 1
+                self._meta_rows[name] = row
+                data.append({"range": f"A{row}:C{row}",
+                             "values": [[name, self.remote.get(name, 0), fingerprint_formula(sheet_range)]]})
+            else:
+                data.append({"range": f"C{row}", "values": [[fingerprint_formula(sheet_range)]]})
+        return data
+
+    def fingerprint_changed(self, sheet_name: str) -> bool:
+        """Чи змінився вміст аркуша з часу, якому відповідає репліка."""
+        seen = self.seen_fingerprints.get(sheet_name)
+        return seen is not None and self.fingerprints.get(sheet_name, seen) != seen
+
+    def accept_fingerprint(self, sheet_name: str) -> None:
+        """Фіксує поточний відбиток як такий, що вже є в репліці."""
+        if sheet_name in self.fingerprints:
+            self.seen_fingerprints[sheet_name] = self.fingerprints[sheet_name]
+
+    def bump(self, sheet_name: str) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Видає нову ревізію аркуша. Повертає її та оновлення клітинок
+        REVISION_SHEET (діапазони без назви аркуша).
+        """
+        revision = max(self.seen.get(sheet_name, 0), self.remote.get(sheet_name, 0)) + 1
+        self.seen[sheet_name] = revision
+        self.remote[sheet_name] = revision
+        row = self._meta_rows.get(sheet_name)
+        if row is None:
+            row = max(self._meta_rows.values(), default=0) + 1
+            self._meta_rows[sheet_name] = row
+        return revision, [{"range": f"A{row}:B{row}", "values": [[sheet_name, revision]]}]
+
+    def changed(self, sheet_name: str) -> bool:
+        return self.remote.get(sheet_name, 0) != self.seen.get(sheet_name, 0)
+
+    @staticmethod
+    def changed_rows(stamps: List[Any], since: int) -> List[int]:
+        """Номери рядків (з 2-го), позначка яких новіша за since; stamps — колонка з заголовком."""
+        return [row_index for row_index, stamp in enumerate(stamps[1:], start=2) if _to_int(stamp) > since]
+
+    @staticmethod
+    def coalesce(rows: List[int]) -> List[Tuple[int, int]]:
+        """Об'єднує номери рядків у суцільні діапазони [(перший, останній), ...]."""
+        spans: List[Tuple[int, int]] = []
+        for row in sorted(set(rows)):
+            if spans and row == spans[-1][1] + 1:
+                spans[-1] = (spans[-1][0], row)
+            else:
+                spans.append((row, row))
+        return spans
+
+
+def fingerprint_formula(sheet_range: str) -> str:
+    """
+    Формула відбитка вмісту діапазону: довжини всіх клітинок, зважені їхніми
+    рядком і колонкою, плюс сума чисел. Змінюється майже від будь-якої правки;
+    рідкісні збіги закриває періодичне повне оновлення.
+    """
+    return f"=SUMPRODUCT(LEN({sheet_range})*(ROW({sheet_range})*64+COLUMN({sheet_range})))+SUM({sheet_range})"
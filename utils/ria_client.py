@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# utils/ria_client.py
+
+import asyncio
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+import httpx
+
+from .quota import Lane, QuotaGovernor, current_lane
+
+logger = logging.getLogger(__name__)
+
+RIA_TIMEOUT = httpx.Timeout(15.0, connect=5.0)
+RIA_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=30.0)
+RIA_CACHE_TTL = 120.0  # секунд
+RIA_CACHE_SIZE = 512
+# Помилки мережі, тайм-аути, неуспішні статуси (raise_for_status) та некоректний JSON
+RIA_HTTP_ERRORS = (httpx.HTTPError, ValueError)
+
+# Ліміт API Auto.RIA: стартова швидкість близька до старого інтервалу 1.2 с,
+# далі вона підлаштовується під відповіді 429 та заголовки X-RateLimit-*.
+RIA_RATE = 0.8  # токенів за секунду
+RIA_MIN_RATE = 0.05
+RIA_MAX_RATE = 2.0
+RIA_RATE_STEP = 0.02  # приріст швидкості після кожної успішної відповіді
+RIA_BACKOFF_FACTOR = 0.5  # у скільки разів зменшується швидкість після 429
+RIA_BURST = 5
+RIA_RESERVES = {Lane.BACKGROUND: 1, Lane.BULK: 2}
+RIA_MAX_RETRIES = 4
+RIA_RETRY_BASE = 2.0  # секунд, база експоненційної паузи без Retry-After
+# Інтерактивний запит не чекає довше — користувач одразу отримує повідомлення,
+# а фонові задачі чекають скільки потрібно.
+RIA_INTERACTIVE_MAX_WAIT = 20.0
+
+
+def _header_number(response: httpx.Response, *names: str) -> Optional[float]:
+    for name in names:
+        value = response.headers.get(name)
+        if value is None:
+            continue
+        try:
+            return float(value)
+        except ValueError:
+            continue
+    return None
+
+
+class RiaRateLimiter(QuotaGovernor):
+    """
+    Спільний для процесу token bucket запитів до Auto.RIA з тими ж смугами
+    пріоритету, що й квота Google Sheets: інтерактивні запити менеджерів
+    обслуговуються раніше за фонові та пакетні задачі. Швидкість адаптивна:
+    після 429 вона зменшується вдвічі (з паузою на Retry-After), після
+    кожної успішної відповіді поступово зростає, а залишок з
+    X-RateLimit-Remaining обмежує кількість токенів у бакеті.
+    """
+
+    def __init__(self, rate: float = RIA_RATE, burst: int = RIA_BURST,
+                 min_rate: float = RIA_MIN_RATE, max_rate: float = RIA_MAX_RATE):
+        super().__init__(rate=rate, burst=burst, reserves=RIA_RESERVES)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+
+    def observe(self, response: httpx.Response) -> Optional[float]:
+        """
+        Оновлює швидкість за відповіддю API. Для 429 повертає паузу перед
+        повтором (Retry-After або експоненційна), інакше None.
+        """
+        self._refill()
+        remaining = _header_number(response, "X-RateLimit-Remaining", "X-RateLimit-Remaining-Hour")
+        if remaining is not None:
+            self._tokens = min(self._tokens, max(remaining, 0.0))
+
+        if response.status_code != 429:
+            self.rate = min(self.max_rate, self.rate + RIA_RATE_STEP)
+            return None
+
+        retry_after = _header_number(response, "Retry-After")
+        if retry_after is None:
+            retry_after = 1 / self.rate
+        self.rate = max(self.min_rate, self.rate * RIA_BACKOFF_FACTOR)
+        self.penalize(retry_after)
+        logger.warning(f"Auto.RIA повернув 429: швидкість знижено до {self.rate:.2f} запит/с, пауза {retry_after:.0f} с.")
+        return retry_after
+
+    def stats(self) -> Dict[str, Any]:
+        return {**super().stats(), "rate": round(self.rate, 3)}
+
+
+ria_limiter = RiaRateLimiter()
+
+
+class RiaClient:
+    """
+    Асинхронний клієнт API Auto.RIA: один httpx.AsyncClient з пулом
+    keep-alive з'єднань і тайм-аутами на з'єднання та читання, тож запит
+    до RIA не блокує обробку оновлень інших користувачів.
+    """
+
+    def __init__(self, timeout: httpx.Timeout = RIA_TIMEOUT, limits: httpx.Limits = RIA_LIMITS,
+                 limiter: Optional[RiaRateLimiter] = None, max_retries: int = RIA_MAX_RETRIES):
+        self.timeout = timeout
+        self.limits = limits
+        self.limiter = limiter or ria_limiter
+        self.max_retries = max_retries
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Клієнт створюється ліниво, всередині робочого циклу подій.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=self.timeout, limits=self.limits)
+        return self._client
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """
+        GET через спільний лімітер у смузі поточної задачі. Відповідь 429
+        повторюється з випадковим розкидом паузи; якщо спроби вичерпано або
+        інтерактивному запиту довелося б чекати надто довго, повертається
+        сама відповідь 429.
+        """
+        lane = current_lane.get()
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(lane)
+            response = await self.client.get(url, **kwargs)
+            retry_after = self.limiter.observe(response)
+            if retry_after is None or attempt == self.max_retries:
+                return response
+            # Retry-After може бути меншим за експоненційну паузу після кількох невдач поспіль
+            wait = max(retry_after, RIA_RETRY_BASE * 2 ** attempt)
+            wait = random.uniform(wait, wait * 1.5)
+            if lane == Lane.INTERACTIVE and wait > RIA_INTERACTIVE_MAX_WAIT:
+                return response
+            logger.info(f"Auto.RIA: повтор {attempt + 1}/{self.max_retries} через {wait:.1f} с.")
+            await asyncio.sleep(wait)
+        return response
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+ria_client = RiaClient()
+
+
+class RiaResponseCache:
+    """
+    TTL-кеш відповідей Auto.RIA з обмеженням розміру (LRU). Одночасні
+    запити одного ключа чекають на один HTTP-виклик. Порожні відповіді
+    (404, помилки) не кешуються.
+    """
+
+    def __init__(self, ttl: float = RIA_CACHE_TTL, max_size: int = RIA_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+
+    def invalidate(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if value is None:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def get_or_fetch(self, key: Hashable, fetch: Callable[[], Awaitable[Any]], fresh: bool = False) -> Any:
+        """
+        Повертає відповідь з кешу або виконує fetch(). fresh=True обходить
+        кеш (наприклад, перевірка дати після продовження), але свіжа
+        відповідь все одно потрапляє в кеш.
+        """
+        if not fresh:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            inflight = self._inflight.get(key)
+            if inflight:
+                self.coalesced += 1
+                return await asyncio.shield(inflight)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        if not fresh:
+            self._inflight[key] = future
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Виняток передано очікувачам; позначаємо його отриманим, щоб не було попередження
+            future.exception()
+            raise
+        else:
+            self._store(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "coalesced": self.coalesced, "size": len(self._entries)}
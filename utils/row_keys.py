@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# utils/row_keys.py
+
+import logging
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_key(value: Any) -> str:
+    """Приводить значення ключа до рядка для порівняння (123 і "123" — один ключ)."""
+    return str(value if value is not None else "").strip()
+
+
+class RowKeyIndex:
+    """
+    Стабільна ідентичність рядків: ключ запису (VIN, ID нотатки, ID RIA) ->
+    поточні номери рядків у кожному аркуші. Після вставки чи видалення рядків
+    індекс оновлюється разом з реплікою, тож номер рядка можна отримати за
+    ключем у будь-який момент без перечитування аркуша.
+    """
+
+    def __init__(self, key_columns: Optional[Dict[str, str]] = None):
+        # sheet_name -> назва колонки-ключа
+        self.key_columns: Dict[str, str] = dict(key_columns or {})
+        # key -> {sheet_name: {row_index, ...}}
+        self._by_key: Dict[str, Dict[str, Set[int]]] = {}
+        # sheet_name -> {row_index: (key, record)}
+        self._rows: Dict[str, Dict[int, Tuple[str, Dict[str, Any]]]] = {}
+
+    def _record_key(self, sheet_name: str, record: Dict[str, Any]) -> str:
+        column = self.key_columns.get(sheet_name)
+        return normalize_key(record.get(column)) if column else ""
+
+    def _normalize(self, key: Any) -> str:
+        return normalize_key(key)
+
+    def key_column(self, sheet_name: str) -> Optional[str]:
+        return self.key_columns.get(sheet_name)
+
+    def has_sheet(self, sheet_name: str) -> bool:
+        return sheet_name in self._rows
+
+    def build_sheet(self, sheet_name: str, records: List[Dict[str, Any]]) -> None:
+        """Перебудовує індекс аркуша з повного списку записів (рядки з 2-го)."""
+        self.drop_sheet(sheet_name)
+        self._rows[sheet_name] = {}
+        for i, record in enumerate(records):
+            self._add(sheet_name, i + 2, record)
+
+    def drop_sheet(self, sheet_name: str) -> None:
+        """Прибирає з індексу всі записи аркуша."""
+        for row_index in list(self._rows.get(sheet_name, {})):
+            self._remove(sheet_name, row_index)
+        self._rows.pop(sheet_name, None)
+
+    def _add(self, sheet_name: str, row_index: int, record: Dict[str, Any]) -> None:
+        key = self._record_key(sheet_name, record)
+        if key:
+            self._rows[sheet_name][row_index] = (key, record)
+            self._by_key.setdefault(key, {}).setdefault(sheet_name, set()).add(row_index)
+
+    def _remove(self, sheet_name: str, row_index: int) -> None:
+        entry = self._rows.get(sheet_name, {}).pop(row_index, None)
+        if not entry:
+            return
+        sheets = self._by_key[entry[0]]
+        sheets[sheet_name].discard(row_index)
+        if not sheets[sheet_name]:
+            del sheets[sheet_name]
+            if not sheets:
+                del self._by_key[entry[0]]
+
+    def set_row(self, sheet_name: str, row_index: int, record: Dict[str, Any]) -> None:
+        """Оновлює індекс після додавання або перезапису рядка."""
+        self._rows.setdefault(sheet_name, {})
+        self._remove(sheet_name, row_index)
+        self._add(sheet_name, row_index, record)
+
+    def delete_rows(self, sheet_name: str, row_indices: Iterable[int]) -> None:
+        """Прибирає видалені рядки та зсуває номери наступних, як у Google Sheets."""
+        if sheet_name not in self._rows:
+            return
+        deleted = sorted(set(row_indices))
+        for row_index in deleted:
+            self._remove(sheet_name, row_index)
+        if not deleted:
+            return
+
+        remaining = sorted(self._rows[sheet_name].items())
+        for row_index, _ in remaining:
+            if row_index > deleted[0]:
+                self._remove(sheet_name, row_index)
+        for row_index, (_, record) in remaining:
+            if row_index > deleted[0]:
+                self._add(sheet_name, row_index - bisect_left(deleted, row_index), record)
+
+    def rows_for(self, sheet_name: str, key: Any) -> List[int]:
+        """Усі поточні рядки аркуша з цим ключем (за зростанням)."""
+        return sorted(self._by_key.get(self._normalize(key), {}).get(sheet_name, ()))
+
+    def resolve_row(self, sheet_name: str, key: Any, hint: Optional[int] = None) -> Optional[int]:
+        """
+        Поточний номер рядка для ключа. Якщо ключ повторюється, перевага
+        надається рядку-підказці (номеру, з яким працював викликач).
+        """
+        rows = self.rows_for(sheet_name, key)
+        if not rows:
+            return None
+        return hint if hint in rows else rows[0]
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# utils/sheet_cache.py
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_TTL = 30.0  # секунд
+
+Loader = Callable[[], Awaitable[Optional[List[Dict[str, Any]]]]]
+
+
+@dataclass
+class SheetCacheStats:
+    """Лічильники кешу для одного аркуша."""
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    loads: int = 0
+    load_time_total: float = 0.0
+    load_time_max: float = 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        avg = self.load_time_total / self.loads if self.loads else 0.0
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "avg_load_ms": round(avg * 1000, 2),
+            "max_load_ms": round(self.load_time_max * 1000, 2),
+        }
+
+
+@dataclass
+class _Entry:
+    records: List[Dict[str, Any]]
+    expires_at: float
+    derived: Dict[Any, Any] = field(default_factory=dict)
+
+
+class RecordCache:
+    """
+    TTL-кеш записів аркушів. Одночасні промахи по одному аркушу
+    об'єднуються в одне завантаження, запис в аркуш скидає його кеш.
+    """
+
+    def __init__(self, default_ttl: float = DEFAULT_CACHE_TTL, ttls: Optional[Dict[str, float]] = None):
+        self.default_ttl = default_ttl
+        self.ttls: Dict[str, float] = dict(ttls or {})
+        self._entries: Dict[str, _Entry] = {}
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._versions: Dict[str, int] = {}
+        self._stats: Dict[str, SheetCacheStats] = {}
+
+    def ttl_for(self, sheet_name: str) -> float:
+        return self.ttls.get(sheet_name, self.default_ttl)
+
+    def set_ttl(self, sheet_name: str, ttl: float) -> None:
+        """Змінює TTL аркуша (0 вимикає кешування)."""
+        self.ttls[sheet_name] = ttl
+        self._entries.pop(sheet_name, None)
+
+    def invalidate(self, sheet_name: str) -> None:
+        """Скидає кеш аркуша; завантаження, що вже йде, не збереже застарілий результат."""
+        self._entries.pop(sheet_name, None)
+        self._versions[sheet_name] = self._versions.get(sheet_name, 0) + 1
+
+    def invalidate_all(self) -> None:
+        for sheet_name in list(self._entries):
+            self.invalidate(sheet_name)
+
+    async def get_or_load(self, sheet_name: str, loader: Loader) -> Optional[List[Dict[str, Any]]]:
+        """Повертає копію записів з кешу або завантажує їх через loader."""
+        records, _ = await self._get(sheet_name, loader)
+        return [dict(rec) for rec in records] if records is not None else None
+
+    async def get_or_derive(self, sheet_name: str, key: Any, loader: Loader,
+                            build: Callable[[List[Dict[str, Any]]], Any]) -> Any:
+        """
+        Повертає похідне представлення записів аркуша (наприклад, типізовані записи),
+        побудоване один раз на кожну версію кешу. Результат спільний — не змінюйте його.
+        """
+        records, entry = await self._get(sheet_name, loader)
+        if records is None:
+            return None
+        if entry is None:
+            return build(records)
+        if key not in entry.derived:
+            entry.derived[key] = build(records)
+        return entry.derived[key]
+
+    async def _get(self, sheet_name: str, loader: Loader) -> Tuple[Optional[List[Dict[str, Any]]], Optional[_Entry]]:
+        stats = self._stats.setdefault(sheet_name, SheetCacheStats())
+        entry = self._entries.get(sheet_name)
+        if entry and entry.expires_at > time.monotonic():
+            stats.hits += 1
+            return entry.records, entry
+
+        stats.misses += 1
+        inflight = self._inflight.get(sheet_name)
+        if inflight:
+            stats.coalesced += 1
+            records = await asyncio.shield(inflight)
+            return records, self._entries.get(sheet_name)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[sheet_name] = future
+        version = self._versions.get(sheet_name, 0)
+        started = time.perf_counter()
+        try:
+            records = await loader()
+        except Exception as e:
+            future.set_exception(e)
+            # Запобігаємо попередженню "exception was never retrieved", якщо ніхто не чекав.
+            future.exception()
+            raise
+        else:
+            future.set_result(records)
+        finally:
+            self._inflight.pop(sheet_name, None)
+            elapsed = time.perf_counter() - started
+            stats.loads += 1
+            stats.load_time_total += elapsed
+            stats.load_time_max = max(stats.load_time_max, elapsed)
+
+        ttl = self.ttl_for(sheet_name)
+        if records is not None and ttl > 0 and self._versions.get(sheet_name, 0) == version:
+            entry = _Entry(records, time.monotonic() + ttl)
+            self._entries[sheet_name] = entry
+            return records, entry
+        return records, None
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Статистика влучань/промахів та часу завантаження по аркушах."""
+        return {sheet_name: s.as_dict() for sheet_name, s in self._stats.items()}
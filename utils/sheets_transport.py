@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+# utils/sheets_transport.py
+
+import abc
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional
+from urllib.parse import quote
+
+import httpx
+from google.auth.transport.requests import Request as GoogleAuthRequest
+from google.oauth2.service_account import Credentials
+
+from .quota import QuotaGovernor, QUOTA_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
+SHEETS_SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive",
+]
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+HTTP_LIMITS = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+
+
+class SheetsAPIError(Exception):
+    """Помилка відповіді Google Sheets API."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+def a1_range(title: str, cells: Optional[str] = None) -> str:
+    """Формує A1-діапазон з назвою аркуша ('Аркуш'!A1:B2)."""
+    quoted = "'" + title.replace("'", "''") + "'"
+    return f"{quoted}!{cells}" if cells else quoted
+
+
+class SheetsBackend(abc.ABC):
+    """
+    Сховище, з яким працює GoogleSheetManager: методи Google Sheets API
+    поверх одного request(). Підкласи реалізують лише _send (фактичну
+    доставку запиту); квота, повтори на 429/5xx та розбір відповідей
+    спільні, тож будь-який бекенд поводиться однаково.
+    """
+
+    def __init__(self, quota: Optional[QuotaGovernor] = None):
+        self.quota = quota or QuotaGovernor()
+
+    @abc.abstractmethod
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Надсилає один запит (path відносно таблиці) і повертає відповідь."""
+
+    async def request(self, method: str, path: str, **kwargs) -> Dict[str, Any]:
+        """Виконує запит до API з урахуванням квоти та повторами на 429/5xx."""
+        for attempt in range(QUOTA_MAX_RETRIES + 1):
+            await self.quota.acquire()
+            try:
+                response = await self._send(method, path, **kwargs)
+            except httpx.TransportError as e:
+                if attempt == QUOTA_MAX_RETRIES:
+                    raise
+                logger.warning(f"Мережева помилка Google Sheets ({e}), повтор (спроба {attempt + 1}).")
+                await asyncio.sleep(min(2 ** attempt, 30))
+                continue
+
+            if response.status_code < 400:
+                return response.json() if response.content else {}
+
+            retry_after = response.headers.get("Retry-After", "")
+            delay = float(retry_after) if retry_after.isdigit() else min(2 ** attempt, 64)
+            if response.status_code == 429 and attempt < QUOTA_MAX_RETRIES:
+                self.quota.penalize(delay)
+                logger.warning(f"Квоту Google Sheets вичерпано, повтор через {delay} с (спроба {attempt + 1}).")
+                continue
+            if response.status_code >= 500 and attempt < QUOTA_MAX_RETRIES:
+                logger.warning(f"Google Sheets повернув {response.status_code}, повтор через {delay} с.")
+                await asyncio.sleep(delay)
+                continue
+            raise SheetsAPIError(response.status_code, response.text, float(retry_after) if retry_after.isdigit() else None)
+
+    # --- Методи API ---
+
+    async def get_metadata(self) -> Dict[str, int]:
+        """Повертає {назва аркуша: sheetId}."""
+        data = await self.request("GET", "", params={"fields": "sheets.properties(sheetId,title)"})
+        return {s["properties"]["title"]: s["properties"]["sheetId"] for s in data.get("sheets", [])}
+
+    async def values_get(self, a1_range: str) -> List[List[Any]]:
+        data = await self.request("GET", f"/values/{quote(a1_range, safe='')}")
+        return data.get("values", [])
+
+    async def values_batch_get(self, ranges: List[str]) -> Dict[str, Any]:
+        return await self.request("GET", "/values:batchGet", params=[("ranges", r) for r in ranges])
+
+    async def values_update(self, a1_range: str, values: List[List[Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        return await self.request(
+            "PUT", f"/values/{quote(a1_range, safe='')}",
+            params={"valueInputOption": value_input_option}, json={"values": values}
+        )
+
+    async def values_batch_update(self, data: List[Dict[str, Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        return await self.request(
+            "POST", "/values:batchUpdate", json={"valueInputOption": value_input_option, "data": data}
+        )
+
+    async def values_append(self, a1_range: str, values: List[List[Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        return await self.request(
+            "POST", f"/values/{quote(a1_range, safe='')}:append",
+            params={"valueInputOption": value_input_option, "insertDataOption": "INSERT_ROWS"},
+            json={"values": values}
+        )
+
+    async def batch_update(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.request("POST", ":batchUpdate", json=body)
+
+    async def close(self) -> None:
+        pass
+
+
+class SheetsTransport(SheetsBackend):
+    """
+    Асинхронний клієнт Google Sheets API поверх одного httpx.AsyncClient
+    з пулом keep-alive з'єднань. Кожен запит проходить через QuotaGovernor,
+    відповіді 429/5xx повторюються з паузою.
+    """
+
+    def __init__(self, credentials_path: str, spreadsheet_key: str, quota: Optional[QuotaGovernor] = None):
+        super().__init__(quota)
+        self.credentials = Credentials.from_service_account_file(credentials_path, scopes=SHEETS_SCOPES)
+        self.spreadsheet_key = spreadsheet_key
+        # base_url httpx не підходить: він додає "/" перед ":batchUpdate".
+        self.url = f"{SHEETS_API_URL}/{spreadsheet_key}"
+        self.client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+        self._token_lock = asyncio.Lock()
+
+    async def _auth_header(self) -> Dict[str, str]:
+        async with self._token_lock:
+            if not self.credentials.valid:
+                loop = asyncio.get_running_loop()
+                await loop.run_in_executor(None, self.credentials.refresh, GoogleAuthRequest())
+        return {"Authorization": f"Bearer {self.credentials.token}"}
+
+    async def _send(self, method: str, path: str, **kwargs) -> httpx.Response:
+        return await self.client.request(method, self.url + path, headers=await self._auth_header(), **kwargs)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class AsyncWorksheet:
+    """Асинхронний аналог gspread.Worksheet для одного аркуша."""
+
+    def __init__(self, transport: SheetsBackend, title: str, sheet_id: int):
+        self.transport = transport
+        self.title = title
+        self.id = sheet_id
+
+    async def get_all_values(self) -> List[List[str]]:
+        """Усі значення аркуша; рядки доповнюються до однакової ширини, як у gspread."""
+        values = await self.transport.values_get(a1_range(self.title))
+        width = max((len(row) for row in values), default=0)
+        return [list(row) + [""] * (width - len(row)) for row in values]
+
+    async def row_values(self, row: int) -> List[str]:
+        values = await self.transport.values_get(a1_range(self.title, f"{row}:{row}"))
+        return values[0] if values else []
+
+    async def update(self, range_name: str, values: List[List[Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        return await self.transport.values_update(a1_range(self.title, range_name), values, value_input_option)
+
+    async def batch_update(self, data: List[Dict[str, Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        data = [{**item, "range": a1_range(self.title, item["range"])} for item in data]
+        return await self.transport.values_batch_update(data, value_input_option)
+
+    async def append_rows(self, values: List[List[Any]], value_input_option: str = "RAW") -> Dict[str, Any]:
+        return await self.transport.values_append(a1_range(self.title), values, value_input_option)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+# utils/vin_index.py
+
+import logging
+from typing import Any, Dict, Iterable, Optional
+
+from .row_keys import RowKeyIndex
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_vin(value: Any) -> str:
+    """Приводить VIN до єдиного вигляду для порівняння."""
+    return str(value or "").strip().upper()
+
+
+class VinIndex(RowKeyIndex):
+    """
+    Індекс VIN -> (аркуш, номер рядка, запис) по всіх аркушах таблиці.
+    Пошук за повним VIN виконується за O(1) для будь-якого набору аркушів.
+    """
+
+    def __init__(self, vin_columns: Iterable[str]):
+        super().__init__()
+        self.vin_columns = tuple(dict.fromkeys(vin_columns))
+
+    def _record_key(self, sheet_name: str, record: Dict[str, Any]) -> str:
+        for column in self.vin_columns:
+            vin = normalize_vin(record.get(column))
+            if vin:
+                return vin
+        return ""
+
+    def _normalize(self, key: Any) -> str:
+        return normalize_vin(key)
+
+    def lookup(self, vin: str, sheet_names: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Шукає повний VIN в аркушах у вказаному порядку пріоритету (перший рядок аркуша)."""
+        sheets = self._by_key.get(normalize_vin(vin))
+        if not sheets:
+            return None
+        for sheet_name in sheet_names:
+            if sheet_name in sheets:
+                row_index = min(sheets[sheet_name])
+                record = self._rows[sheet_name][row_index][1]
+                return {"record": dict(record), "row_index": row_index, "sheet_name": sheet_name}
+        return None
+
+    def lookup_suffix(self, suffix: str, sheet_names: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """Шукає VIN, що закінчується на suffix (для пошуку за останніми цифрами)."""
+        suffix = normalize_vin(suffix)
+        for sheet_name in sheet_names:
+            for row_index, (vin, record) in sorted(self._rows.get(sheet_name, {}).items()):
+                if vin.endswith(suffix):
+                    return {"record": dict(record), "row_index": row_index, "sheet_name": sheet_name}
+        return None
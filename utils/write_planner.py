@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# utils/write_planner.py
+
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def contiguous_ranges(row_indices: Iterable[int]) -> List[Tuple[int, int]]:
+    """Об'єднує номери рядків у суцільні діапазони [(перший, останній), ...] за зростанням."""
+    spans: List[Tuple[int, int]] = []
+    for row in sorted(set(row_indices)):
+        if spans and row == spans[-1][1] + 1:
+            spans[-1] = (spans[-1][0], row)
+        else:
+            spans.append((row, row))
+    return spans
+
+
+def _shifted_cells(ranges: List[Tuple[int, int]], last_row: int, width: int) -> int:
+    """Скільки клітинок зсувається вгору, якщо видаляти діапазони знизу вгору."""
+    moved = 0
+    removed = 0
+    for start, end in sorted(ranges, reverse=True):
+        moved += max(last_row - removed - end, 0) * width
+        removed += end - start + 1
+    return moved
+
+
+@dataclass
+class WritePlan:
+    """
+    План записів в один аркуш: оновлення рядків на місці (включно з
+    переписаними рядками, що мали бути видалені), один append нових рядків
+    та видалення суцільними діапазонами знизу вгору.
+    """
+    sheet_name: str
+    updates: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    appends: List[Dict[str, Any]] = field(default_factory=list)
+    delete_ranges: List[Tuple[int, int]] = field(default_factory=list)
+    rewritten: int = 0
+    naive_calls: int = 0
+    planned_calls: int = 0
+    naive_cells: int = 0
+    planned_cells: int = 0
+
+    @property
+    def delete_rows(self) -> List[int]:
+        return [row for start, end in self.delete_ranges for row in range(start, end + 1)]
+
+    @property
+    def saved_calls(self) -> int:
+        return self.naive_calls - self.planned_calls
+
+    @property
+    def saved_cells(self) -> int:
+        return self.naive_cells - self.planned_cells
+
+    def summary(self) -> str:
+        return (
+            f"'{self.sheet_name}': {len(self.updates)} оновлень ({self.rewritten} замість видалення), "
+            f"{len(self.appends)} нових, {len(self.delete_ranges)} діапазонів видалення; "
+            f"зекономлено {self.saved_calls} запитів і {self.saved_cells} клітинок."
+        )
+
+
+def plan_sheet_writes(sheet_name: str, row_count: int, width: int,
+                      updates: Dict[int, Dict[str, Any]], appends: List[Dict[str, Any]],
+                      deletes: Iterable[int]) -> WritePlan:
+    """
+    Складає план записів для аркуша з row_count рядками (включно з заголовком)
+    і шириною width колонок. Нові рядки спершу займають місце рядків, що мали
+    бути видалені (переписування на місці замість видалення та append), —
+    найменші діапазони першими, бо кожен повністю зайнятий діапазон знімає
+    цілий запит DeleteDimension. Решта видалень об'єднується в суцільні
+    діапазони, що видаляються знизу вгору.
+    """
+    deletes = sorted(set(deletes))
+    plan = WritePlan(sheet_name, updates=dict(updates))
+
+    # Наївний план: кожен новий рядок — окремий append, кожне оновлення — окремий запит,
+    # кожен рядок — окремий DeleteDimension з власним зсувом.
+    plan.naive_calls = len(updates) + len(appends) + (1 if deletes else 0)
+    plan.naive_cells = (len(updates) + len(appends)) * width + _shifted_cells([(r, r) for r in deletes], row_count, width)
+
+    pending = list(appends)
+    remaining: List[Tuple[int, int]] = []
+    for start, end in sorted(contiguous_ranges(deletes), key=lambda span: (span[1] - span[0], -span[0])):
+        size = end - start + 1
+        take = min(size, len(pending))
+        for offset in range(take):
+            plan.updates[start + offset] = pending.pop(0)
+        plan.rewritten += take
+        if take < size:
+            remaining.append((start + take, end))
+    plan.appends = pending
+    plan.delete_ranges = sorted(remaining, reverse=True)
+
+    plan.planned_calls = (1 if plan.updates else 0) + (1 if plan.appends else 0) + (1 if plan.delete_ranges else 0)
+    plan.planned_cells = (len(plan.updates) + len(plan.appends)) * width + _shifted_cells(plan.delete_ranges, row_count, width)
+    return plan
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+# utils/write_queue.py
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from .quota import Lane, current_lane, sheets_lane
+
+logger = logging.getLogger(__name__)
+
+WRITE_FLUSH_INTERVAL = 0.3  # секунд
+WRITE_MAX_BATCH = 100
+
+
+@dataclass
+class PendingWrite:
+    """Відкладений запис рядка: 'update' перезаписує row_index, 'append' додає рядок у кінець."""
+    kind: str
+    row_index: Optional[int]
+    values: List[Any]
+    future: asyncio.Future
+    # Номер зміни в журналі попереднього запису (якщо зміну журналізовано)
+    journal_seq: Optional[int] = None
+    # Смуга пріоритету того, хто поставив запис у чергу
+    lane: Lane = Lane.INTERACTIVE
+
+
+FlushFunc = Callable[[str, List[PendingWrite]], Awaitable[List[Any]]]
+
+
+class WriteQueue:
+    """
+    Черга відкладених записів в аркуші (write-behind).
+    Записи накопичуються по аркушах і скидаються одним пакетом кожні
+    flush_interval секунд або щойно в аркуші набереться max_batch операцій.
+    Пакети одного аркуша виконуються строго послідовно, тож записи в один
+    рядок застосовуються в порядку надходження. Пакет надсилається в смузі
+    найтерміновішого запису в ньому, а не в смузі задачі, що запустила скидання.
+    """
+
+    def __init__(self, flush_func: FlushFunc,
+                 flush_interval: float = WRITE_FLUSH_INTERVAL,
+                 max_batch: int = WRITE_MAX_BATCH):
+        self._flush_func = flush_func
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._pending: Dict[str, List[PendingWrite]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._timer: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.operations = 0
+        self.batches = 0
+
+    def has_pending(self, sheet_name: str) -> bool:
+        return bool(self._pending.get(sheet_name))
+
+    def enqueue_update(self, sheet_name: str, row_index: int, values: List[Any],
+                       journal_seq: Optional[int] = None) -> asyncio.Future:
+        return self._enqueue(sheet_name, PendingWrite('update', row_index, values, self._new_future(), journal_seq, current_lane.get()))
+
+    def enqueue_append(self, sheet_name: str, values: List[Any], predicted_row: Optional[int] = None,
+                       journal_seq: Optional[int] = None) -> asyncio.Future:
+        return self._enqueue(sheet_name, PendingWrite('append', predicted_row, values, self._new_future(), journal_seq, current_lane.get()))
+
+    @staticmethod
+    def _new_future() -> asyncio.Future:
+        return asyncio.get_running_loop().create_future()
+
+    def _enqueue(self, sheet_name: str, write: PendingWrite) -> asyncio.Future:
+        pending = self._pending.setdefault(sheet_name, [])
+        pending.append(write)
+        self.operations += 1
+        if len(pending) >= self.max_batch:
+            self._spawn(self.flush(sheet_name))
+        elif not self._timer or self._timer.done():
+            self._timer = self._spawn(self._flush_later())
+        return write.future
+
+    def _spawn(self, coro: Awaitable[None]) -> asyncio.Task:
+        # Тримаємо посилання, щоб задачу скидання не прибрав збирач сміття
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self, sheet_name: Optional[str] = None) -> None:
+        """
+        Скидає накопичені записи одного аркуша або всіх аркушів і чекає на пакети,
+        які вже надсилаються (їхні записи з черги вже забрано).
+        """
+        sheet_names = [sheet_name] if sheet_name else list(set(self._pending) | set(self._locks))
+        await asyncio.gather(*(self._flush_sheet(name) for name in sheet_names))
+
+    async def _flush_sheet(self, sheet_name: str) -> None:
+        lock = self._locks.setdefault(sheet_name, asyncio.Lock())
+        async with lock:
+            writes = self._pending.pop(sheet_name, [])
+            if not writes:
+                return
+            self.batches += 1
+            try:
+                with sheets_lane(min(write.lane for write in writes)):
+                    results = await self._flush_func(sheet_name, writes)
+            except Exception as e:
+                logger.error(f"Помилка скидання черги записів для '{sheet_name}': {e}", exc_info=True)
+                results = [False] * len(writes)
+            for write, result in zip(writes, results):
+                if not write.future.done():
+                    write.future.set_result(result)